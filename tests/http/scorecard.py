@@ -24,25 +24,49 @@
 ###########################################################################
 #
 import argparse
+import copy
+import csv
 import datetime
 import json
 import logging
+import math
 import os
+import random
 import re
+import shutil
+import sqlite3
+import subprocess
 import sys
-from statistics import mean
-from typing import Any, Dict, List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import mean, stdev
+from threading import Barrier
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
 
 from testenv import (
     Caddy,
+    CertificateSpec,
+    CpuPlacement,
     CurlClient,
     Dante,
     Env,
+    EnvError,
     ExecResult,
+    FlameGraph,
+    H2oProxy,
     H2oServer,
     Httpd,
+    LocalClient,
+    NetRelay,
+    NghttpxFwd,
     NghttpxQuic,
+    PerfStat,
     RunProfile,
+    RunThroughput,
+    ServerProfile,
+    Sshd,
+    VsFTPD,
+    WsServer,
 )
 
 log = logging.getLogger(__name__)
@@ -52,7 +76,103 @@ class ScoreCardError(Exception):
     pass
 
 
+class LatencyHistogram:
+    """
+    Compact, mergeable histogram of durations.
+
+    Values are counted in microseconds, in log-linear buckets like an
+    HdrHistogram: each power of two is split into 2^SUB_BITS equal
+    buckets, so any value is recorded with ~3% precision while a
+    range from 1us to hours needs only a few hundred buckets.
+    """
+
+    SUB_BITS = 5
+    PERCENTILES: ClassVar[List[float]] = [50, 90, 99, 99.9]
+
+    def __init__(self, counts: Optional[Dict[int, int]] = None):
+        self._counts = dict(counts) if counts else {}
+
+    @classmethod
+    def bucket_of(cls, usecs: int) -> int:
+        if usecs < (1 << cls.SUB_BITS):
+            return usecs
+        shift = usecs.bit_length() - 1 - cls.SUB_BITS
+        return ((shift + 1) << cls.SUB_BITS) + (usecs >> shift) - (1 << cls.SUB_BITS)
+
+    @classmethod
+    def bucket_range(cls, idx: int) -> Tuple[int, int]:
+        if idx < (1 << cls.SUB_BITS):
+            return idx, idx
+        shift = (idx >> cls.SUB_BITS) - 1
+        top = (idx & ((1 << cls.SUB_BITS) - 1)) + (1 << cls.SUB_BITS)
+        return top << shift, ((top + 1) << shift) - 1
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts.values())
+
+    def add(self, secs: float, count: int = 1):
+        idx = self.bucket_of(max(0, int(secs * 1000000)))
+        self._counts[idx] = self._counts.get(idx, 0) + count
+
+    def merge(self, other: 'LatencyHistogram'):
+        for idx, count in other._counts.items():
+            self._counts[idx] = self._counts.get(idx, 0) + count
+
+    def percentile(self, pct: float) -> float:
+        """Get the value in seconds below which `pct` percent of values are."""
+        total = self.count
+        if total == 0:
+            return -1
+        threshold = total * pct / 100
+        seen = 0
+        for idx in sorted(self._counts.keys()):
+            seen += self._counts[idx]
+            if seen >= threshold:
+                lower, upper = self.bucket_range(idx)
+                return (lower + upper) / 2000000
+        lower, upper = self.bucket_range(max(self._counts.keys()))
+        return (lower + upper) / 2000000
+
+    def to_json(self) -> Dict[str, Any]:
+        props = {f'p{pct}': self.percentile(pct) for pct in self.PERCENTILES}
+        props['count'] = self.count
+        # json keys are strings
+        props['buckets'] = {str(idx): count for idx, count in sorted(self._counts.items())}
+        return props
+
+    @classmethod
+    def from_json(cls, props: Dict[str, Any]) -> 'LatencyHistogram':
+        return LatencyHistogram({int(idx): count for idx, count in props['buckets'].items()})
+
+
 class Card:
+
+    # the phases of a transfer, in the order they happen
+    PHASES: ClassVar[List[str]] = ['dns', 'connect', 'tls', 'send', 'wait', 'receive']
+
+    @classmethod
+    def xfer_phases(cls, stats: Dict[str, float]) -> Dict[str, float]:
+        # The seconds a transfer spent in each phase, from the `time_*`
+        # values of curl that count from its start. `connect` is TCP or
+        # QUIC, `send` the request and its body, which needs a curl that
+        # knows `time_posttransfer`. `wait` lasts until the first byte of
+        # the response, the think time of the server. On a reused
+        # connection, the setup phases are close to 0.
+        phases = {
+            'dns': stats['time_namelookup'],
+            'connect': stats['time_connect'] - stats['time_namelookup'],
+            'tls': stats['time_appconnect'] - stats['time_connect']
+            if stats['time_appconnect'] > 0 else 0,
+        }
+        sent = stats['time_pretransfer']
+        if stats.get('time_posttransfer'):
+            phases['send'] = stats['time_posttransfer'] - sent
+            sent = stats['time_posttransfer']
+        phases['wait'] = stats['time_starttransfer'] - sent
+        phases['receive'] = stats['time_total'] - max(stats['time_starttransfer'], sent)
+        return {name: max(0, secs) for name, secs in phases.items()}
+
     @classmethod
     def fmt_ms(cls, tval):
         return f'{int(tval * 1000)} ms' if tval >= 0 else '--'
@@ -105,44 +225,139 @@ class Card:
         return f'{val:0.000f} r/s' if val >= 0 else '--'
 
     @classmethod
-    def mk_mbs_cell(cls, samples, profiles, errors):
+    def fmt_handshakes(cls, val):
+        return f'{val:0.000f} hs/s' if val >= 0 else '--'
+
+    @classmethod
+    def fmt_msgs(cls, val):
+        return f'{val:0.000f} msg/s' if val >= 0 else '--'
+
+    @classmethod
+    def fmt_per_cpu(cls, val, unit):
+        # `unit` is 'bytes' or 'requests'
+        if unit == 'bytes':
+            return Card.fmt_mbs(val).replace('/s', '/cpu-s')
+        return f'{val:0.000f} r/cpu-s'
+
+    @classmethod
+    def mk_per_cpu(cls, cell, per_cpu, unit):
+        # the amount of work done per CPU-second of the clients
+        if per_cpu:
+            val = mean(per_cpu)
+            cell['per_cpu'] = {
+                'val': val,
+                'unit': unit,
+                'samples': per_cpu,
+                'sval': Card.fmt_per_cpu(val, unit),
+            }
+
+    @classmethod
+    def mk_perf(cls, cell, perf, unit):
+        # hardware counters of the clients per byte or request
+        if perf:
+            cell['perf'] = {key: mean([p[key] for p in perf if key in p])
+                            for key in {k for p in perf for k in p}}
+            cell['perf']['unit'] = unit
+
+    @classmethod
+    def mk_mem(cls, cell, mem, unit):
+        # allocations of the clients per transfer and per byte or request
+        if mem:
+            cell['mem'] = {
+                'allocs': mean([m['allocs'] for m in mem]),
+                'alloc-bytes': mean([m['alloc-bytes'] for m in mem]),
+                'peak-heap': max([m['peak-heap'] for m in mem]),
+                'unit': unit,
+            }
+
+    @classmethod
+    def mk_phases(cls, cell, phases):
+        # the durations of the transfer phases over all runs
+        if phases:
+            cell['phases'] = {name: phases[name].to_json() for name in Card.PHASES
+                              if name in phases and phases[name].count > 0}
+
+    @classmethod
+    def mk_handshakes_cell(cls, samples, errors, latencies=None):
+        val = mean(samples) if len(samples) else -1
+        cell = {
+            'val': val,
+            'sval': Card.fmt_handshakes(val) if val >= 0 else '--',
+            'samples': samples,
+        }
+        if latencies:
+            cell['latency'] = {name: h.to_json() for name, h in latencies.items()
+                               if h.count > 0}
+        if len(errors):
+            cell['errors'] = errors
+        return cell
+
+    @classmethod
+    def mk_mbs_cell(cls, samples, profiles, errors, clients=None, per_cpu=None):
         val = mean(samples) if len(samples) else -1
         cell = {
             'val': val,
             'sval': Card.fmt_mbs(val) if val >= 0 else '--',
+            'samples': samples,
         }
         if len(profiles):
             cell['stats'] = RunProfile.AverageStats(profiles)
+        Card.mk_per_cpu(cell, per_cpu, 'bytes')
+        if clients:
+            cell['clients'] = Card.mk_clients_spread(clients, Card.fmt_mbs)
         if len(errors):
             cell['errors'] = errors
         return cell
 
     @classmethod
-    def mk_speed_cell(cls, samples, profiles, errors, limit):
+    def mk_speed_cell(cls, samples, profiles, errors, limit, clients=None,
+                      per_cpu=None):
         val = mean(samples) if len(samples) else -1
         cell = {
             'val': val,
             'sval': Card.fmt_speed_result(val, limit) if val >= 0 else '--',
+            'samples': samples,
         }
         if len(profiles):
             cell['stats'] = RunProfile.AverageStats(profiles)
+        Card.mk_per_cpu(cell, per_cpu, 'bytes')
+        if clients:
+            cell['clients'] = Card.mk_clients_spread(clients, Card.fmt_speed)
         if len(errors):
             cell['errors'] = errors
         return cell
 
     @classmethod
-    def mk_reqs_cell(cls, samples, profiles, errors):
+    def mk_reqs_cell(cls, samples, profiles, errors, clients=None, latencies=None,
+                     per_cpu=None):
         val = mean(samples) if len(samples) else -1
         cell = {
             'val': val,
             'sval': Card.fmt_reqs(val) if val >= 0 else '--',
+            'samples': samples,
         }
         if len(profiles):
             cell['stats'] = RunProfile.AverageStats(profiles)
+        Card.mk_per_cpu(cell, per_cpu, 'requests')
+        if clients:
+            cell['clients'] = Card.mk_clients_spread(clients, Card.fmt_reqs)
+        if latencies:
+            cell['latency'] = {name: h.to_json() for name, h in latencies.items()
+                               if h.count > 0}
         if len(errors):
             cell['errors'] = errors
         return cell
 
+    @classmethod
+    def mk_clients_spread(cls, vals, fmt):
+        # how the values of the single clients in a multi-client run differ
+        return {
+            'min': min(vals),
+            'max': max(vals),
+            'stdev': stdev(vals) if len(vals) > 1 else 0.0,
+            'sval': f'{fmt(min(vals))}..{fmt(max(vals))}',
+        }
+
     @classmethod
     def parse_size(cls, s):
         m = re.match(r'(\d+)(mb|kb|gb)?', s, re.IGNORECASE)
@@ -172,6 +387,33 @@ class Card:
         if 'limit-rate' in score['meta']:
             print(f'--limit-rate: {score["meta"]["limit-rate"]}')
         print(f'Samples Size: {score["meta"]["samples"]}')
+        if 'clients' in score['meta']:
+            print(f'Clients: {score["meta"]["clients"]}')
+        if 'warmups' in score['meta']:
+            print(f'Warmup runs: {score["meta"]["warmups"]}')
+        if 'placement' in score['meta']:
+            placed = []
+            for name, placement in score['meta']['placement'].items():
+                props = []
+                if 'cpus' in placement:
+                    props.append(f'cpus {",".join([str(cpu) for cpu in placement["cpus"]])}')
+                if 'nice' in placement:
+                    props.append(f'nice {placement["nice"]}')
+                placed.append(f'{name} {" ".join(props)}')
+            print(f'Placement: {", ".join(placed)}')
+        if 'ab' in score['meta']:
+            for name in ['a', 'b']:
+                curl = score['meta']['ab'][name]
+                print(f'Curl {name.upper()}: {curl["path"]}, {curl["version"]}')
+            print('Runs alternate ABBA, [B vs A] is the paired change with its '
+                  f'{ScoreDiff.CONFIDENCE * 100:.0f}% confidence interval, * if significant')
+        if 'adaptive' in score['meta']:
+            adaptive = score['meta']['adaptive']
+            targets = [f'{name} {adaptive[name] * 100:.1f}%'
+                       for name in ['target-cv', 'target-ci'] if name in adaptive]
+            print(f'Adaptive sampling: {", ".join(targets)}, '
+                  f'max {adaptive["max-samples"]} samples, [n/cv] per cell, '
+                  f'! if not stable')
         if 'handshakes' in score:
             print(f'{"Handshakes":<24} {"ipv4":25} {"ipv6":28}')
             print(f'  {"Host":<17} {"Connect":>12} {"Handshake":>12} '
@@ -183,53 +425,747 @@ class Card:
                       f'{Card.fmt_ms(val["ipv6-handshake"]):>12}     '
                       f'{"/".join(val["ipv4-errors"] + val["ipv6-errors"]):<20}'
                       )
-        for name in ['downloads', 'uploads', 'requests']:
+        for name in ['tls-handshakes', 'downloads', 'decoding', 'multiplexing', 'uploads',
+                     'requests', 'websockets', 'ws-pings', 'proxy-overhead']:
             if name in score:
                 Card.print_score_table(score[name])
 
+    @classmethod
+    def fmt_stats_note(cls, cell):
+        stats = cell['stats']
+        cpu = f'{stats["cpu"]:>.1f}%' if 'cpu' in stats else '--'
+        rss = Card.fmt_size(stats['rss-max']) if 'rss-max' in stats else '--'
+        return f'[{cpu}/{rss}]'
+
+    @classmethod
+    def fmt_server_note(cls, cell):
+        servers = [f'{name} {stats["cpu"]:.0f}%/{Card.fmt_size(stats["rss-max"])}'
+                   for name, stats in cell['server'].items()]
+        mark = '!' if cell.get('server_bound') else ''
+        return f'[{" ".join(servers)}{mark}]'
+
+    @classmethod
+    def fmt_perf_note(cls, cell):
+        perf = cell['perf']
+        unit = 'B' if perf['unit'] == 'bytes' else 'r'
+        vals = [f'{Card.fmt_count(perf[key])} {name}/{unit}'
+                for key, name in [('cycles', 'cyc'), ('instructions', 'ins')]
+                if key in perf]
+        return f'[{" ".join(vals)}]' if vals else '[--]'
+
+    @classmethod
+    def fmt_mem_note(cls, cell):
+        # bytes allocated per MB transferred or per request
+        mem = cell['mem']
+        if mem['unit'] == 'bytes':
+            alloc_bytes = f'{Card.fmt_size(mem["alloc-bytes"] * 1024 * 1024)}/MB'
+        else:
+            alloc_bytes = f'{Card.fmt_size(mem["alloc-bytes"])}/r'
+        return f'[{Card.fmt_count(mem["allocs"])} a/x {alloc_bytes} ' \
+               f'{Card.fmt_size(mem["peak-heap"])}]'
+
+    @classmethod
+    def fmt_count(cls, val):
+        if val >= 1000 * 1000:
+            return f'{val / (1000 * 1000):.3g}M'
+        if val >= 1000:
+            return f'{val / 1000:.3g}k'
+        return f'{val:.3g}'
+
+    @classmethod
+    def fmt_per_cpu_note(cls, cell):
+        return f'[{cell["per_cpu"]["sval"]}]'
+
+    @classmethod
+    def fmt_ratio_note(cls, cell):
+        # decoded bytes per byte received
+        return f'[{cell["ratio"]:.1f}x]'
+
+    @classmethod
+    def fmt_clients_note(cls, cell):
+        return f'[{cell["clients"]["sval"]}]'
+
+    @classmethod
+    def fmt_sampling_note(cls, cell):
+        mark = '' if cell['sampling']['stable'] else '!'
+        return f'[{cell["sampling"]["count"]}/{cell["sampling"]["cv"] * 100:.1f}%{mark}]'
+
+    @classmethod
+    def fmt_ab_note(cls, cell):
+        ab = cell['ab']
+        if 'delta' not in ab:
+            return '[--]'
+        ci = f' {ab["ci"][0] * 100:+.1f}/{ab["ci"][1] * 100:+.1f}' if ab['ci'] else ''
+        mark = '*' if ab['significant'] else ''
+        return f'[{ab["delta"] * 100:+.1f}%{ci}{mark}]'
+
+    @classmethod
+    def fmt_timeseries_note(cls, cell):
+        ts = cell['timeseries']
+        return f'[{Card.fmt_ms(ts["ramp_up"])}/{Card.fmt_mbs(ts["steady_rate"])}' \
+               f'/{ts["stalls"]:.1f}]'
+
+    @classmethod
+    def fmt_mux_note(cls, cell):
+        return f'[{Card.fmt_size(cell["mux"]["rss_per_stream"])}]'
+
+    @classmethod
+    def cell_notes(cls):
+        # optional properties of a cell, shown in brackets after its value
+        # as (cell key, column header, formatter)
+        return [
+            ('stats', '[cpu/rss]', Card.fmt_stats_note),
+            ('per_cpu', '[per cpu-s]', Card.fmt_per_cpu_note),
+            ('ratio', '[ratio]', Card.fmt_ratio_note),
+            ('perf', '[cycles/instructions]', Card.fmt_perf_note),
+            ('mem', '[allocs/bytes/heap]', Card.fmt_mem_note),
+            ('server', '[server cpu/rss]', Card.fmt_server_note),
+            ('clients', '[clients]', Card.fmt_clients_note),
+            ('sampling', '[n/cv]', Card.fmt_sampling_note),
+            ('ab', '[B vs A]', Card.fmt_ab_note),
+            ('timeseries', '[ramp/steady/stalls]', Card.fmt_timeseries_note),
+            ('mux', '[rss/stream]', Card.fmt_mux_note),
+        ]
+
     @classmethod
     def print_score_table(cls, score):
         cols = score['cols']
         rows = score['rows']
         colw = []
-        statw = 13
+        col_notes = []
         errors = []
-        col_has_stats = []
         for idx, col in enumerate(cols):
             cellw = max([len(r[idx]["sval"]) for r in rows])
             colw.append(max(cellw, len(col)))
-            col_has_stats.append(False)
-            for row in rows:
-                if 'stats' in row[idx]:
-                    col_has_stats[idx] = True
-                    break
+            notes = []
+            for key, header, fmt in Card.cell_notes():
+                vals = [fmt(r[idx]) for r in rows if key in r[idx]]
+                if len(vals):
+                    notew = max([len(header)] + [len(v) for v in vals])
+                    notes.append((key, header, fmt, notew))
+            col_notes.append(notes)
         if 'title' in score['meta']:
             print(score['meta']['title'])
         for idx, col in enumerate(cols):
-            if col_has_stats[idx]:
-                print(f'  {col:>{colw[idx]}} {"[cpu/rss]":<{statw}}', end='')
-            else:
-                print(f'  {col:>{colw[idx]}}', end='')
+            print(f'  {col:>{colw[idx]}}', end='')
+            for _, header, _, notew in col_notes[idx]:
+                print(f' {header:<{notew}}', end='')
         print()
         for row in rows:
             for idx, cell in enumerate(row):
                 print(f'  {cell["sval"]:>{colw[idx]}}', end='')
-                if col_has_stats[idx]:
-                    if 'stats' in cell:
-                        s = f'[{cell["stats"]["cpu"]:>.1f}%' \
-                            f'/{Card.fmt_size(cell["stats"]["rss-max"])}]'
-                    else:
-                        s = ''
-                    print(f' {s:<{statw}}', end='')
+                for key, _, fmt, notew in col_notes[idx]:
+                    s = fmt(cell) if key in cell else ''
+                    print(f' {s:<{notew}}', end='')
                 if 'errors' in cell:
                     errors.extend(cell['errors'])
             print()
         if len(errors):
             print(f'Errors: {errors}')
+        Card.print_latency_table(score)
+        Card.print_phase_table(score)
+
+    @classmethod
+    def print_latency_table(cls, score):
+        lines = []
+        for idx, col in enumerate(score['cols']):
+            for row in score['rows']:
+                for name, props in row[idx].get('latency', {}).items():
+                    label = f'{row[0]["sval"]} {col} {name}' \
+                        if len(score['rows']) > 1 else f'{col} {name}'
+                    lines.append((label, [props[f'p{pct}']
+                                          for pct in LatencyHistogram.PERCENTILES]))
+        if not len(lines):
+            return
+        labelw = max([len('Latency (ms)')] + [len(label) for label, _ in lines])
+        print(f'  {"Latency (ms)":<{labelw}}', end='')
+        for pct in LatencyHistogram.PERCENTILES:
+            print(f'  {f"p{pct}":>9}', end='')
+        print()
+        for label, vals in lines:
+            print(f'  {label:<{labelw}}', end='')
+            for val in vals:
+                print(f'  {val * 1000:>9.3f}', end='')
+            print()
+
+    @classmethod
+    def print_phase_table(cls, score):
+        lines = []
+        for idx, col in enumerate(score['cols']):
+            for row in score['rows']:
+                phases = row[idx].get('phases')
+                if phases:
+                    label = f'{row[0]["sval"]} {col}' if len(score['rows']) > 1 else col
+                    lines.append((label, phases))
+        if not len(lines):
+            return
+        names = [name for name in Card.PHASES
+                 if any(name in phases for _, phases in lines)]
+        vals = [[f'{phases[name]["p50"] * 1000:.3f}/{phases[name]["p99"] * 1000:.3f}'
+                 if name in phases else '--' for name in names] for _, phases in lines]
+        labelw = max([len('Phases (ms p50/p99)')] + [len(label) for label, _ in lines])
+        valw = [max([len(name)] + [len(v[i]) for v in vals]) for i, name in enumerate(names)]
+        print(f'  {"Phases (ms p50/p99)":<{labelw}}', end='')
+        for i, name in enumerate(names):
+            print(f'  {name:>{valw[i]}}', end='')
+        print()
+        for (label, _), line in zip(lines, vals):
+            print(f'  {label:<{labelw}}', end='')
+            for i, v in enumerate(line):
+                print(f'  {v:>{valw[i]}}', end='')
+            print()
+
+
+class ScoreDiff:
+    """Compare the cells of two scorecard results."""
+
+    ROUNDS = 2000
+    CONFIDENCE = 0.95
+
+    @classmethod
+    def measured_cells(cls, score) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        # cells with measurements, keyed by (section, row label, column)
+        cells = {}
+        for section, table in score.items():
+            if not isinstance(table, dict) or 'cols' not in table:
+                continue
+            for row in table['rows']:
+                for idx, col in enumerate(table['cols']):
+                    cell = row[idx]
+                    if idx > 0 and ('samples' in cell or 'stats' in cell):
+                        cells[(section, row[0]['sval'], col)] = cell
+                    if idx > 0 and 'per_cpu' in cell:
+                        cells[(section, row[0]['sval'], f'{col} per cpu-s')] = cell['per_cpu']
+        return cells
+
+    @classmethod
+    def bootstrap(cls, base: List[float], cur: List[float],
+                  rng: random.Random) -> Tuple[Optional[float], Optional[float]]:
+        """Get the confidence interval of the relative change of the means."""
+        if len(base) < 2 or len(cur) < 2:
+            return None, None
+        deltas = sorted([
+            mean(rng.choices(cur, k=len(cur))) / mean(rng.choices(base, k=len(base))) - 1
+            for _ in range(cls.ROUNDS)
+        ])
+        tail = (1 - cls.CONFIDENCE) / 2
+        return deltas[int(cls.ROUNDS * tail)], deltas[int(cls.ROUNDS * (1 - tail)) - 1]
+
+    @classmethod
+    def paired_bootstrap(cls, pairs: List[Tuple[float, float]],
+                         rng: random.Random) -> Tuple[Optional[float], Optional[float]]:
+        """Get the confidence interval of the relative change of paired values."""
+        if len(pairs) < 2:
+            return None, None
+        deltas = []
+        for _ in range(cls.ROUNDS):
+            resampled = rng.choices(pairs, k=len(pairs))
+            base = sum([a for a, _ in resampled])
+            if base > 0:
+                deltas.append(sum([b for _, b in resampled]) / base - 1)
+        if not len(deltas):
+            return None, None
+        deltas.sort()
+        tail = (1 - cls.CONFIDENCE) / 2
+        return deltas[int(len(deltas) * tail)], deltas[int(len(deltas) * (1 - tail)) - 1]
+
+    @classmethod
+    def compare(cls, base_score, cur_score, threshold: float) -> List[Dict[str, Any]]:
+        # all our values are rates, a lower current value is a regression
+        rng = random.Random(1)  # reproducible intervals
+        base_cells = cls.measured_cells(base_score)
+        cur_cells = cls.measured_cells(cur_score)
+        diffs = []
+        for key, base in base_cells.items():
+            if key not in cur_cells:
+                continue
+            cur = cur_cells[key]
+            if base['val'] <= 0 or cur['val'] < 0:
+                continue
+            base_samples = base.get('samples', [base['val']])
+            cur_samples = cur.get('samples', [cur['val']])
+            delta = cur['val'] / base['val'] - 1
+            ci_low, ci_high = cls.bootstrap(base_samples, cur_samples, rng)
+            significant = ci_low is not None and (ci_low > 0 or ci_high < 0)
+            diff = {
+                'section': key[0],
+                'row': key[1],
+                'col': key[2],
+                'base': base['val'],
+                'base_sval': base['sval'],
+                'cur': cur['val'],
+                'cur_sval': cur['sval'],
+                'delta': delta,
+                'ci': [ci_low, ci_high] if ci_low is not None else None,
+                'significant': significant,
+                'regression': significant and delta < -threshold,
+            }
+            # the median of each transfer phase, to see where a change is
+            if 'phases' in base and 'phases' in cur:
+                diff['phases'] = {name: [base['phases'][name]['p50'], cur['phases'][name]['p50']]
+                                  for name in Card.PHASES
+                                  if name in base['phases'] and name in cur['phases']}
+            diffs.append(diff)
+        return diffs
+
+    @classmethod
+    def overhead(cls, direct_score, score, via: str) -> Optional[Dict[str, Any]]:
+        # how much the cells of `score` lose against the ones measured
+        # without the detour `via`, as a table
+        rows = []
+        for d in cls.compare(direct_score, score, threshold=0):
+            ci = f' [{d["ci"][0] * 100:+.1f}%, {d["ci"][1] * 100:+.1f}%]' \
+                if d['ci'] else ''
+            rows.append([
+                {'val': None, 'sval': f'{d["section"]} {d["row"]} {d["col"]}'},
+                {'val': d['base'], 'sval': d['base_sval']},
+                {'val': d['cur'], 'sval': d['cur_sval']},
+                {'val': d['delta'], 'sval': f'{d["delta"] * 100:+.1f}%{ci}'},
+            ])
+        if not len(rows):
+            return None
+        return {
+            'meta': {
+                'title': f'Overhead via {via}, relative to direct transfers',
+            },
+            'cols': ['scenario', 'direct', f'via {via}', 'change'],
+            'rows': rows,
+        }
+
+    @classmethod
+    def print_diffs(cls, diffs: List[Dict[str, Any]], threshold: float):
+        if not len(diffs):
+            print('no common cells to compare')
+            return
+        labels = [f'{d["section"]} {d["row"]} {d["col"]}' for d in diffs]
+        labelw = max([len('Scenario')] + [len(label) for label in labels])
+        basew = max([len('Baseline')] + [len(d['base_sval']) for d in diffs])
+        curw = max([len('Current')] + [len(d['cur_sval']) for d in diffs])
+        print(f'Comparison, regressions beyond {threshold * 100:.1f}% flagged, '
+              f'{cls.CONFIDENCE * 100:.0f}% confidence intervals')
+        print(f'  {"Scenario":<{labelw}}  {"Baseline":>{basew}}  {"Current":>{curw}}'
+              f'  {"Delta":>8}  Interval')
+        for label, d in zip(labels, diffs):
+            ci = f'[{d["ci"][0] * 100:+.1f}%, {d["ci"][1] * 100:+.1f}%]' \
+                if d['ci'] else '--'
+            flag = 'REGRESSION' if d['regression'] else \
+                ('significant' if d['significant'] else '')
+            line = f'  {label:<{labelw}}  {d["base_sval"]:>{basew}}  {d["cur_sval"]:>{curw}}' \
+                   f'  {d["delta"] * 100:>+7.1f}%  {ci:<17} {flag}'
+            print(line.rstrip())
+            if d['significant'] and d.get('phases'):
+                phases = [f'{name} {base * 1000:.3f}->{cur * 1000:.3f}'
+                          for name, (base, cur) in d['phases'].items()]
+                print(f'    phases p50 ms: {", ".join(phases)}')
+
+    @classmethod
+    def flame_diff(cls, base_score, cur_score, out_dir: str,
+                   flame: Optional[FlameGraph], top: int) -> List[Dict[str, Any]]:
+        # For each scenario with collapsed stacks in both scores, the
+        # functions whose share of samples grew the most. With `flame`,
+        # also draw a differential flame graph of it into `out_dir`.
+        base_cells = cls.measured_cells(base_score)
+        cur_cells = cls.measured_cells(cur_score)
+        diffs = []
+        for key, cur_cell in cur_cells.items():
+            base_cell = base_cells.get(key)
+            if not base_cell or 'flame' not in base_cell or 'flame' not in cur_cell:
+                continue
+            if not os.path.exists(base_cell['flame']) or \
+                    not os.path.exists(cur_cell['flame']):
+                continue
+            section, row, col = key
+            diff = {
+                'section': section,
+                'row': row,
+                'col': col,
+                'grown': [{
+                    'function': func,
+                    'base': base_share,
+                    'current': cur_share,
+                } for func, base_share, cur_share in FlameGraph.grown(
+                    FlameGraph.read_stacks(base_cell['flame']),
+                    FlameGraph.read_stacks(cur_cell['flame']), top=top)],
+            }
+            if flame:
+                os.makedirs(out_dir, exist_ok=True)
+                fbase = os.path.join(out_dir, ScoreRunner.flame_name(
+                    f'{section}-{row}-{col}'))
+                flame.diff_svg(base_cell['flame'], cur_cell['flame'],
+                               f'{fbase}.diff.svg', f'{fbase}.stderr',
+                               title=f'{section} {row} {col}',
+                               subtitle=f'{base_score["meta"]["curl_version"]} -> '
+                                        f'{cur_score["meta"]["curl_version"]}')
+                diff['svg'] = f'{fbase}.diff.svg'
+            diffs.append(diff)
+        return diffs
+
+    @classmethod
+    def print_flame_diffs(cls, diffs: List[Dict[str, Any]]):
+        if not len(diffs):
+            print('no common cells with stacks to compare')
+            return
+        for d in diffs:
+            print(f'{d["section"]} {d["row"]} {d["col"]}: share of samples grown most')
+            if 'svg' in d:
+                print(f'  {d["svg"]}')
+            if not len(d['grown']):
+                print('  --')
+                continue
+            funcw = max([len('Function')] + [len(g['function']) for g in d['grown']])
+            print(f'  {"Function":<{funcw}}  {"Baseline":>8}  {"Current":>8}  {"Delta":>8}')
+            for g in d['grown']:
+                print(f'  {g["function"]:<{funcw}}  {g["base"] * 100:>7.2f}%'
+                      f'  {g["current"] * 100:>7.2f}%'
+                      f'  {(g["current"] - g["base"]) * 100:>+7.2f}%')
+
+
+class ScoreHistory:
+    """Results of scorecard runs, kept in a SQLite database."""
+
+    TLS_LIBS: ClassVar[List[str]] = [
+        'openssl', 'quictls', 'boringssl', 'libressl', 'aws-lc', 'gnutls',
+        'wolfssl', 'mbedtls', 'rustls-ffi', 'schannel', 'securetransport',
+    ]
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT NOT NULL,
+                curl_version TEXT,
+                tls TEXT,
+                libs TEXT,
+                protocol TEXT,
+                server TEXT,
+                meta TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cells (
+                run_id INTEGER NOT NULL REFERENCES runs(id),
+                scenario TEXT NOT NULL,
+                val REAL,
+                sval TEXT,
+                p99 REAL,
+                cell TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cells_scenario ON cells(scenario);
+        """)
+
+    def close(self):
+        self._db.close()
+
+    @classmethod
+    def curl_libs(cls, meta) -> Tuple[str, Optional[str]]:
+        # from 'curl 8.x.y (os) libcurl/8.x.y OpenSSL/3.x zlib/1.x ...'
+        libs = re.sub(r'^curl \S+ \([^)]*\) ', '', meta.get('curl_V', ''))
+        for lib in libs.split(' '):
+            if lib.split('/')[0].lower() in cls.TLS_LIBS:
+                return libs, lib
+        return libs, None
+
+    def add(self, score):
+        meta = score['meta']
+        libs, tls = self.curl_libs(meta)
+        with self._db:
+            cur = self._db.execute(
+                'INSERT INTO runs (date, curl_version, tls, libs, protocol, server, meta) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (meta['date'], meta.get('curl_version'), tls, libs,
+                 meta.get('protocol'), meta.get('server'), json.dumps(meta)))
+            run_id = cur.lastrowid
+            for (section, row, col), cell in ScoreDiff.measured_cells(score).items():
+                p99 = cell['latency']['total']['p99'] \
+                    if 'total' in cell.get('latency', {}) else None
+                self._db.execute(
+                    'INSERT INTO cells (run_id, scenario, val, sval, p99, cell) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (run_id, f'{section}/{row}/{col}', cell['val'], cell['sval'],
+                     p99, json.dumps(cell)))
+
+    def query(self, scenario: str) -> List[sqlite3.Row]:
+        # `scenario` is 'section/row/column' and may use '*' wildcards
+        self._db.row_factory = sqlite3.Row
+        return self._db.execute(
+            'SELECT runs.date, runs.curl_version, runs.tls, runs.protocol, '
+            'runs.server, cells.scenario, cells.val, cells.sval, cells.p99 '
+            'FROM cells JOIN runs ON cells.run_id = runs.id '
+            'WHERE cells.scenario GLOB ? '
+            'ORDER BY cells.scenario, runs.date', (scenario,)).fetchall()
+
+    def print_history(self, scenario: str):
+        rows = self.query(scenario)
+        if not len(rows):
+            print(f'no results for {scenario}')
+            return
+        for name in sorted({row['scenario'] for row in rows}):
+            runs = [row for row in rows if row['scenario'] == name]
+            print(f'History of {name}')
+            cols = [
+                ('Date', lambda r: r['date'][:19]),
+                ('curl', lambda r: r['curl_version'] or '--'),
+                ('TLS', lambda r: r['tls'] or '--'),
+                ('Protocol', lambda r: r['protocol'] or '--'),
+                ('Server', lambda r: r['server'] or '--'),
+                ('Value', lambda r: r['sval']),
+                ('p99', lambda r: f'{r["p99"] * 1000:.3f} ms' if r['p99'] is not None else '--'),
+            ]
+            lines = [[fmt(r) for _, fmt in cols] for r in runs]
+            widths = [max([len(title)] + [len(line[idx]) for line in lines])
+                      for idx, (title, _) in enumerate(cols)]
+            print('  ' + '  '.join(f'{title:<{widths[idx]}}'
+                                   for idx, (title, _) in enumerate(cols)).rstrip())
+            for line in lines:
+                print('  ' + '  '.join(f'{val:<{widths[idx]}}'
+                                       for idx, val in enumerate(line)).rstrip())
+            # how the value moved with curl and TLS versions
+            versions = {}
+            for r in runs:
+                if r['val'] is not None and r['val'] >= 0:
+                    versions.setdefault((r['curl_version'], r['tls']), []).append(r['val'])
+            if len(versions) > 1:
+                first = None
+                print('  by version:')
+                for (curl_version, tls), vals in versions.items():
+                    avg = mean(vals)
+                    first = avg if first is None else first
+                    if runs[0]['sval'].endswith('hs/s'):
+                        fmt = Card.fmt_handshakes
+                    elif runs[0]['sval'].endswith('msg/s'):
+                        fmt = Card.fmt_msgs
+                    elif runs[0]['sval'].endswith('r/s'):
+                        fmt = Card.fmt_reqs
+                    else:
+                        fmt = Card.fmt_mbs
+                    print(f'    curl {curl_version} {tls}: mean of {len(vals)}: '
+                          f'{fmt(avg)} ({(avg / first - 1) * 100:+.1f}%)')
+
+
+class ScoreExport:
+    """
+    Cells of scorecard runs, written out as they complete.
+
+    JSON lines and CSV get a record per cell, flushed right away, so
+    they can be followed during a run and keep everything measured
+    before a crash. The OpenMetrics file is replaced after each cell
+    with the exposition of all cells so far.
+    """
+
+    CSV_FIELDS: ClassVar[List[str]] = [
+        'date', 'curl_version', 'protocol', 'implementation', 'server',
+        'section', 'row', 'col', 'val', 'sval', 'samples', 'cpu', 'rss_max',
+        'per_cpu', 'errors',
+    ]
+    # OpenMetrics gauges as (name, help, cell -> value or None)
+    METRICS: ClassVar[List[Tuple[str, str, Callable[[Dict[str, Any]], Optional[float]]]]] = [
+        ('curl_scorecard_value', 'Value of a scorecard cell, a rate per second.',
+         lambda cell: cell['val'] if cell['val'] >= 0 else None),
+        ('curl_scorecard_per_cpu_second', 'Bytes or requests per CPU-second of curl.',
+         lambda cell: cell.get('per_cpu', {}).get('val')),
+        ('curl_scorecard_cpu_percent', 'Average CPU load of curl, in percent of a core.',
+         lambda cell: cell.get('stats', {}).get('cpu')),
+        ('curl_scorecard_rss_bytes', 'Maximum resident memory of curl.',
+         lambda cell: cell.get('stats', {}).get('rss-max')),
+    ]
+
+    def __init__(self, jsonl_file: Optional[str] = None,
+                 csv_file: Optional[str] = None,
+                 openmetrics_file: Optional[str] = None):
+        self._jsonl = open(jsonl_file, 'w') if jsonl_file else None  # noqa: SIM115
+        self._csv_fd = open(csv_file, 'w', newline='') if csv_file else None  # noqa: SIM115
+        self._csv = None
+        if self._csv_fd:
+            self._csv = csv.DictWriter(self._csv_fd, fieldnames=ScoreExport.CSV_FIELDS)
+            self._csv.writeheader()
+            self._csv_fd.flush()
+        self._openmetrics_file = openmetrics_file
+        self._records = []
+
+    def close(self):
+        if self._jsonl:
+            self._jsonl.close()
+        if self._csv_fd:
+            self._csv_fd.close()
+
+    def on_cell(self, meta: Dict[str, Any], section: str, row: str, col: str,
+                cell: Dict[str, Any]):
+        self.add_record(self.mk_record(meta, section, row, col, cell))
+
+    def add_record(self, record: Dict[str, Any]):
+        if self._jsonl:
+            self._jsonl.write(json.dumps(record) + '\n')
+            self._jsonl.flush()
+        if self._csv:
+            self._csv.writerow(self.csv_row(record))
+            self._csv_fd.flush()
+        if self._openmetrics_file:
+            self._records.append(record)
+            self.write_openmetrics()
+
+    @staticmethod
+    def mk_record(meta: Dict[str, Any], section: str, row: str, col: str,
+                  cell: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'curl_version': meta.get('curl_version'),
+            'protocol': meta.get('protocol'),
+            'implementation': meta.get('implementation'),
+            'server': meta.get('server'),
+            'section': section,
+            'row': row,
+            'col': col,
+            # stacks are not results, they are written to their own files
+            'cell': {key: val for key, val in cell.items() if key != 'stacks'},
+        }
+
+    @staticmethod
+    def csv_row(record: Dict[str, Any]) -> Dict[str, Any]:
+        cell = record['cell']
+        row = {key: val for key, val in record.items() if key != 'cell'}
+        row.update({
+            'val': cell['val'],
+            'sval': cell['sval'],
+            'samples': len(cell.get('samples', [])),
+            'cpu': cell.get('stats', {}).get('cpu'),
+            'rss_max': cell.get('stats', {}).get('rss-max'),
+            'per_cpu': cell.get('per_cpu', {}).get('val'),
+            'errors': len(cell.get('errors', [])),
+        })
+        return row
+
+    @staticmethod
+    def om_labels(record: Dict[str, Any]) -> str:
+        labels = []
+        for key in ['curl_version', 'protocol', 'server', 'section', 'row', 'col']:
+            val = str(record[key] or '')
+            val = val.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            labels.append(f'{key}="{val}"')
+        return ','.join(labels)
+
+    def write_openmetrics(self):
+        # a half written file is never seen, it is replaced in one step
+        tmp_file = f'{self._openmetrics_file}.tmp'
+        with open(tmp_file, 'w') as fd:
+            for name, text, get_val in ScoreExport.METRICS:
+                fd.write(f'# TYPE {name} gauge\n')
+                fd.write(f'# HELP {name} {text}\n')
+                for record in self._records:
+                    val = get_val(record['cell'])
+                    if val is not None:
+                        fd.write(f'{name}{{{self.om_labels(record)}}} {val}\n')
+            fd.write('# EOF\n')
+        os.replace(tmp_file, self._openmetrics_file)
+
+
+class ScoreCheckpoint:
+    """
+    Cells and runs of a scorecard matrix that are done, kept in a file.
+
+    The file starts with the `setup` the cells are measured with, then
+    has the JSON lines of `ScoreExport`, a cell is added and synced to
+    disk as soon as it is measured. A line for each completed run follows
+    its cells. Opening an existing file with the same setup resumes from
+    there, its cells are not measured again and its runs are skipped.
+    """
+
+    def __init__(self, path: str, setup: Dict[str, Any]):
+        self._cells = {}
+        self._records = []
+        self._runs = set()
+        file_setup = None
+        ends_line = True
+        if os.path.exists(path):
+            with open(path) as fd:
+                for line in fd:
+                    ends_line = line.endswith('\n')
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # the last line of a run killed while writing it
+                        continue
+                    if 'setup' in record:
+                        file_setup = record['setup']
+                    elif 'run' in record:
+                        self._runs.add(tuple(record['run']))
+                    else:
+                        self._cells[self.key(record, record['section'],
+                                             record['row'], record['col'])] = record['cell']
+                        self._records.append(record)
+        # a round trip through JSON, to compare it with the one read
+        setup = json.loads(json.dumps(setup))
+        if (self._records or self._runs) and file_setup != setup:
+            raise ScoreCardError(f'checkpoint {path} was made with another matrix '
+                                 'spec or arguments, remove it to start over')
+        self._fd = open(path, 'a')  # noqa: SIM115
+        if not ends_line:
+            self._fd.write('\n')
+        if file_setup != setup:
+            self._write({'setup': setup})
+
+    @property
+    def cell_count(self) -> int:
+        return len(self._cells)
+
+    @property
+    def run_count(self) -> int:
+        return len(self._runs)
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        # the records of the cells read from the file
+        return self._records
+
+    def close(self):
+        self._fd.close()
+
+    @staticmethod
+    def key(meta: Dict[str, Any], section: str, row: str, col: str) -> Tuple:
+        # the server description tells proxied cells from direct ones
+        return (meta.get('curl_version'), meta.get('protocol'), meta.get('server'),
+                section, row, col)
+
+    def get(self, meta: Dict[str, Any], section: str, row: str, col: str) \
+            -> Optional[Dict[str, Any]]:
+        return self._cells.get(self.key(meta, section, row, col))
+
+    def on_cell(self, meta: Dict[str, Any], section: str, row: str, col: str,
+                cell: Dict[str, Any]):
+        record = ScoreExport.mk_record(meta, section, row, col, cell)
+        self._cells[self.key(meta, section, row, col)] = record['cell']
+        self._write(record)
+
+    def is_done(self, run: List[str]) -> bool:
+        return tuple(run) in self._runs
+
+    def done(self, run: List[str]):
+        self._runs.add(tuple(run))
+        self._write({'run': run})
+
+    def _write(self, record: Dict[str, Any]):
+        self._fd.write(json.dumps(record) + '\n')
+        self._fd.flush()
+        os.fsync(self._fd.fileno())
 
 
 class ScoreRunner:
 
+    # protocols with files on the server, instead of http resources. `ftpes`
+    # is ftp with explicit TLS, `ftps` the implicit one.
+    FTP_PROTOCOLS: ClassVar[List[str]] = ['ftp', 'ftpes', 'ftps']
+    SSH_PROTOCOLS: ClassVar[List[str]] = ['sftp', 'scp']
+
+    # seconds a websocket client may run before it counts as failed
+    WS_TIMEOUT = 120
+
+    # key types of the certificates for TLS handshakes, as known to TestCA
+    TLS_KEY_TYPES: ClassVar[Dict[str, str]] = {
+        'rsa2048': 'rsa2048',
+        'rsa4096': 'rsa4096',
+        'ec256': 'secp256r1',
+        'ec384': 'secp384r1',
+        'ed25519': 'ed25519',
+    }
+
     def __init__(self, env: Env,
                  protocol: str,
                  server_descr: str,
@@ -240,10 +1176,31 @@ class ScoreRunner:
                  upload_parallel: int = 0,
                  server_addr: Optional[str] = None,
                  with_flame: bool = False,
+                 with_perf_stat: bool = False,
                  socks_args: Optional[List[str]] = None,
                  limit_rate: Optional[str] = None,
                  http_plain: bool = False,
-                 suppress_cl: bool = False):
+                 suppress_cl: bool = False,
+                 clients: int = 1,
+                 warmups: int = 0,
+                 max_samples: int = 0,
+                 target_cv: Optional[float] = None,
+                 target_ci: Optional[float] = None,
+                 with_timeseries: bool = False,
+                 switch_creds: Optional[Callable[[str], bool]] = None,
+                 ssh_args: Optional[List[str]] = None,
+                 proxy_args: Optional[List[str]] = None,
+                 synth: bool = False,
+                 servers: Optional[Dict[str, Any]] = None,
+                 flame_dir: Optional[str] = None,
+                 curl_a: Optional[str] = None,
+                 curl_b: Optional[str] = None,
+                 placements: Optional[Dict[str, CpuPlacement]] = None,
+                 profile_interval: Optional[float] = None,
+                 with_memdebug: bool = False,
+                 on_cell: Optional[Callable[[Dict[str, Any], str, str, str,
+                                             Dict[str, Any]], None]] = None,
+                 checkpoint: Optional[ScoreCheckpoint] = None):
         self.verbose = verbose
         self.env = env
         self.protocol = protocol
@@ -253,12 +1210,52 @@ class ScoreRunner:
         self._silent_curl = not curl_verbose
         self._download_parallel = download_parallel
         self._upload_parallel = upload_parallel
-        self._with_flame = with_flame
+        self._with_flame = with_flame or flame_dir is not None
+        # keep the collapsed stacks of each cell's runs in `flame_dir`
+        self._flame_dir = flame_dir
+        self._run_stacks = {}
+        self._cell_stacks = None
+        # with `curl_b`, runs alternate between both curls and each
+        # cell reports the paired difference of B against A
+        self._curl_a = curl_a
+        self._curl_b = curl_b
+        self._curl_path = curl_a
+        self._ab_runs = None
+        # where 'curl', the 'servers' and the 'harness' run
+        self._placements = placements if placements else {}
+        # seconds between the samples of a curl process' CPU and memory
+        self._profile_interval = profile_interval
+        # called with the score meta, section, row, column and cell of
+        # each measured cell as it completes
+        self._on_cell = on_cell
+        # has the cells measured before, keeps the ones measured now
+        self._checkpoint = checkpoint
+        self._meta = {}
+        self._with_perf_stat = with_perf_stat
+        self._with_memdebug = with_memdebug
         self._socks_args = socks_args
+        self._proxy_args = proxy_args
+        self._net_args = []
         self._limit_rate_num = 0
         self._limit_rate = limit_rate
         self._http_plain = http_plain
         self._scheme = 'http' if http_plain else 'https'
+        self._server_docs = None
+        # the files to decode per size, by content encoding
+        self._decode_docs = {}
+        self._synth = synth
+        # the response codes of successful transfers
+        self._ok_codes = [200]
+        if protocol in ScoreRunner.FTP_PROTOCOLS:
+            self._scheme = 'ftps' if protocol == 'ftps' else 'ftp'
+            self._ok_codes = [226]
+        elif protocol in ScoreRunner.SSH_PROTOCOLS:
+            self._scheme = protocol
+            self._ok_codes = [0]
+        elif protocol == 'ws':
+            self._scheme = 'ws'
+        # authentication arguments for sftp/scp
+        self._ssh_args = ssh_args
         if self._limit_rate:
             m = re.match(r'(\d+(\.\d+)?)([gmkb])?', self._limit_rate.lower())
             if not m:
@@ -275,17 +1272,434 @@ class ScoreRunner:
             else:
                 raise ScoreCardError(f'unrecognised limit-rate: {self._limit_rate}')
         self.suppress_cl = suppress_cl
+        if clients < 1:
+            raise ScoreCardError(f'number of clients must be positive: {clients}')
+        self._clients = clients
+        self._warmups = warmups
+        # adaptive sampling: continue beyond the requested samples until
+        # the results are stable enough or `max_samples` are reached
+        self._target_cv = target_cv
+        self._target_ci = target_ci
+        self._adaptive = target_cv is not None or target_ci is not None
+        self._max_samples = max_samples
+        if with_timeseries and not env.curl_is_verbose():
+            raise ScoreCardError('--timeseries needs a curl with verbose strings')
+        if with_timeseries and not self.is_http:
+            raise ScoreCardError('--timeseries only works with http')
+        self._with_timeseries = with_timeseries
+        # makes the server use the credentials of the given name for domain1
+        self._switch_creds = switch_creds
+        # the local server processes involved, by name, for profiling
+        self._servers = dict(servers) if servers else {}
+        self._server_stats = None
+        self._server_sampler_cpu = None
+
+    @property
+    def is_http(self) -> bool:
+        return self.protocol not in ScoreRunner.FTP_PROTOCOLS + ScoreRunner.SSH_PROTOCOLS + ['ws']
+
+    def doc_url(self, fname: str) -> str:
+        if self.protocol in ScoreRunner.FTP_PROTOCOLS:
+            return f'{self._scheme}://{self.env.ftp_domain}:{self.server_port}/{fname}'
+        if self.protocol in ScoreRunner.SSH_PROTOCOLS:
+            return f'{self._scheme}://{self.env.domain1}:{self.server_port}/{self._server_docs}/{fname}'
+        return f'{self._scheme}://{self.env.domain1}:{self.server_port}/{fname}'
+
+    def synth_url(self, fsize: int) -> str:
+        # url of `fsize` bytes generated by mod_curltest, not read from disk
+        return f'{self._scheme}://{self.env.domain1}:{self.server_port}' \
+               f'/curltest/synth?size={fsize}'
+
+    @staticmethod
+    def glob_url(url: str, count: int) -> str:
+        # url for `count` transfers of the same resource
+        if '?' in url:
+            return f'{url}&id=[0-{count - 1}]'
+        return f'{url}?[0-{count - 1}]'
+
+    def upload_urls(self, fname: str, count: int) -> str:
+        # url for `count` uploads of a file named `fname`
+        if self.is_http:
+            url = f'{self._scheme}://{self.env.domain1}:{self.server_port}/curltest/put'
+            return f'{url}?id=[0-{count - 1}]' if count > 1 else url
+        return self.doc_url(f'{fname}.[0-{count - 1}]' if count > 1 else fname)
+
+    def curl_download(self, curl: CurlClient, url: str,
+                      extra_args: Optional[List[str]] = None,
+                      with_throughput: bool = False) -> ExecResult:
+        if self.is_http:
+            return curl.http_download(urls=[url], alpn_proto=self.protocol,
+                                      no_save=True, with_headers=False,
+                                      with_profile=True,
+                                      limit_rate=self._limit_rate,
+                                      extra_args=extra_args,
+                                      with_throughput=with_throughput)
+        extra_args = extra_args if extra_args else []
+        if self._limit_rate:
+            extra_args.extend(['--limit-rate', self._limit_rate])
+        if self.protocol == 'ftpes':
+            return curl.ftp_ssl_get(urls=[url], no_save=True, with_profile=True,
+                                    extra_args=extra_args)
+        if self.protocol in ScoreRunner.FTP_PROTOCOLS:
+            return curl.ftp_get(urls=[url], no_save=True, with_profile=True,
+                                extra_args=extra_args)
+        extra_args.extend(self._ssh_args or [])
+        return curl.ssh_download(urls=[url], no_save=True, with_profile=True,
+                                 extra_args=extra_args)
+
+    def curl_upload(self, curl: CurlClient, url: str, fpath: str,
+                    extra_args: Optional[List[str]] = None) -> ExecResult:
+        if self.is_http:
+            return curl.http_put(urls=[url], fdata=fpath, alpn_proto=self.protocol,
+                                 with_headers=False, with_profile=True,
+                                 suppress_cl=self.suppress_cl,
+                                 extra_args=extra_args)
+        extra_args = extra_args if extra_args else []
+        if self.protocol == 'ftpes':
+            return curl.ftp_ssl_upload(urls=[url], fupload=fpath, with_profile=True,
+                                       extra_args=extra_args)
+        if self.protocol in ScoreRunner.FTP_PROTOCOLS:
+            return curl.ftp_upload(urls=[url], fupload=fpath, with_profile=True,
+                                   extra_args=extra_args)
+        extra_args.extend(self._ssh_args or [])
+        return curl.ssh_upload(urls=[url], fupload=fpath, with_profile=True,
+                               extra_args=extra_args)
 
     def info(self, msg):
         if self.verbose > 0:
             sys.stderr.write(msg)
             sys.stderr.flush()
 
-    def mk_curl_client(self):
-        return CurlClient(env=self.env, silent=self._silent_curl,
+    def mk_curl_client(self, idx: int = 0):
+        # each concurrent client needs its own run directory
+        run_dir = os.path.join(self.env.gen_dir, f'curl-{idx}') if idx > 0 else None
+        # CurlClient adds `socks_args` to all command lines, which works
+        # for our proxy and relay arguments just as well
+        return CurlClient(env=self.env, run_dir=run_dir,
+                          curl=self._curl_path,
+                          placement=self._placements.get('curl'),
+                          profile_interval=self._profile_interval,
+                          with_memdebug=self._with_memdebug,
+                          silent=self._silent_curl,
                           server_addr=self.server_addr,
                           with_flame=self._with_flame,
-                          socks_args=self._socks_args)
+                          with_perf_stat=self._with_perf_stat,
+                          socks_args=(self._socks_args or self._proxy_args or []) +
+                          self._net_args)
+
+    @property
+    def is_proxied(self) -> bool:
+        return self._proxy_args is not None
+
+    def use_net_relay(self, relay: NetRelay):
+        # all transfers go through `relay`, which impairs the network
+        self._net_args = relay.connect_to_args(self.env.domain1)
+        self.server_descr = f'{self.server_descr} over {relay.profile.name}'
+        self.add_server('relay', relay)
+
+    def add_server(self, name: str, server: Any):
+        # a local server process involved in the transfers, `server`
+        # has a `pid` property
+        self._servers[name] = server
+
+    def via_proxy(self, proxy_args: List[str], proxy_descr: str,
+                  proxy_servers: Optional[Dict[str, Any]] = None) -> 'ScoreRunner':
+        # the same scoring, with all transfers going through a proxy
+        card = copy.copy(self)
+        card.server_descr = f'{self.server_descr} via {proxy_descr}'
+        card._proxy_args = proxy_args
+        card._servers = dict(self._servers)
+        card._servers.update(proxy_servers or {})
+        return card
+
+    def sample_runs(self, nsamples: int, samples: List[float]):
+        # Yield None for each warmup run whose results are discarded,
+        # then the curl of each run to take a sample from, 'a' or 'b'.
+        # The caller adds its samples to `samples`, which decides when
+        # to stop in adaptive mode.
+        # With a curl B, a sample is a pair of runs, one of each curl, in
+        # the order ABBA ABBA... so that drifts over time hit both alike.
+        # Only the samples of curl A stay in `samples`. Of the runs of
+        # curl B, callers record nothing but their sample.
+        per_sample = 2 if self._curl_b else 1
+        self.place_servers()
+        for idx in range(self._warmups * per_sample):
+            self._curl_path = self._curl_b if idx % 2 else self._curl_a
+            yield None
+        # the servers are profiled over all measured runs
+        pids = {name: server.pid for name, server in self._servers.items()
+                if server.pid}
+        # a server is at its limit when it uses all CPUs it is placed on
+        placement = self._placements.get('servers')
+        cpus = len(placement.cpus) if placement and placement.cpus else None
+        profile = ServerProfile(pids, cpus=cpus) if pids else None
+        if profile:
+            profile.start()
+        runs = 0
+        stacks = {}
+        ab_runs = []
+        self._run_stacks = {}
+        try:
+            while runs % per_sample or runs < nsamples * per_sample or \
+                    (self._adaptive and runs < self._max_samples * per_sample
+                     and not self.is_stable(samples)):
+                is_b = self._curl_b is not None and runs % 4 in [1, 2]
+                self._curl_path = self._curl_b if is_b else self._curl_a
+                nprev = len(samples)
+                runs += 1
+                yield 'b' if is_b else 'a'
+                if self._curl_b:
+                    vals = samples[nprev:]
+                    if is_b:
+                        del samples[nprev:]
+                    ab_runs.append((is_b, mean(vals) if vals else None))
+                for stack, count in self._run_stacks.items():
+                    stacks[stack] = stacks.get(stack, 0) + count
+                self._run_stacks = {}
+        finally:
+            self._curl_path = self._curl_a
+            if profile:
+                profile.finish()
+                self._server_stats = profile.stats
+                self._server_sampler_cpu = profile.sampler_cpu
+            self._cell_stacks = stacks if stacks else None
+            if self._curl_b:
+                self._ab_runs = ab_runs
+
+    def place_servers(self):
+        # servers fork and start threads as they please, place them
+        # anew for each cell
+        placement = self._placements.get('servers')
+        if placement:
+            for server in self._servers.values():
+                if server.pid:
+                    placement.place(server.pid)
+
+    def is_stable(self, samples: List[float]) -> bool:
+        if len(samples) < 2 or mean(samples) <= 0:
+            return False
+        cv = stdev(samples) / mean(samples)
+        # relative half width of the 95% confidence interval of the mean
+        ci = 1.96 * cv / math.sqrt(len(samples))
+        return (self._target_cv is not None and cv <= self._target_cv) or \
+            (self._target_ci is not None and ci <= self._target_ci)
+
+    def add_sampling(self, cell: Dict[str, Any], samples: List[float]):
+        if self._adaptive and len(samples) > 1 and mean(samples) > 0:
+            cell['sampling'] = {
+                'count': len(samples),
+                'cv': stdev(samples) / mean(samples),
+                'stable': self.is_stable(samples),
+            }
+        if self._server_stats:
+            cell['server'] = self._server_stats
+            cell['server_sampler_cpu'] = self._server_sampler_cpu
+            self._server_stats = None
+            # the server is the bottleneck when one of its threads
+            # was at its limit and curl was not
+            client_cpu = cell.get('stats', {}).get('cpu', 0.0)
+            cell['server_bound'] = client_cpu < ServerProfile.BUSY_CPU and any(
+                ServerProfile.is_busy(stats) for stats in cell['server'].values())
+        if self._cell_stacks:
+            # written to `flame_dir` once the cell has its place in the score
+            cell['stacks'] = self._cell_stacks
+            self._cell_stacks = None
+        if self._ab_runs is not None:
+            cell['ab'] = self.mk_ab(self._ab_runs)
+            self._ab_runs = None
+        return cell
+
+    @staticmethod
+    def curl_fullname_of(path: str) -> str:
+        p = subprocess.run([path, '-V'], capture_output=True, text=True, check=False)
+        return p.stdout.splitlines()[0] if p.returncode == 0 and p.stdout else '?'
+
+    @staticmethod
+    def ab_errors(measure: Optional[str], errors: List[str]) -> List[str]:
+        # errors of curl B runs say so, the cell is about curl A
+        return [f'curl B: {err}' for err in errors] if measure == 'b' else errors
+
+    @staticmethod
+    def mk_ab(ab_runs: List[Tuple[bool, Optional[float]]]) -> Dict[str, Any]:
+        # The paired difference of curl B against A. Runs come in pairs,
+        # a pair where one of the runs failed does not count.
+        pairs = []
+        for idx in range(0, len(ab_runs) - 1, 2):
+            vals = dict(ab_runs[idx:idx + 2])
+            if vals.get(False) is not None and vals.get(True) is not None:
+                pairs.append((vals[False], vals[True]))
+        ab = {
+            'pairs': len(pairs),
+            'samples': [b for _, b in pairs],
+        }
+        if len(pairs) and sum([a for a, _ in pairs]) > 0:
+            ab['delta'] = sum([b for _, b in pairs]) / sum([a for a, _ in pairs]) - 1
+            ci_low, ci_high = ScoreDiff.paired_bootstrap(pairs, random.Random(1))
+            ab['ci'] = [ci_low, ci_high] if ci_low is not None else None
+            ab['significant'] = ci_low is not None and (ci_low > 0 or ci_high < 0)
+        return ab
+
+    def add_stacks(self, rs: List[ExecResult]):
+        # The collapsed stacks of the runs in `rs`. A run's stacks file
+        # is overwritten by the next run of its client, read it now.
+        if not self._flame_dir:
+            return
+        for r in rs:
+            if r.stacks and os.path.exists(r.stacks):
+                for stack, count in FlameGraph.read_stacks(r.stacks).items():
+                    self._run_stacks[stack] = self._run_stacks.get(stack, 0) + count
+
+    def save_stacks(self, score: Dict[str, Any]):
+        # Write the collapsed stacks of each cell in `score` into a file
+        # per scenario, together with its flame graph. The cell keeps
+        # the path of the stacks file.
+        flame = FlameGraph.from_env(self.env)
+        server_dir = os.path.join(self._flame_dir, self.flame_name(self.server_descr))
+        for (section, row, col), cell in ScoreDiff.measured_cells(score).items():
+            if 'stacks' not in cell:
+                continue
+            stacks = cell.pop('stacks')
+            dirpath = os.path.join(server_dir, section)
+            os.makedirs(dirpath, exist_ok=True)
+            fbase = os.path.join(dirpath, self.flame_name(f'{row}-{col}'))
+            FlameGraph.write_stacks(stacks, f'{fbase}.folded')
+            flame.svg(f'{fbase}.folded', f'{fbase}.svg', f'{fbase}.stderr',
+                      title=f'{section} {row} {col} ({self.protocol})',
+                      subtitle=self.server_descr)
+            cell['flame'] = f'{fbase}.folded'
+
+    @staticmethod
+    def flame_name(name: str) -> str:
+        return re.sub(r'[^\w.()-]+', '_', name)
+
+    def add_cell(self, section: str, cols: List[str], row: List[Dict[str, Any]],
+                 measure: Callable[..., Dict[str, Any]], **kwargs):
+        # complete the next column of `row` with the cell `measure(**kwargs)`
+        # returns, unless the checkpoint has it already from an earlier run
+        col = cols[len(row)]
+        cell = None
+        if self._checkpoint:
+            cell = self._checkpoint.get(self._meta, section, row[0]['sval'], col)
+        if cell is not None:
+            self.info(f'{col} from checkpoint...')
+            row.append(cell)
+            return
+        cell = measure(**kwargs)
+        row.append(cell)
+        if 'samples' in cell or 'stats' in cell:
+            # failed cells are measured again when resuming
+            if self._checkpoint and not cell.get('errors'):
+                self._checkpoint.on_cell(self._meta, section, row[0]['sval'], col, cell)
+            if self._on_cell:
+                self._on_cell(self._meta, section, row[0]['sval'], col, cell)
+
+    def run_clients(self, run_curl: Callable[[CurlClient], ExecResult]) \
+            -> Tuple[List[ExecResult], float]:
+        # Invoke `run_curl` for each of our clients, all started at the
+        # same time. Return their results and the seconds it took from
+        # the first client starting until the last one finished.
+        if self._clients == 1:
+            r = run_curl(self.mk_curl_client())
+            self.add_stacks([r])
+            return [r], r.duration.total_seconds()
+        curls = [self.mk_curl_client(idx) for idx in range(self._clients)]
+        barrier = Barrier(len(curls))
+        started = [0.0] * len(curls)
+        ended = [0.0] * len(curls)
+
+        def run_client(idx: int) -> ExecResult:
+            barrier.wait()
+            started[idx] = time.monotonic()
+            r = run_curl(curls[idx])
+            ended[idx] = time.monotonic()
+            return r
+
+        with ThreadPoolExecutor(max_workers=len(curls)) as executor:
+            results = list(executor.map(run_client, range(len(curls))))
+        self.add_stacks(results)
+        return results, max(ended) - min(started)
+
+    @staticmethod
+    def _add_cpu_sample(rs: List[ExecResult], amount: float,
+                        per_cpu: List[float]):
+        # `amount` of bytes or requests the clients in `rs` handled per
+        # CPU-second they used, user plus system time.
+        cpu_time = sum([r.profile.stats.get('cpu-time', 0) for r in rs
+                        if r.profile and r.profile.stats])
+        if cpu_time > 0:
+            per_cpu.append(amount / cpu_time)
+
+    @staticmethod
+    def _add_perf_sample(rs: List[ExecResult], amount: float,
+                         perf: List[Dict[str, float]]):
+        # the hardware counters of the clients in `rs` per byte or request
+        stats = [r.profile.stats for r in rs if r.profile and r.profile.stats]
+        counters = {}
+        for key in PerfStat.EVENTS:
+            vals = [s[key] for s in stats if key in s]
+            if len(vals) == len(rs) and amount > 0:
+                counters[key] = sum(vals) / amount
+        if counters:
+            perf.append(counters)
+
+    @staticmethod
+    def _add_mem_sample(rs: List[ExecResult], xfers: int, amount: float,
+                        mem: List[Dict[str, float]]):
+        # the allocations of the clients in `rs` per transfer, the bytes
+        # they allocated per byte or request and their largest heap
+        stats = [r.memdebug.stats for r in rs if r.memdebug and r.memdebug.stats]
+        if len(stats) == len(rs) and xfers > 0 and amount > 0:
+            mem.append({
+                'allocs': sum([s['allocs'] for s in stats]) / xfers,
+                'alloc-bytes': sum([s['alloc-bytes'] for s in stats]) / amount,
+                'peak-heap': max([s['peak-heap'] for s in stats]),
+            })
+
+    @staticmethod
+    def _add_phase_sample(stats: List[Dict[str, float]],
+                          phases: Dict[str, LatencyHistogram]):
+        # the phases of all transfers in `stats`, as curl reports them
+        for s in stats:
+            for name, secs in Card.xfer_phases(s).items():
+                phases.setdefault(name, LatencyHistogram()).add(secs)
+
+    def _add_xfer_sample(self, rs: List[ExecResult], duration: float,
+                         direction: str, samples: List[float],
+                         client_samples: List[float],
+                         per_cpu: List[float],
+                         perf: List[Dict[str, float]],
+                         mem: List[Dict[str, float]],
+                         limited: bool = False,
+                         xfer_size: Optional[int] = None,
+                         phases: Optional[Dict[str, LatencyHistogram]] = None,
+                         rate_only: bool = False):
+        # the sample is the rate over all clients. With several clients,
+        # also record the rate each one achieved. `xfer_size` are the
+        # bytes of each transfer when they differ from what curl counts,
+        # e.g. when decoding compressed responses. With `rate_only`, as
+        # for the runs of curl B, add nothing but the sample.
+        amount = sum([xfer_size or s[f'size_{direction}'] for r in rs for s in r.stats])
+        if limited:
+            stats = [s for r in rs for s in r.stats]
+            samples.append(sum([s[f'speed_{direction}'] for s in stats]) / len(stats))
+        else:
+            samples.append(amount / duration)
+        if rate_only:
+            return
+        self._add_cpu_sample(rs, amount, per_cpu)
+        if phases is not None:
+            self._add_phase_sample([s for r in rs for s in r.stats], phases)
+        self._add_perf_sample(rs, amount, perf)
+        self._add_mem_sample(rs, sum([len(r.stats) for r in rs]), amount, mem)
+        if len(rs) > 1 and limited:
+            client_samples.extend([
+                sum([s[f'speed_{direction}'] for s in r.stats]) / len(r.stats)
+                for r in rs])
+        elif len(rs) > 1:
+            client_samples.extend([
+                sum([xfer_size or s[f'size_{direction}'] for s in r.stats]) /
+                r.duration.total_seconds()
+                for r in rs])
 
     def handshakes(self) -> Dict[str, Any]:
         props = {}
@@ -321,6 +1735,118 @@ class ScoreRunner:
             self.info('ok.\n')
         return props
 
+    def do_tls_handshakes(self, url: str, mode: str, count: int, nsamples: int = 1):
+        samples = []
+        errors = []
+        latencies = {
+            'handshake': LatencyHistogram(),
+        }
+        no_earlydata = 0
+        session_file = os.path.join(self.env.gen_dir, 'scorecard.sessions')
+        extra_args = [
+            '-w', '%{response_code},%{time_appconnect},%{tls_earlydata}\\n',
+        ]
+        if mode == 'full':
+            extra_args.append('--no-sessionid')
+        else:
+            extra_args.extend(['--ssl-sessions', session_file])
+            if mode == 'earlydata':
+                extra_args.append('--tls-earlydata')
+        self.info(f'{mode}...')
+        for measure in self.sample_runs(nsamples, samples):
+            curl = self.mk_curl_client()
+            if mode != 'full':
+                # start with a full handshake that saves a session to resume
+                if os.path.exists(session_file):
+                    os.remove(session_file)
+                curl.http_download(urls=[url], alpn_proto=self.protocol,
+                                   no_save=True, with_stats=False,
+                                   extra_args=list(extra_args))
+            # a process for each handshake, so that no connection is reused
+            times = []
+            for _ in range(count):
+                r = curl.http_download(urls=[url], alpn_proto=self.protocol,
+                                       no_save=True, with_stats=False,
+                                       extra_args=list(extra_args))
+                self.add_stacks([r])
+                if r.exit_code != 0:
+                    errors.extend(self.ab_errors(measure, [f'exit={r.exit_code}']))
+                    continue
+                vals = r.stdout.strip().split(',')
+                if vals[0] != '200':
+                    errors.extend(self.ab_errors(measure, [f'response={vals[0]}']))
+                    continue
+                if mode == 'earlydata' and int(vals[2]) <= 0:
+                    no_earlydata += 1
+                times.append(float(vals[1]))
+            if not measure or not len(times):
+                continue
+            samples.append(len(times) / sum(times))
+            if measure == 'b':
+                continue
+            for t in times:
+                latencies['handshake'].add(t)
+        if no_earlydata > 0:
+            errors.append(f'early data not accepted: {no_earlydata}')
+        return self.add_sampling(Card.mk_handshakes_cell(
+            samples, errors, latencies=latencies), samples)
+
+    def _tls_creds_name(self, key_type: str) -> str:
+        if key_type not in ScoreRunner.TLS_KEY_TYPES:
+            raise ScoreCardError(f'unknown TLS key type: {key_type}')
+        spec = CertificateSpec(
+            name=f'{self.env.domain1}-{key_type}',
+            domains=[self.env.domain1, self.env.domain1brotli, 'localhost', '127.0.0.1'],
+            key_type=ScoreRunner.TLS_KEY_TYPES[key_type])
+        self.env.ca.issue_cert(spec)
+        return spec.name
+
+    def tls_handshakes(self, count: int, key_types: List[str],
+                       meta: Dict[str, Any]) -> Dict[str, Any]:
+        if self._http_plain:
+            raise ScoreCardError('TLS handshakes need https')
+        url = f'{self._scheme}://{self.env.domain1}:{self.server_port}/reqs10.data'
+        modes = ['full']
+        cols = ['key', 'full']
+        if self.env.curl_has_feature('SSLS-EXPORT'):
+            modes.append('resumed')
+            cols.append('resumed')
+            if self.env.curl_version_at_least('8.13.0') and \
+                    (self.env.curl_can_h3_early_data() if self.protocol == 'h3'
+                     else self.env.curl_can_early_data()):
+                modes.append('earlydata')
+                cols.append('early data')
+        if self._switch_creds is None:
+            # a server not under our control, use whatever it has
+            key_types = ['server']
+        rows = []
+        try:
+            for key_type in key_types:
+                if self._switch_creds is not None and \
+                        not self._switch_creds(self._tls_creds_name(key_type)):
+                    raise ScoreCardError(f'server failed to switch to {key_type} certificate')
+                self.info(f'{key_type} handshakes...')
+                row = [{
+                    'val': key_type,
+                    'sval': key_type,
+                }]
+                for mode in modes:
+                    self.add_cell('tls-handshakes', cols, row, self.do_tls_handshakes,
+                                  url=url, mode=mode, count=count, nsamples=meta['samples'])
+                rows.append(row)
+                self.info('done.\n')
+        finally:
+            if self._switch_creds is not None:
+                self._switch_creds(self.env.domain1)
+        return {
+            'meta': {
+                'title': f'TLS Handshakes ({self.protocol}) with {meta["server"]}',
+                'count': count,
+            },
+            'cols': cols,
+            'rows': rows,
+        }
+
     def _make_docs_file(self, docs_dir: str, fname: str, fsize: int):
         fpath = os.path.join(docs_dir, fname)
         data1k = 1024*'x'
@@ -333,6 +1859,7 @@ class ScoreRunner:
 
     def setup_resources(self, server_docs: str,
                         downloads: Optional[List[int]] = None):
+        self._server_docs = server_docs
         if downloads is not None:
             for fsize in downloads:
                 label = Card.fmt_size(fsize)
@@ -342,104 +1869,136 @@ class ScoreRunner:
         self._make_docs_file(docs_dir=server_docs,
                              fname='reqs10.data', fsize=10 * 1024)
 
+    def setup_decoding(self, server_docs: str, fsizes: List[int]):
+        # files of each size, plain and with each content encoding we
+        # can make and curl can decode, served via type maps
+        encodings = self.env.content_encodings()
+        for fsize in fsizes:
+            fname = f'decode{Card.fmt_size(fsize)}.txt'
+            self._decode_docs[fsize] = {'identity': fname}
+            self._decode_docs[fsize].update(self.env.make_data_encoded(
+                indir=server_docs, fname=fname, fsize=fsize, encodings=encodings))
+
     def _check_downloads(self, r: ExecResult, count: int):
         error = ''
         if r.exit_code != 0:
             error += f'exit={r.exit_code} '
         if r.exit_code != 0 or len(r.stats) != count:
             error += f'stats={len(r.stats)}/{count} '
-        fails = [s for s in r.stats if s['response_code'] != 200]
+        fails = [s for s in r.stats if s['response_code'] not in self._ok_codes]
         if len(fails) > 0:
             error += f'{len(fails)} failed'
         return error if len(error) > 0 else None
 
-    def dl_single(self, url: str, nsamples: int = 1):
-        count = 1
+    def _dl_samples(self, url: str, count: int, nsamples: int,
+                    extra_args: Optional[List[str]] = None,
+                    with_timeseries: bool = False,
+                    xfer_size: Optional[int] = None):
         samples = []
         errors = []
         profiles = []
-        self.info('single...')
-        for _ in range(nsamples):
-            curl = self.mk_curl_client()
-            r = curl.http_download(urls=[url], alpn_proto=self.protocol,
-                                   no_save=True, with_headers=False,
-                                   with_profile=True,
-                                   limit_rate=self._limit_rate)
-            err = self._check_downloads(r, count)
-            if err:
-                errors.append(err)
-            elif self._limit_rate:
-                total_speed = sum([s['speed_download'] for s in r.stats])
-                samples.append(total_speed / len(r.stats))
-                profiles.append(r.profile)
-            else:
-                total_size = sum([s['size_download'] for s in r.stats])
-                samples.append(total_size / r.duration.total_seconds())
-                profiles.append(r.profile)
+        client_samples = []
+        per_cpu = []
+        perf = []
+        mem = []
+        series = []
+        received = []
+        phases = {}
+        for measure in self.sample_runs(nsamples, samples):
+            rs, duration = self.run_clients(lambda curl: self.curl_download(
+                curl, url, extra_args=list(extra_args) if extra_args else None,
+                with_throughput=with_timeseries))
+            if not measure:
+                continue
+            errs = [err for err in [self._check_downloads(r, count) for r in rs] if err]
+            if len(errs):
+                errors.extend(self.ab_errors(measure, errs))
+                continue
+            self._add_xfer_sample(rs, duration, 'download', samples, client_samples,
+                                  per_cpu, perf, mem, limited=self._limit_rate is not None,
+                                  xfer_size=xfer_size, phases=phases,
+                                  rate_only=measure == 'b')
+            if measure == 'b':
+                continue
+            received.extend([s['size_download'] for r in rs for s in r.stats])
+            profiles.extend([r.profile for r in rs])
+            if with_timeseries:
+                series.extend([dict(r.throughput.summary(xfer_id), buckets=buckets)
+                               for r in rs
+                               for xfer_id, buckets in r.throughput.series.items()])
         if self._limit_rate:
-            return Card.mk_speed_cell(samples, profiles, errors, self._limit_rate_num)
-        return Card.mk_mbs_cell(samples, profiles, errors)
+            cell = Card.mk_speed_cell(samples, profiles, errors, self._limit_rate_num,
+                                      clients=client_samples, per_cpu=per_cpu)
+        else:
+            cell = Card.mk_mbs_cell(samples, profiles, errors, clients=client_samples,
+                                    per_cpu=per_cpu)
+        Card.mk_perf(cell, perf, 'bytes')
+        Card.mk_mem(cell, mem, 'bytes')
+        Card.mk_phases(cell, phases)
+        if xfer_size and sum(received):
+            cell['ratio'] = xfer_size * len(received) / sum(received)
+        if len(series):
+            cell['timeseries'] = {
+                'interval': RunThroughput.INTERVAL,
+                'ramp_up': mean([s['ramp_up'] for s in series]),
+                'steady_rate': mean([s['steady_rate'] for s in series]),
+                'stalls': mean([s['stalls'] for s in series]),
+                'transfers': series,
+            }
+        return self.add_sampling(cell, samples)
+
+    def dl_single(self, url: str, nsamples: int = 1):
+        self.info('single...')
+        return self._dl_samples(url=url, count=1, nsamples=nsamples,
+                                with_timeseries=self._with_timeseries)
 
     def dl_serial(self, url: str, count: int, nsamples: int = 1):
-        samples = []
-        errors = []
-        profiles = []
-        url = f'{url}?[0-{count - 1}]'
         self.info('serial...')
-        for _ in range(nsamples):
-            curl = self.mk_curl_client()
-            r = curl.http_download(urls=[url], alpn_proto=self.protocol,
-                                   no_save=True,
-                                   with_headers=False,
-                                   with_profile=True,
-                                   limit_rate=self._limit_rate)
-            err = self._check_downloads(r, count)
-            if err:
-                errors.append(err)
-            elif self._limit_rate:
-                total_speed = sum([s['speed_download'] for s in r.stats])
-                samples.append(total_speed / len(r.stats))
-                profiles.append(r.profile)
-            else:
-                total_size = sum([s['size_download'] for s in r.stats])
-                samples.append(total_size / r.duration.total_seconds())
-                profiles.append(r.profile)
-        if self._limit_rate:
-            return Card.mk_speed_cell(samples, profiles, errors, self._limit_rate_num)
-        return Card.mk_mbs_cell(samples, profiles, errors)
+        return self._dl_samples(url=self.glob_url(url, count), count=count,
+                                nsamples=nsamples)
 
     def dl_parallel(self, url: str, count: int, nsamples: int = 1):
-        samples = []
-        errors = []
-        profiles = []
         max_parallel = self._download_parallel if self._download_parallel > 0 else count
-        url = f'{url}?[0-{count - 1}]'
         self.info('parallel...')
-        for _ in range(nsamples):
-            curl = self.mk_curl_client()
-            r = curl.http_download(urls=[url], alpn_proto=self.protocol,
-                                   no_save=True,
-                                   with_headers=False,
-                                   with_profile=True,
-                                   limit_rate=self._limit_rate,
-                                   extra_args=[
-                                       '--parallel',
-                                       '--parallel-max', str(max_parallel)
-                                   ])
-            err = self._check_downloads(r, count)
-            if err:
-                errors.append(err)
-            elif self._limit_rate:
-                total_speed = sum([s['speed_download'] for s in r.stats])
-                samples.append(total_speed / len(r.stats))
-                profiles.append(r.profile)
-            else:
-                total_size = sum([s['size_download'] for s in r.stats])
-                samples.append(total_size / r.duration.total_seconds())
-                profiles.append(r.profile)
-        if self._limit_rate:
-            return Card.mk_speed_cell(samples, profiles, errors, self._limit_rate_num)
-        return Card.mk_mbs_cell(samples, profiles, errors)
+        return self._dl_samples(url=self.glob_url(url, count), count=count,
+                                nsamples=nsamples, extra_args=[
+                                    '--parallel',
+                                    '--parallel-max', str(max_parallel)
+                                ])
+
+    def dl_decoded(self, url: str, fsize: int, encoding: str, nsamples: int = 1):
+        # rate and CPU use are about the `fsize` decoded bytes
+        self.info(f'{encoding}...')
+        return self._dl_samples(url=url, count=1, nsamples=nsamples,
+                                extra_args=None if encoding == 'identity' else ['--compressed'],
+                                xfer_size=fsize)
+
+    def decoding(self, fsizes: List[int], meta: Dict[str, Any]) -> Dict[str, Any]:
+        encodings = [enc for enc in ['identity', 'gzip', 'br', 'zstd']
+                     if enc in self._decode_docs[fsizes[0]]]
+        cols = ['size'] + encodings
+        rows = []
+        for fsize in fsizes:
+            row = [{
+                'val': fsize,
+                'sval': Card.fmt_size(fsize)
+            }]
+            self.info(f'{row[0]["sval"]} decoding...')
+            for encoding in encodings:
+                self.add_cell('decoding', cols, row, self.dl_decoded,
+                              url=self.doc_url(self._decode_docs[fsize][encoding]),
+                              fsize=fsize, encoding=encoding, nsamples=meta['samples'])
+            rows.append(row)
+            self.info('done.\n')
+        return {
+            'meta': {
+                'title': f'Decoded downloads ({self.protocol}) from {meta["server"]}, '
+                         'rates of decoded bytes',
+                'encodings': encodings[1:],
+            },
+            'cols': cols,
+            'rows': rows,
+        }
 
     def downloads(self, count: int, fsizes: List[int], meta: Dict[str, Any]) -> Dict[str, Any]:
         nsamples = meta['samples']
@@ -461,13 +2020,19 @@ class ScoreRunner:
                 'sval': Card.fmt_size(fsize)
             }]
             self.info(f'{row[0]["sval"]} downloads...')
-            url = f'{self._scheme}://{self.env.domain1}:{self.server_port}/score{row[0]["sval"]}.data'
+            if self._synth:
+                url = self.synth_url(fsize)
+            else:
+                url = self.doc_url(f'score{row[0]["sval"]}.data')
             if 'single' in cols:
-                row.append(self.dl_single(url=url, nsamples=nsamples))
+                self.add_cell('downloads', cols, row, self.dl_single,
+                              url=url, nsamples=nsamples)
             if count > 1:
                 if 'single' in cols:
-                    row.append(self.dl_serial(url=url, count=count, nsamples=nsamples))
-                row.append(self.dl_parallel(url=url, count=count, nsamples=nsamples))
+                    self.add_cell('downloads', cols, row, self.dl_serial,
+                                  url=url, count=count, nsamples=nsamples)
+                self.add_cell('downloads', cols, row, self.dl_parallel,
+                              url=url, count=count, nsamples=nsamples)
             rows.append(row)
             self.info('done.\n')
         if self._limit_rate:
@@ -476,6 +2041,10 @@ class ScoreRunner:
             title = f'Downloads ({self.protocol}) from {meta["server"]}'
         if self._socks_args:
             title += f' via {self._socks_args}'
+        if self._clients > 1:
+            title += f' with {self._clients} clients'
+        if self._synth:
+            title += ', synthetic content'
         return {
             'meta': {
                 'title': title,
@@ -486,84 +2055,296 @@ class ScoreRunner:
             'rows': rows,
         }
 
+    def do_mux(self, client: LocalClient, url: str, fsize: int,
+               streams: int, conns: int, nsamples: int = 1):
+        samples = []
+        errors = []
+        profiles = []
+        per_cpu = []
+        completions = LatencyHistogram()
+        authority = url.split('/')[2]
+        args = [
+            '-q', '-N', '-n', f'{streams}', '-m', f'{streams}',
+            '-M', f'{conns}', '-c', f'{math.ceil(streams / conns)}',
+            '-C', self.env.ca.cert_file,
+            '-r', f'{authority}:{self.server_addr or "127.0.0.1"}',
+            '-V', self.protocol, url,
+        ]
+        self.info(f'{conns}...')
+        for measure in self.sample_runs(nsamples, samples):
+            r = client.run(args=args, with_profile=True)
+            if not measure:
+                continue
+            times = []
+            for line in r.trace_lines:
+                m = re.match(r'^\[t-\d+] FINISHED with result (\d+) after (\d+)us', line)
+                if m and m.group(1) == '0':
+                    times.append(int(m.group(2)) / 1000000)
+            if r.exit_code != 0 or len(times) != streams:
+                errors.append(f'exit={r.exit_code} ok={len(times)}/{streams}')
+                continue
+            samples.append(streams * fsize / r.duration.total_seconds())
+            self._add_cpu_sample([r], streams * fsize, per_cpu)
+            for t in times:
+                completions.add(t)
+            if r.profile.stats:
+                profiles.append(r.profile)
+        cell = Card.mk_mbs_cell(samples, profiles, errors, per_cpu=per_cpu)
+        if completions.count > 0:
+            cell['latency'] = {'stream': completions.to_json()}
+        if 'rss-max' in cell.get('stats', {}):
+            cell['mux'] = {
+                'rss_per_stream': cell['stats']['rss-max'] / streams,
+            }
+        return self.add_sampling(cell, samples)
+
+    def multiplexing(self, fsize: int, streams: List[int], conns: List[int],
+                     meta: Dict[str, Any]) -> Dict[str, Any]:
+        if self.protocol not in ['h2', 'h3']:
+            raise ScoreCardError('multiplexing needs h2 or h3')
+        if self._socks_args or self._proxy_args or self._net_args:
+            raise ScoreCardError('multiplexing does not work via a proxy or relay')
+        client = LocalClient(name='cli_hx_download', env=self.env,
+                             placement=self._placements.get('curl'),
+                             profile_interval=self._profile_interval)
+        if not client.exists():
+            raise ScoreCardError(f'example client not built: {client.name}')
+        url = f'{self._scheme}://{self.env.domain1}:{self.server_port}/score{Card.fmt_size(fsize)}.data'
+        cols = ['streams']
+        cols.extend([f'{k} conn' if k == 1 else f'{k} conns' for k in conns])
+        rows = []
+        for nstreams in streams:
+            self.info(f'{nstreams} streams, connections...')
+            row = [{
+                'val': nstreams,
+                'sval': f'{nstreams}',
+            }]
+            for k in conns:
+                if k > nstreams:
+                    row.append({'val': None, 'sval': '--'})
+                    continue
+                self.add_cell('multiplexing', cols, row, self.do_mux,
+                              client=client, url=url, fsize=fsize,
+                              streams=nstreams, conns=k,
+                              nsamples=meta['samples'])
+            rows.append(row)
+            self.info('done.\n')
+        return {
+            'meta': {
+                'title': f'Multiplexed downloads of {Card.fmt_size(fsize)} '
+                         f'({self.protocol}) from {meta["server"]}',
+                'size': fsize,
+            },
+            'cols': cols,
+            'rows': rows,
+        }
+
+    def ws_echo_cell(self, echo: List[Dict[str, Any]], idx: int, **kwargs) \
+            -> Dict[str, Any]:
+        # the `idx` cell of a websocket row, both come from the same
+        # echo run that is done once and kept in `echo`
+        if not echo:
+            echo.extend(self.do_ws_echo(**kwargs))
+        return echo[idx]
+
+    def do_ws_echo(self, client: LocalClient, url: str, size: int,
+                   count: int, nsamples: int = 1):
+        msg_samples = []
+        mbs_samples = []
+        errors = []
+        profiles = []
+        # cli_ws_data sends one message more than its count
+        args = ['-q', '-c', f'{count - 1}', '-m', f'{size}', url]
+        for measure in self.sample_runs(nsamples, msg_samples):
+            r = client.run(args=args, with_profile=True)
+            if not measure:
+                continue
+            echoed = None
+            for line in r.trace_lines:
+                m = re.match(r'^ws_data: echoed (\d+) messages in (\d+)us', line)
+                if m:
+                    echoed = (int(m.group(1)), int(m.group(2)) / 1000000)
+            if r.exit_code != 0 or echoed is None or echoed[0] != count:
+                errors.append(f'exit={r.exit_code} echoed={echoed[0] if echoed else 0}/{count}')
+                continue
+            msg_samples.append(count / echoed[1])
+            mbs_samples.append(count * size / echoed[1])
+            if r.profile.stats:
+                profiles.append(r.profile)
+        msg_cell = Card.mk_reqs_cell(msg_samples, profiles, errors)
+        msg_cell['sval'] = Card.fmt_msgs(msg_cell['val'])
+        mbs_cell = Card.mk_mbs_cell(mbs_samples, [], [])
+        return self.add_sampling(msg_cell, msg_samples), mbs_cell
+
+    def do_ws_pings(self, client: LocalClient, url: str, payload: int,
+                    count: int, nsamples: int = 1):
+        samples = []
+        errors = []
+        rtts = LatencyHistogram()
+        args = [url, 'x' * payload, f'{count}']
+        for measure in self.sample_runs(nsamples, samples):
+            r = client.run(args=args)
+            if not measure:
+                continue
+            times = []
+            for line in r.trace_lines:
+                m = re.match(r'^ws: rtt (\d+)us', line)
+                if m:
+                    times.append(int(m.group(1)) / 1000000)
+            if r.exit_code != 0 or len(times) != count:
+                errors.append(f'exit={r.exit_code} pongs={len(times)}/{count}')
+                continue
+            samples.append(count / sum(times))
+            for t in times:
+                rtts.add(t)
+        cell = Card.mk_reqs_cell(samples, [], errors,
+                                 latencies={'rtt': rtts})
+        cell['sval'] = Card.fmt_msgs(cell['val'])
+        return self.add_sampling(cell, samples)
+
+    def websockets(self, sizes: List[int], count: Optional[int],
+                   meta: Dict[str, Any]) -> Dict[str, Any]:
+        client = LocalClient(name='cli_ws_data', env=self.env,
+                             timeout=ScoreRunner.WS_TIMEOUT,
+                             placement=self._placements.get('curl'),
+                             profile_interval=self._profile_interval)
+        if not client.exists():
+            raise ScoreCardError(f'example client not built: {client.name}')
+        url = f'ws://localhost:{self.server_port}/'
+        cols = ['size', 'messages', 'throughput']
+        rows = []
+        for size in sizes:
+            # by default, echo about 32MB per sample
+            ncount = count if count else \
+                max(10, min(10000, (32 * 1024 * 1024) // max(size, 1)))
+            self.info(f'{Card.fmt_size(size)} messages...')
+            row = [{
+                'val': size,
+                'sval': Card.fmt_size(size),
+            }]
+            # one echo run measures both cells of the row
+            echo = []
+            for idx in range(2):
+                self.add_cell('websockets', cols, row, self.ws_echo_cell,
+                              echo=echo, idx=idx, client=client, url=url,
+                              size=size, count=ncount, nsamples=meta['samples'])
+            rows.append(row)
+            self.info('done.\n')
+        return {
+            'meta': {
+                'title': f'WebSocket echo of messages from {meta["server"]}',
+                'count': count,
+            },
+            'cols': cols,
+            'rows': rows,
+        }
+
+    def ws_pings(self, count: int, meta: Dict[str, Any]) -> Dict[str, Any]:
+        client = LocalClient(name='cli_ws_pingpong', env=self.env,
+                             timeout=ScoreRunner.WS_TIMEOUT,
+                             placement=self._placements.get('curl'),
+                             profile_interval=self._profile_interval)
+        if not client.exists():
+            raise ScoreCardError(f'example client not built: {client.name}')
+        url = f'ws://localhost:{self.server_port}/'
+        cols = ['payload', 'pings']
+        rows = []
+        # 125 bytes is the maximum payload of a control frame
+        for payload in [16, 125]:
+            self.info(f'{payload} bytes pings...')
+            row = [{
+                'val': payload,
+                'sval': Card.fmt_size(payload),
+            }]
+            self.add_cell('ws-pings', cols, row, self.do_ws_pings,
+                          client=client, url=url, payload=payload, count=count,
+                          nsamples=meta['samples'])
+            rows.append(row)
+            self.info('done.\n')
+        return {
+            'meta': {
+                'title': f'WebSocket pings to {meta["server"]}, one at a time',
+                'count': count,
+            },
+            'cols': cols,
+            'rows': rows,
+        }
+
+    def _clear_uploads(self):
+        # anonymous ftp does not overwrite files, remove previous uploads
+        if not self.is_http and self._server_docs:
+            for fname in os.listdir(self._server_docs):
+                if fname.startswith('upload'):
+                    os.remove(os.path.join(self._server_docs, fname))
+
     def _check_uploads(self, r: ExecResult, count: int):
         error = ''
         if r.exit_code != 0:
             error += f'exit={r.exit_code} '
         if r.exit_code != 0 or len(r.stats) != count:
             error += f'stats={len(r.stats)}/{count} '
-        fails = [s for s in r.stats if s['response_code'] != 200]
+        fails = [s for s in r.stats if s['response_code'] not in self._ok_codes]
         if len(fails) > 0:
             error += f'{len(fails)} failed'
         for f in fails:
             error += f'[{f["response_code"]}]'
         return error if len(error) > 0 else None
 
-    def ul_single(self, url: str, fpath: str, nsamples: int = 1):
+    def _ul_samples(self, url: str, fpath: str, count: int, nsamples: int,
+                    extra_args: Optional[List[str]] = None):
         samples = []
         errors = []
         profiles = []
+        client_samples = []
+        per_cpu = []
+        perf = []
+        mem = []
+        phases = {}
+        for measure in self.sample_runs(nsamples, samples):
+            self._clear_uploads()
+            rs, duration = self.run_clients(lambda curl: self.curl_upload(
+                curl, url, fpath, extra_args=list(extra_args) if extra_args else None))
+            if not measure:
+                continue
+            errs = [err for err in [self._check_uploads(r, count) for r in rs] if err]
+            if len(errs):
+                errors.extend(self.ab_errors(measure, errs))
+                continue
+            self._add_xfer_sample(rs, duration, 'upload', samples, client_samples,
+                                  per_cpu, perf, mem, phases=phases,
+                                  rate_only=measure == 'b')
+            if measure == 'b':
+                continue
+            profiles.extend([r.profile for r in rs])
+        cell = Card.mk_mbs_cell(samples, profiles, errors, clients=client_samples,
+                                per_cpu=per_cpu)
+        Card.mk_perf(cell, perf, 'bytes')
+        Card.mk_mem(cell, mem, 'bytes')
+        Card.mk_phases(cell, phases)
+        return self.add_sampling(cell, samples)
+
+    def ul_single(self, fname: str, fpath: str, nsamples: int = 1):
         self.info('single...')
-        for _ in range(nsamples):
-            curl = self.mk_curl_client()
-            r = curl.http_put(urls=[url], fdata=fpath, alpn_proto=self.protocol,
-                              with_headers=False, with_profile=True,
-                              suppress_cl=self.suppress_cl)
-            err = self._check_uploads(r, 1)
-            if err:
-                errors.append(err)
-            else:
-                total_size = sum([s['size_upload'] for s in r.stats])
-                samples.append(total_size / r.duration.total_seconds())
-                profiles.append(r.profile)
-        return Card.mk_mbs_cell(samples, profiles, errors)
+        return self._ul_samples(url=self.upload_urls(fname, 1), fpath=fpath,
+                                count=1, nsamples=nsamples)
 
-    def ul_serial(self, url: str, fpath: str, count: int, nsamples: int = 1):
-        samples = []
-        errors = []
-        profiles = []
-        url = f'{url}?id=[0-{count - 1}]'
+    def ul_serial(self, fname: str, fpath: str, count: int, nsamples: int = 1):
         self.info('serial...')
-        for _ in range(nsamples):
-            curl = self.mk_curl_client()
-            r = curl.http_put(urls=[url], fdata=fpath, alpn_proto=self.protocol,
-                              with_headers=False, with_profile=True,
-                              suppress_cl=self.suppress_cl)
-            err = self._check_uploads(r, count)
-            if err:
-                errors.append(err)
-            else:
-                total_size = sum([s['size_upload'] for s in r.stats])
-                samples.append(total_size / r.duration.total_seconds())
-                profiles.append(r.profile)
-        return Card.mk_mbs_cell(samples, profiles, errors)
+        return self._ul_samples(url=self.upload_urls(fname, count), fpath=fpath,
+                                count=count, nsamples=nsamples)
 
-    def ul_parallel(self, url: str, fpath: str, count: int, nsamples: int = 1):
-        samples = []
-        errors = []
-        profiles = []
+    def ul_parallel(self, fname: str, fpath: str, count: int, nsamples: int = 1):
         max_parallel = self._upload_parallel if self._upload_parallel > 0 else count
-        url = f'{url}?id=[0-{count - 1}]'
         self.info('parallel...')
-        for _ in range(nsamples):
-            curl = self.mk_curl_client()
-            r = curl.http_put(urls=[url], fdata=fpath, alpn_proto=self.protocol,
-                              with_headers=False, with_profile=True,
-                              suppress_cl=self.suppress_cl,
-                              extra_args=[
-                                   '--parallel',
-                                   '--parallel-max', str(max_parallel),
-                              ])
-            err = self._check_uploads(r, count)
-            if err:
-                errors.append(err)
-            else:
-                total_size = sum([s['size_upload'] for s in r.stats])
-                samples.append(total_size / r.duration.total_seconds())
-                profiles.append(r.profile)
-        return Card.mk_mbs_cell(samples, profiles, errors)
+        return self._ul_samples(url=self.upload_urls(fname, count), fpath=fpath,
+                                count=count, nsamples=nsamples, extra_args=[
+                                    '--parallel',
+                                    '--parallel-max', str(max_parallel),
+                                ])
 
     def uploads(self, count: int, fsizes: List[int], meta: Dict[str, Any]) -> Dict[str, Any]:
+        if self._clients > 1 and not self.is_http:
+            raise ScoreCardError(f'{self.protocol} uploads of several clients would overwrite each other')
         nsamples = meta['samples']
         max_parallel = self._upload_parallel if self._upload_parallel > 0 else count
         cols = ['size']
@@ -583,21 +2364,27 @@ class ScoreRunner:
                 'sval': Card.fmt_size(fsize)
             }]
             self.info(f'{row[0]["sval"]} uploads...')
-            url = f'{self._scheme}://{self.env.domain1}:{self.server_port}/curltest/put'
             fname = f'upload{row[0]["sval"]}.data'
             fpath = self._make_docs_file(docs_dir=self.env.gen_dir,
                                          fname=fname, fsize=fsize)
             if run_single:
-                row.append(self.ul_single(url=url, fpath=fpath, nsamples=nsamples))
+                self.add_cell('uploads', cols, row, self.ul_single,
+                              fname=fname, fpath=fpath, nsamples=nsamples)
             if run_serial:
-                row.append(self.ul_serial(url=url, fpath=fpath, count=count, nsamples=nsamples))
+                self.add_cell('uploads', cols, row, self.ul_serial,
+                              fname=fname, fpath=fpath, count=count,
+                              nsamples=nsamples)
             if run_parallel:
-                row.append(self.ul_parallel(url=url, fpath=fpath, count=count, nsamples=nsamples))
+                self.add_cell('uploads', cols, row, self.ul_parallel,
+                              fname=fname, fpath=fpath, count=count,
+                              nsamples=nsamples)
             rows.append(row)
             self.info('done.\n')
         title = f'Uploads to {meta["server"]}'
         if self._socks_args:
             title += f' via {self._socks_args}'
+        if self._clients > 1:
+            title += f' with {self._clients} clients'
         return {
             'meta': {
                 'title': title,
@@ -612,32 +2399,75 @@ class ScoreRunner:
         samples = []
         errors = []
         profiles = []
+        client_samples = []
+        per_cpu = []
+        perf = []
+        mem = []
+        latencies = {
+            'ttfb': LatencyHistogram(),
+            'total': LatencyHistogram(),
+        }
+        phases = {}
         url = f'{url}?[0-{count - 1}]'
+        # a full `%{json}` per request makes curl do noticeably more work
+        # than the requests themselves, only write what we evaluate.
+        # `time_posttransfer` goes last, curls that do not know it leave
+        # it empty.
+        write_keys = [
+            'time_starttransfer', 'time_total', 'time_namelookup', 'time_connect',
+            'time_appconnect', 'time_pretransfer', 'time_posttransfer',
+        ]
         extra_args = [
-            '-w', '%{response_code},\\n',
+            '-w', '%{response_code},' + ','.join([f'%{{{key}}}' for key in write_keys]) + '\\n',
         ]
         if max_parallel > 1:
             extra_args.extend([
                '--parallel', '--parallel-max', str(max_parallel)
             ])
         self.info(f'{max_parallel}...')
-        for _ in range(nsamples):
-            curl = self.mk_curl_client()
-            r = curl.http_download(urls=[url], alpn_proto=self.protocol, no_save=True,
-                                   with_headers=False, with_profile=True,
-                                   with_stats=False, extra_args=extra_args)
-            if r.exit_code != 0:
-                errors.append(f'exit={r.exit_code}')
+        for measure in self.sample_runs(nsamples, samples):
+            rs, duration = self.run_clients(lambda curl: curl.http_download(
+                urls=[url], alpn_proto=self.protocol, no_save=True,
+                with_headers=False, with_profile=True,
+                with_stats=False, extra_args=list(extra_args)))
+            if not measure:
+                continue
+            failed = [r for r in rs if r.exit_code != 0]
+            if len(failed):
+                errors.extend(self.ab_errors(measure, [f'exit={r.exit_code}' for r in failed]))
             else:
-                samples.append(count / r.duration.total_seconds())
+                samples.append(count * len(rs) / duration)
+                is_a = measure == 'a'
+                if is_a:
+                    self._add_cpu_sample(rs, count * len(rs), per_cpu)
+                    self._add_perf_sample(rs, count * len(rs), perf)
+                    self._add_mem_sample(rs, count * len(rs), count * len(rs), mem)
+                    if len(rs) > 1:
+                        client_samples.extend([count / r.duration.total_seconds() for r in rs])
                 non_200s = 0
-                for line in r.stdout.splitlines():
-                    if not line.startswith('200,'):
-                        non_200s += 1
+                for r in rs:
+                    for line in r.stdout.splitlines():
+                        vals = line.split(',')
+                        if vals[0] != '200':
+                            non_200s += 1
+                            continue
+                        if not is_a:
+                            continue
+                        stats = {key: float(val) for key, val in zip(write_keys, vals[1:])
+                                 if val}
+                        latencies['ttfb'].add(stats['time_starttransfer'])
+                        latencies['total'].add(stats['time_total'])
+                        self._add_phase_sample([stats], phases)
                 if non_200s > 0:
-                    errors.append(f'responses != 200: {non_200s}')
-            profiles.append(r.profile)
-        return Card.mk_reqs_cell(samples, profiles, errors)
+                    errors.extend(self.ab_errors(measure, [f'responses != 200: {non_200s}']))
+            if measure == 'a':
+                profiles.extend([r.profile for r in rs])
+        cell = Card.mk_reqs_cell(samples, profiles, errors, clients=client_samples,
+                                 latencies=latencies, per_cpu=per_cpu)
+        Card.mk_perf(cell, perf, 'requests')
+        Card.mk_mem(cell, mem, 'requests')
+        Card.mk_phases(cell, phases)
+        return self.add_sampling(cell, samples)
 
     def requests(self, count: int, meta: Dict[str, Any]) -> Dict[str, Any]:
         url = f'{self._scheme}://{self.env.domain1}:{self.server_port}/reqs10.data'
@@ -656,14 +2486,16 @@ class ScoreRunner:
                 }
         ]
         self.info('requests, max parallel...')
-        row.extend([self.do_requests(url=url, count=count,
-                                     max_parallel=mp, nsamples=meta["samples"])
-                    for mp in mparallel])
+        for mp in mparallel:
+            self.add_cell('requests', cols, row, self.do_requests,
+                          url=url, count=count, max_parallel=mp, nsamples=meta["samples"])
         rows.append(row)
         self.info('done.\n')
         title = f'Requests in parallel to {meta["server"]}'
         if self._socks_args:
             title += f' via {self._socks_args}'
+        if self._clients > 1:
+            title += f' with {self._clients} clients'
         return {
             'meta': {
                 'title': title,
@@ -675,10 +2507,19 @@ class ScoreRunner:
 
     def score(self,
               handshakes: bool = True,
+              tls_handshakes: Optional[List[str]] = None,
+              tls_handshake_count: int = 50,
               downloads: Optional[List[int]] = None,
               download_count: int = 50,
               uploads: Optional[List[int]] = None,
               upload_count: int = 50,
+              mux_size: Optional[int] = None,
+              mux_streams: Optional[List[int]] = None,
+              mux_conns: Optional[List[int]] = None,
+              ws_sizes: Optional[List[int]] = None,
+              ws_count: Optional[int] = None,
+              ws_pings: int = 0,
+              decodings: Optional[List[int]] = None,
               req_count=5000,
               request_parallels=None,
               nsamples: int = 1,
@@ -696,8 +2537,32 @@ class ScoreRunner:
                 'date': f'{datetime.datetime.now(datetime.timezone.utc).isoformat()}',
             }
         }
+        self._meta = score['meta']
         if self._limit_rate:
             score['meta']['limit-rate'] = self._limit_rate
+        if self._clients > 1:
+            score['meta']['clients'] = self._clients
+        if self._warmups > 0:
+            score['meta']['warmups'] = self._warmups
+        if self._adaptive:
+            score['meta']['adaptive'] = {
+                'max-samples': self._max_samples,
+            }
+            if self._target_cv is not None:
+                score['meta']['adaptive']['target-cv'] = self._target_cv
+            if self._target_ci is not None:
+                score['meta']['adaptive']['target-ci'] = self._target_ci
+        if self._placements:
+            score['meta']['placement'] = {name: placement.to_json() for name, placement
+                                          in self._placements.items()}
+        if self._curl_b:
+            score['meta']['ab'] = {
+                name: {
+                    'path': path,
+                    'version': self.curl_fullname_of(path),
+                } for name, path in [('a', self._curl_a or os.environ.get('CURL', self.env.curl)),
+                                     ('b', self._curl_b)]
+            }
 
         if self.protocol == 'h3':
             score['meta']['protocol'] = 'h3'
@@ -718,6 +2583,24 @@ class ScoreRunner:
         elif self.protocol == 'h1' or self.protocol == 'http/1.1':
             score['meta']['protocol'] = 'http/1.1'
             score['meta']['implementation'] = 'native'
+        elif self.protocol in ScoreRunner.FTP_PROTOCOLS:
+            score['meta']['protocol'] = self.protocol
+            if not self.env.curl_has_protocol(self._scheme):
+                raise ScoreCardError(f'curl does not support {self._scheme}')
+            score['meta']['implementation'] = 'native'
+        elif self.protocol in ScoreRunner.SSH_PROTOCOLS:
+            score['meta']['protocol'] = self.protocol
+            if not self.env.curl_has_protocol(self.protocol):
+                raise ScoreCardError(f'curl does not support {self.protocol}')
+            for lib in ['libssh2', 'libssh']:
+                if self.env.curl_uses_lib(lib):
+                    score['meta']['implementation'] = lib
+                    break
+        elif self.protocol == 'ws':
+            score['meta']['protocol'] = 'ws'
+            if not self.env.curl_has_protocol('ws'):
+                raise ScoreCardError('curl does not support websockets')
+            score['meta']['implementation'] = 'native'
         else:
             raise ScoreCardError(f"unknown protocol: {self.protocol}")
 
@@ -725,12 +2608,32 @@ class ScoreRunner:
             raise ScoreCardError('did not recognized protocol lib')
         score['meta']['implementation_version'] = Env.curl_lib_version(score['meta']['implementation'])
 
+        if self.protocol == 'ws':
+            if handshakes or tls_handshakes or downloads or uploads or mux_size or \
+                    requests or decodings:
+                raise ScoreCardError('ws only supports the websocket scenarios')
+        elif not self.is_http and (handshakes or tls_handshakes or mux_size or requests or
+                                   decodings):
+            raise ScoreCardError(f'{self.protocol} only supports downloads and uploads')
+        elif ws_sizes or ws_pings:
+            raise ScoreCardError('websocket scenarios need protocol ws')
         if handshakes:
             score['handshakes'] = self.handshakes()
+        if tls_handshakes:
+            score['tls-handshakes'] = self.tls_handshakes(count=tls_handshake_count,
+                                                          key_types=tls_handshakes,
+                                                          meta=score['meta'])
         if downloads and len(downloads) > 0:
             score['downloads'] = self.downloads(count=download_count,
                                                 fsizes=downloads,
                                                 meta=score['meta'])
+        if decodings and self._decode_docs:
+            score['decoding'] = self.decoding(fsizes=decodings, meta=score['meta'])
+        if mux_size:
+            score['multiplexing'] = self.multiplexing(fsize=mux_size,
+                                                      streams=mux_streams or [1, 10, 100, 1000],
+                                                      conns=mux_conns or [1, 4],
+                                                      meta=score['meta'])
         if uploads and len(uploads) > 0:
             score['uploads'] = self.uploads(count=upload_count,
                                             fsizes=uploads,
@@ -740,17 +2643,94 @@ class ScoreRunner:
                 request_parallels = [1, 6, 25, 50, 100, 300]
             score['meta']['request_parallels'] = request_parallels
             score['requests'] = self.requests(count=req_count, meta=score['meta'])
+        if ws_sizes:
+            score['websockets'] = self.websockets(sizes=ws_sizes, count=ws_count,
+                                                  meta=score['meta'])
+        if ws_pings:
+            score['ws-pings'] = self.ws_pings(count=ws_pings, meta=score['meta'])
+        if self._flame_dir:
+            self.save_stacks(score)
         return score
 
 
-def run_score(args, protocol):
-    if protocol not in ['http/1.1', 'h1', 'h2', 'h3']:
+def cred_switcher(server) -> Callable[[str], bool]:
+    # Let a ScoreRunner change the credentials `server` uses for domain1
+    def switch_creds(name: str) -> bool:
+        if isinstance(server, Httpd):
+            server.set_domain1_cred_name(name)
+        else:
+            server.set_cred_name(name)
+        return server.reload_if_config_changed()
+    return switch_creds
+
+
+def mk_placements(args) -> Dict[str, CpuPlacement]:
+    # the placements of curl, the servers and the harness as given
+    # in `args`, checked to be usable and not to overlap
+    specs = {
+        'curl': args.cpus_curl,
+        'servers': args.cpus_servers,
+        'harness': args.cpus_harness,
+    }
+    if not any(specs.values()) and args.nice is None:
+        return {}
+    if not hasattr(os, 'sched_setaffinity'):
+        sys.stderr.write(f'ERROR: cpu placement is unsupported on {sys.platform}\n')
+        sys.exit(1)
+    available = os.sched_getaffinity(0)
+    cpus = {}
+    for name, spec in specs.items():
+        if spec:
+            try:
+                cpus[name] = CpuPlacement.parse_cpus(spec)
+            except EnvError as ex:
+                sys.stderr.write(f'ERROR: {ex}\n')
+                sys.exit(1)
+            if not set(cpus[name]).issubset(available):
+                sys.stderr.write(f'ERROR: cpus for {name} not available: {spec}, '
+                                 f'we have {sorted(available)}\n')
+                sys.exit(1)
+    for name, other in [('curl', 'servers'), ('curl', 'harness'), ('servers', 'harness')]:
+        if name in cpus and other in cpus and set(cpus[name]) & set(cpus[other]):
+            sys.stderr.write(f'ERROR: cpus for {name} and {other} overlap\n')
+            sys.exit(1)
+    if args.nice is not None:
+        if args.nice >= 0:
+            sys.stderr.write('ERROR: --nice only raises the priority, it must be negative\n')
+            sys.exit(1)
+        try:
+            with CpuPlacement(nice=args.nice).spawning():
+                pass
+        except PermissionError:
+            sys.stderr.write(f'ERROR: not permitted to run at nice {args.nice}\n')
+            sys.exit(1)
+    placements = {}
+    for name in ['curl', 'servers']:
+        if name in cpus or args.nice is not None:
+            placements[name] = CpuPlacement(cpus=cpus.get(name), nice=args.nice)
+    if 'harness' in cpus:
+        placements['harness'] = CpuPlacement(cpus=cpus['harness'])
+    return placements
+
+
+def run_score(args, protocol, export: Optional[ScoreExport] = None,
+              checkpoint: Optional[ScoreCheckpoint] = None):
+    file_protocols = ScoreRunner.FTP_PROTOCOLS + ScoreRunner.SSH_PROTOCOLS
+    if protocol not in ['http/1.1', 'h1', 'h2', 'h3', 'ws'] + file_protocols:
         sys.stderr.write(f'ERROR: protocol "{protocol}" not known to scorecard\n')
         sys.exit(1)
     if protocol == 'h1':
         protocol = 'http/1.1'
-
-    handshakes = True
+    is_file_protocol = protocol in file_protocols
+    is_ws = protocol == 'ws'
+
+    # handshakes and requests are http only scenarios
+    handshakes = not (is_file_protocol or is_ws)
+    tls_handshakes = None
+    if args.tls_handshakes:
+        tls_handshakes = []
+        for x in args.tls_key_types or ['rsa2048,rsa4096,ec256,ed25519']:
+            tls_handshakes.extend([s for s in x.split(',') if s])
     downloads = [1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024]
     if args.download_sizes is not None:
         downloads = []
@@ -763,25 +2743,63 @@ def run_score(args, protocol):
         for x in args.upload_sizes:
             uploads.extend([Card.parse_size(s) for s in x.split(',')])
 
-    requests = True
+    mux_size = None
+    mux_streams = None
+    mux_conns = None
+    if args.mux:
+        mux_size = Card.parse_size(args.mux_size)
+        if args.mux_streams:
+            mux_streams = [int(s) for x in args.mux_streams for s in x.split(',')]
+        if args.mux_conns:
+            mux_conns = [int(s) for x in args.mux_conns for s in x.split(',')]
+
+    decodings = None
+    if args.decoding:
+        decodings = [1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024]
+        if args.decoding_sizes is not None:
+            decodings = [Card.parse_size(s) for x in args.decoding_sizes for s in x.split(',')]
+
+    ws_sizes = None
+    ws_pings = 0
+    if is_ws:
+        ws_sizes = [16, 1024, 64 * 1024, 1024 * 1024, 16 * 1024 * 1024]
+        if args.ws_sizes is not None:
+            ws_sizes = [Card.parse_size(s) for x in args.ws_sizes for s in x.split(',')]
+        ws_pings = args.ws_pings
+        downloads = None
+        uploads = None
+
+    requests = not (is_file_protocol or is_ws)
     request_parallels = None
     if args.request_parallels:
         request_parallels = []
         for x in args.request_parallels:
             request_parallels.extend([int(s) for s in x.split(',')])
 
-    if args.downloads or args.uploads or args.requests or args.handshakes:
+    if args.downloads or args.uploads or args.requests or args.handshakes or \
+            args.tls_handshakes or args.mux or args.decoding:
         handshakes = args.handshakes
         if not args.downloads:
             downloads = None
         if not args.uploads:
             uploads = None
         requests = args.requests
+    # the files the server needs to have
+    docs = ([] if args.synth else (downloads or [])) + \
+        ([mux_size] if mux_size else [])
+
+    target_cv = args.target_cv / 100 if args.target_cv is not None else None
+    target_ci = args.target_ci / 100 if args.target_ci is not None else None
+    if (target_cv is not None or target_ci is not None) and \
+            args.max_samples < args.samples:
+        sys.stderr.write('ERROR: --max-samples must not be less than --samples\n')
+        sys.exit(1)
 
     rv = 0
     env = Env()
     env.setup()
     env.test_timeout = None
+    profile_interval = args.profile_interval / 1000 if args.profile_interval else None
 
     test_httpd = protocol != 'h3'
     test_h2o = protocol == 'h3' and env.have_h2o()
@@ -790,6 +2808,80 @@ def run_score(args, protocol):
         test_caddy = args.caddy
         test_httpd = args.httpd
         test_h2o = args.h2o
+    if is_file_protocol or is_ws:
+        if args.caddy or args.httpd or args.h2o or args.remote:
+            sys.stderr.write(f'ERROR: protocol "{protocol}" only runs against '
+                             'the local vsftpd, sshd or websocket server\n')
+            sys.exit(1)
+        test_httpd = test_h2o = test_caddy = False
+
+    if decodings and (not test_httpd or args.remote):
+        # the encoded files are served via type maps of httpd
+        sys.stderr.write('ERROR: --decoding needs the local httpd\n')
+        sys.exit(1)
+
+    if args.perf_stat and not shutil.which('perf'):
+        sys.stderr.write('ERROR: --perf-stat needs the perf command\n')
+        sys.exit(1)
+
+    if args.memdebug:
+        # debug builds may still lack memdebug, see if it logs anything
+        r = CurlClient(env=env, with_memdebug=True).run_direct(args=['-V'])
+        if not env.curl_is_debug() or not r.memdebug.stats or \
+                not r.memdebug.stats['allocs']:
+            sys.stderr.write('ERROR: --memdebug needs a debug build of curl '
+                             'with memdebug enabled\n')
+            sys.exit(1)
+
+    if args.curl_a and not args.curl_b:
+        sys.stderr.write('ERROR: --curl-a needs a --curl-b to compare with\n')
+        sys.exit(1)
+    for path in [args.curl_a, args.curl_b]:
+        if path and not os.access(path, os.X_OK):
+            sys.stderr.write(f'ERROR: not an executable: {path}\n')
+            sys.exit(1)
+    if args.curl_b and (is_ws or args.mux or args.flame or args.flame_dir):
+        sys.stderr.write('ERROR: --curl-b does not work with websockets, '
+                         'multiplexing or flame graphs\n')
+        sys.exit(1)
+
+    # the results refer to the stacks files, keep them valid from anywhere
+    flame_dir = os.path.abspath(args.flame_dir) if args.flame_dir else None
+
+    placements = mk_placements(args)
+    # a matrix run passes the export all its runs write to
+    own_export = export is None and bool(args.jsonl or args.csv or args.openmetrics)
+    if own_export:
+        export = ScoreExport(jsonl_file=args.jsonl, csv_file=args.csv,
+                             openmetrics_file=args.openmetrics)
+    if 'harness' in placements:
+        # before any server starts or thread runs, they inherit this
+        placements['harness'].place(os.getpid(), with_children=False)
+
+    if args.synth and (not test_httpd or test_caddy or test_h2o or args.remote):
+        sys.stderr.write('ERROR: --synth needs the local httpd with mod_curltest\n')
+        sys.exit(1)
+
+    net_profile = None
+    if args.net_profile:
+        net_profile = NetRelay.get_profile(args.net_profile)
+        if args.socks4 or args.socks5 or args.proxy or args.remote:
+            sys.stderr.write('ERROR: --net-profile does not work with proxies or --remote\n')
+            sys.exit(1)
+        if not (protocol in ['http/1.1', 'h2', 'h3']):
+            sys.stderr.write(f'ERROR: --net-profile does not work for {protocol}\n')
+            sys.exit(1)
+
+    if args.proxytunnel and not args.proxy:
+        sys.stderr.write('ERROR: --proxytunnel needs --proxy\n')
+        sys.exit(1)
+    if args.proxy:
+        if args.socks4 or args.socks5 or args.remote:
+            sys.stderr.write('ERROR: --proxy does not work with SOCKS or --remote\n')
+            sys.exit(1)
+        if protocol not in ['http/1.1', 'h2']:
+            sys.stderr.write(f'ERROR: --proxy does not work for {protocol}\n')
+            sys.exit(1)
 
     sockd = None
     socks_args = None
@@ -808,9 +2900,97 @@ def run_score(args, protocol):
     nghttpx = None
     caddy = None
     h2o = None
+    vsftpd = None
+    sshd = None
+    ws_echo = None
+    nghttpx_fwd = None
+    h2o_proxy = None
+    relays = []
     try:
         cards = []
 
+        if is_ws:
+            cmd = os.path.join(env.project_dir,
+                               'tests/http/testenv/ws_echo_server.py')
+            # no limit on the message size, the default is 1MB, and no
+            # keepalive pings from the server interfering with measurements
+            ws_echo = WsServer('ws_echo', env, cmd,
+                               args=['--max-size', '0', '--ping-interval', '0'])
+            ws_echo.startup()
+            card = ScoreRunner(env=env,
+                               protocol=protocol,
+                               server_descr='ws_echo_server.py',
+                               server_port=ws_echo.port,
+                               verbose=args.verbose, curl_verbose=args.curl_verbose,
+                               warmups=args.warmup,
+                               max_samples=args.max_samples,
+                               target_cv=target_cv,
+                               target_ci=target_ci,
+                               placements=placements,
+                               profile_interval=profile_interval,
+                               on_cell=export.on_cell if export else None,
+                               checkpoint=checkpoint,
+                               servers={'ws_echo': ws_echo})
+            cards.append(card)
+
+        if is_file_protocol:
+            ssh_args = None
+            if protocol in ScoreRunner.FTP_PROTOCOLS:
+                if not env.has_vsftpd():
+                    raise ScoreCardError('vsftpd not available')
+                vsftpd = VsFTPD(env=env, with_ssl=protocol != 'ftp',
+                                ssl_implicit=protocol == 'ftps')
+                if not vsftpd.initial_start():
+                    raise ScoreCardError('vsftpd failed to start')
+                server_descr = f'vsftpd/{env.vsftpd_version()}'
+                server_port = vsftpd.port
+                server_docs = vsftpd.docs_dir
+            else:
+                if not env.has_sshd() or \
+                        (protocol == 'sftp' and not env.has_sftpd()):
+                    raise ScoreCardError(f'sshd for {protocol} not available')
+                sshd = Sshd(env=env)
+                if not sshd.initial_start():
+                    raise ScoreCardError('sshd failed to start')
+                server_descr = f'sshd: {protocol}:{sshd.port}'
+                server_port = sshd.port
+                server_docs = sshd.home_dir
+                ssh_args = [
+                    '--knownhosts', sshd.known_hosts,
+                    '--pubkey', sshd.user1_pubkey_file,
+                    '--key', sshd.user1_privkey_file,
+                    '--user', f'{os.environ["USER"]}:',
+                ]
+            card = ScoreRunner(env=env,
+                               protocol=protocol,
+                               server_descr=server_descr,
+                               server_port=server_port,
+                               verbose=args.verbose, curl_verbose=args.curl_verbose,
+                               download_parallel=args.download_parallel,
+                               upload_parallel=args.upload_parallel,
+                               with_flame=args.flame,
+                               flame_dir=flame_dir,
+                               curl_a=args.curl_a,
+                               curl_b=args.curl_b,
+                               with_perf_stat=args.perf_stat,
+                               with_memdebug=args.memdebug,
+                               socks_args=socks_args,
+                               limit_rate=args.limit_rate,
+                               clients=args.clients,
+                               warmups=args.warmup,
+                               max_samples=args.max_samples,
+                               target_cv=target_cv,
+                               target_ci=target_ci,
+                               placements=placements,
+                               profile_interval=profile_interval,
+                               on_cell=export.on_cell if export else None,
+                               checkpoint=checkpoint,
+                               with_timeseries=args.timeseries,
+                               ssh_args=ssh_args,
+                               servers={'vsftpd': vsftpd} if vsftpd else {'sshd': sshd})
+            card.setup_resources(server_docs, docs)
+            cards.append(card)
+
         if args.remote:
             m = re.match(r'^(.+):(\d+)$', args.remote)
             if m is None:
@@ -829,9 +3009,24 @@ def run_score(args, protocol):
                                download_parallel=args.download_parallel,
                                upload_parallel=args.upload_parallel,
                                with_flame=args.flame,
+                               flame_dir=flame_dir,
+                               curl_a=args.curl_a,
+                               curl_b=args.curl_b,
+                               with_perf_stat=args.perf_stat,
+                               with_memdebug=args.memdebug,
                                socks_args=socks_args,
                                limit_rate=args.limit_rate,
-                               suppress_cl=args.upload_no_cl)
+                               suppress_cl=args.upload_no_cl,
+                               clients=args.clients,
+                               warmups=args.warmup,
+                               max_samples=args.max_samples,
+                               target_cv=target_cv,
+                               target_ci=target_ci,
+                               placements=placements,
+                               profile_interval=profile_interval,
+                               on_cell=export.on_cell if export else None,
+                               checkpoint=checkpoint,
+                               with_timeseries=args.timeseries)
             cards.append(card)
 
         if test_httpd:
@@ -858,10 +3053,31 @@ def run_score(args, protocol):
                                download_parallel=args.download_parallel,
                                upload_parallel=args.upload_parallel,
                                with_flame=args.flame,
+                               flame_dir=flame_dir,
+                               curl_a=args.curl_a,
+                               curl_b=args.curl_b,
+                               with_perf_stat=args.perf_stat,
+                               with_memdebug=args.memdebug,
                                socks_args=socks_args,
                                limit_rate=args.limit_rate,
-                               http_plain=args.http_plain)
-            card.setup_resources(server_docs, downloads)
+                               http_plain=args.http_plain,
+                               clients=args.clients,
+                               warmups=args.warmup,
+                               max_samples=args.max_samples,
+                               target_cv=target_cv,
+                               target_ci=target_ci,
+                               placements=placements,
+                               profile_interval=profile_interval,
+                               on_cell=export.on_cell if export else None,
+                               checkpoint=checkpoint,
+                               with_timeseries=args.timeseries,
+                               switch_creds=cred_switcher(nghttpx if nghttpx else httpd),
+                               synth=args.synth,
+                               servers={'nghttpx': nghttpx, 'httpd': httpd} if nghttpx
+                               else {'httpd': httpd})
+            card.setup_resources(server_docs, docs)
+            if decodings:
+                card.setup_decoding(server_docs, decodings)
             cards.append(card)
 
         if test_h2o:
@@ -879,9 +3095,26 @@ def run_score(args, protocol):
                                download_parallel=args.download_parallel,
                                upload_parallel=args.upload_parallel,
                                with_flame=args.flame,
+                               flame_dir=flame_dir,
+                               curl_a=args.curl_a,
+                               curl_b=args.curl_b,
+                               with_perf_stat=args.perf_stat,
+                               with_memdebug=args.memdebug,
                                socks_args=socks_args,
-                               limit_rate=args.limit_rate)
-            card.setup_resources(server_docs, downloads)
+                               limit_rate=args.limit_rate,
+                               clients=args.clients,
+                               warmups=args.warmup,
+                               max_samples=args.max_samples,
+                               target_cv=target_cv,
+                               target_ci=target_ci,
+                               placements=placements,
+                               profile_interval=profile_interval,
+                               on_cell=export.on_cell if export else None,
+                               checkpoint=checkpoint,
+                               with_timeseries=args.timeseries,
+                               switch_creds=cred_switcher(h2o),
+                               servers={'h2o': h2o})
+            card.setup_resources(server_docs, docs)
             cards.append(card)
 
         if test_caddy and env.caddy:
@@ -907,11 +3140,87 @@ def run_score(args, protocol):
                                download_parallel=args.download_parallel,
                                upload_parallel=args.upload_parallel,
                                with_flame=args.flame,
+                               flame_dir=flame_dir,
+                               curl_a=args.curl_a,
+                               curl_b=args.curl_b,
+                               with_perf_stat=args.perf_stat,
+                               with_memdebug=args.memdebug,
                                socks_args=socks_args,
-                               limit_rate=args.limit_rate)
-            card.setup_resources(server_docs, downloads)
+                               limit_rate=args.limit_rate,
+                               clients=args.clients,
+                               warmups=args.warmup,
+                               max_samples=args.max_samples,
+                               target_cv=target_cv,
+                               target_ci=target_ci,
+                               placements=placements,
+                               profile_interval=profile_interval,
+                               on_cell=export.on_cell if export else None,
+                               checkpoint=checkpoint,
+                               with_timeseries=args.timeseries,
+                               switch_creds=cred_switcher(caddy),
+                               servers={'caddy': caddy, 'httpd': httpd} if backend
+                               else {'caddy': caddy})
+            card.setup_resources(server_docs, docs)
             cards.append(card)
 
+        if sockd:
+            for card in cards:
+                card.add_server('danted', sockd)
+
+        if args.proxy:
+            if args.proxy != 'http' and not env.curl_has_feature('HTTPS-proxy'):
+                raise ScoreCardError('curl lacks HTTPS-proxy support')
+            # the forward proxies of httpd are the backend of all others
+            if httpd is None:
+                httpd = Httpd(env=env)
+                assert httpd.exists(), \
+                    f'httpd not found: {env.httpd}'
+                httpd.clear_logs()
+                assert httpd.initial_start()
+            proxy_descr = f'httpd/{env.httpd_version()}'
+            if args.proxy == 'h2' and args.proxytunnel:
+                if not env.have_nghttpx():
+                    raise ScoreCardError('h2 proxy tunnels need nghttpx')
+                nghttpx_fwd = NghttpxFwd(env=env)
+                nghttpx_fwd.clear_logs()
+                assert nghttpx_fwd.initial_start()
+                proxy_descr = f'nghttpx/{env.nghttpx_version()}'
+            elif args.proxy == 'h3':
+                if not env.curl_has_feature('proxy-HTTP3'):
+                    raise ScoreCardError('curl lacks HTTP/3 proxy support')
+                if not env.have_h2o():
+                    raise ScoreCardError('h3 proxies need h2o')
+                h2o_proxy = H2oProxy(env=env)
+                h2o_proxy.clear_logs()
+                assert h2o_proxy.initial_start()
+                proxy_descr = f'H2o/{env.h2o_version()}'
+            proxy_args = CurlClient(env=env).get_proxy_args(
+                proto='http/1.1' if args.proxy in ['http', 'https'] else args.proxy,
+                proxys=args.proxy != 'http', tunnel=args.proxytunnel,
+                use_h2o=args.proxy == 'h3')
+            proxy_descr = f'{args.proxy} proxy{" tunnel" if args.proxytunnel else ""} ' \
+                          f'[{proxy_descr}]'
+            # score each server directly and then via the proxy
+            if nghttpx_fwd:
+                proxy_servers = {'nghttpx-fwd': nghttpx_fwd}
+            elif h2o_proxy:
+                proxy_servers = {'h2o-proxy': h2o_proxy}
+            else:
+                proxy_servers = {'httpd': httpd}
+            cards = [c for card in cards
+                     for c in [card, card.via_proxy(proxy_args, proxy_descr,
+                                                    proxy_servers=proxy_servers)]]
+
+        if net_profile:
+            for idx, card in enumerate(cards):
+                relay = NetRelay(env=env, profile=net_profile,
+                                 target_port=card.server_port,
+                                 name=f'net_relay_{idx}')
+                relays.append(relay)
+                if not relay.initial_start():
+                    raise ScoreCardError(f'failed to start relay for {card.server_descr}')
+                card.use_net_relay(relay)
+
         if args.start_only:
             print('started servers:')
             for card in cards:
@@ -920,20 +3229,41 @@ def run_score(args, protocol):
             sys.stderr.flush()
             sys.stdin.readline()
         else:
+            direct_score = None
             for card in cards:
                 score = card.score(handshakes=handshakes,
+                                   tls_handshakes=tls_handshakes,
+                                   tls_handshake_count=args.tls_handshake_count,
                                    downloads=downloads,
                                    download_count=args.download_count,
                                    uploads=uploads,
                                    upload_count=args.upload_count,
+                                   mux_size=mux_size,
+                                   mux_streams=mux_streams,
+                                   mux_conns=mux_conns,
+                                   ws_sizes=ws_sizes,
+                                   ws_count=args.ws_count,
+                                   ws_pings=ws_pings,
+                                   decodings=decodings,
                                    req_count=args.request_count,
                                    requests=requests,
                                    request_parallels=request_parallels,
                                    nsamples=args.samples)
+                if not card.is_proxied:
+                    direct_score = score
+                elif direct_score:
+                    overhead = ScoreDiff.overhead(direct_score, score,
+                                                  via=f'{args.proxy} proxy')
+                    if overhead:
+                        score['proxy-overhead'] = overhead
                 if args.json:
                     print(json.JSONEncoder(indent=2).encode(score))
                 else:
                     Card.print_score(score)
+                if args.history_db:
+                    history = ScoreHistory(args.history_db)
+                    history.add(score)
+                    history.close()
 
     except ScoreCardError as ex:
         sys.stderr.write(f"ERROR: {ex}\n")
@@ -942,6 +3272,18 @@ def run_score(args, protocol):
         log.warning("aborted")
         rv = 1
     finally:
+        for relay in relays:
+            relay.stop()
+        if h2o_proxy:
+            h2o_proxy.stop()
+        if nghttpx_fwd:
+            nghttpx_fwd.stop(wait_dead=False)
+        if ws_echo:
+            ws_echo.shutdown()
+        if sshd:
+            sshd.stop()
+        if vsftpd:
+            vsftpd.stop()
         if caddy:
             caddy.stop()
         if nghttpx:
@@ -952,6 +3294,132 @@ def run_score(args, protocol):
             httpd.stop()
         if sockd:
             sockd.stop()
+        if own_export:
+            export.close()
+    return rv
+
+
+# arguments that do not change what a matrix run measures
+MATRIX_OUTPUT_ARGS = [
+    'matrix', 'checkpoint', 'jsonl', 'csv', 'openmetrics', 'json', 'verbose',
+    'history_db',
+]
+MATRIX_SCENARIO_KEYS = [
+    'download-sizes', 'upload-sizes', 'request-parallels', 'decoding-sizes',
+]
+MATRIX_KEYS = [
+    'protocols', 'servers', 'proxies', 'parallels', *MATRIX_SCENARIO_KEYS, 'options',
+]
+
+
+def mk_matrix_scenarios(spec: Dict[str, Any], protocol: str) -> List[str]:
+    # The scenario arguments of the matrix `spec` that apply to `protocol`.
+    # Websockets only have their own scenarios, files are only down- and
+    # uploaded and decoding needs the local httpd.
+    if protocol == 'ws':
+        return []
+    is_http = protocol in ['h1', 'http/1.1', 'h2', 'h3']
+    servers = spec.get('servers', [])
+    with_httpd = 'httpd' in servers if (servers or protocol == 'h3') else True
+    args = []
+    for key, scenario, applies in [('download-sizes', '--downloads', True),
+                                   ('upload-sizes', '--uploads', True),
+                                   ('request-parallels', '--requests', is_http),
+                                   ('decoding-sizes', '--decoding', is_http and with_httpd)]:
+        if key in spec and applies:
+            args.extend([scenario, f'--{key}={",".join(str(v) for v in spec[key])}'])
+    return args
+
+
+def mk_matrix_runs(spec: Dict[str, Any]) -> List[List[str]]:
+    # The scorecard arguments of each run of a matrix `spec`. A run scores
+    # all servers, sizes and request parallels of a protocol, with its
+    # servers started once. Proxies and download/upload parallels need
+    # runs of their own. A protocol none of the spec's scenarios apply to
+    # has no runs, websockets always run their own.
+    unknown = [key for key in spec if key not in MATRIX_KEYS]
+    if unknown:
+        raise ScoreCardError(f'unknown in matrix spec: {", ".join(unknown)}')
+    if not spec.get('protocols'):
+        raise ScoreCardError('matrix spec has no "protocols"')
+    for server in spec.get('servers', []):
+        if server not in ['httpd', 'caddy', 'h2o']:
+            raise ScoreCardError(f'unknown server in matrix spec: {server}')
+    has_scenarios = any(key in spec for key in MATRIX_SCENARIO_KEYS)
+    options = [str(arg) for arg in spec.get('options', [])]
+    runs = []
+    for protocol in spec['protocols']:
+        scenarios = mk_matrix_scenarios(spec, protocol)
+        if has_scenarios and not scenarios and protocol != 'ws':
+            continue
+        servers = []
+        proxies = [[]]
+        parallels = [[]]
+        if protocol in ['h1', 'http/1.1', 'h2', 'h3']:
+            servers = [f'--{server}' for server in spec.get('servers', [])]
+        if protocol in ['h1', 'http/1.1', 'h2'] and spec.get('proxies'):
+            proxies = [[f'--proxy={proxy}'] for proxy in spec['proxies']]
+        if protocol != 'ws' and spec.get('parallels'):
+            parallels = [[f'--download-parallel={n}', f'--upload-parallel={n}']
+                         for n in spec['parallels']]
+        runs.extend([options + scenarios + servers + proxy + parallel + [protocol]
+                     for proxy in proxies for parallel in parallels])
+    return runs
+
+
+def run_matrix(parser: argparse.ArgumentParser, argv: List[str], args):
+    # Score all runs of the matrix in `args.matrix`, each with the command
+    # line `argv` plus its own arguments. With a checkpoint from an
+    # earlier, interrupted matrix run, only what is missing is measured.
+    try:
+        with open(args.matrix) as fd:
+            spec = json.load(fd)
+        runs = mk_matrix_runs(spec)
+    except (OSError, ValueError, ScoreCardError) as ex:
+        sys.stderr.write(f'ERROR: matrix {args.matrix}: {ex}\n')
+        return 1
+    # the cells of a checkpoint are only valid for the same spec and
+    # the same arguments of all runs
+    setup = {
+        'spec': spec,
+        'args': {key: val for key, val in vars(args).items()
+                 if key not in MATRIX_OUTPUT_ARGS},
+    }
+    try:
+        checkpoint = ScoreCheckpoint(args.checkpoint or f'{args.matrix}.checkpoint',
+                                     setup=setup)
+    except ScoreCardError as ex:
+        sys.stderr.write(f'ERROR: {ex}\n')
+        return 1
+    if checkpoint.cell_count and args.verbose > 0:
+        sys.stderr.write(f'resuming matrix, {checkpoint.run_count} of {len(runs)} '
+                         f'runs and {checkpoint.cell_count} cells done\n')
+    export = None
+    if args.jsonl or args.csv or args.openmetrics:
+        export = ScoreExport(jsonl_file=args.jsonl, csv_file=args.csv,
+                             openmetrics_file=args.openmetrics)
+        # the exports of a resumed matrix have the cells from before, too
+        for record in checkpoint.records:
+            export.add_record(record)
+    rv = 0
+    try:
+        for idx, run in enumerate(runs):
+            if checkpoint.is_done(run):
+                continue
+            if args.verbose > 0:
+                sys.stderr.write(f'matrix run {idx + 1}/{len(runs)}: {" ".join(run)}\n')
+            run_args = parser.parse_args(argv + run)
+            rv = run_score(run_args, run_args.protocol,
+                           export=export, checkpoint=checkpoint)
+            if rv != 0:
+                sys.stderr.write(f'ERROR: matrix run failed: {" ".join(run)}, '
+                                 'run again to resume\n')
+                break
+            checkpoint.done(run)
+    finally:
+        checkpoint.close()
+        if export:
+            export.close()
     return rv
 
 
@@ -965,6 +3433,68 @@ def print_file(filename):
     return 0
 
 
+def compare_files(base_file, cur_file, threshold_pct: float, as_json: bool):
+    scores = []
+    for filename in [base_file, cur_file]:
+        if not os.path.exists(filename):
+            sys.stderr.write(f"ERROR: file does not exist {filename}\n")
+            return 1
+        with open(filename) as file:
+            scores.append(json.load(file))
+    threshold = threshold_pct / 100
+    diffs = ScoreDiff.compare(scores[0], scores[1], threshold)
+    if as_json:
+        print(json.JSONEncoder(indent=2).encode({
+            'threshold': threshold,
+            'diffs': diffs,
+        }))
+    else:
+        ScoreDiff.print_diffs(diffs, threshold)
+    return 1 if any(d['regression'] for d in diffs) else 0
+
+
+def flame_diff_files(base_file, cur_file, out_dir: Optional[str], top: int,
+                     as_json: bool):
+    scores = []
+    for filename in [base_file, cur_file]:
+        if not os.path.exists(filename):
+            sys.stderr.write(f"ERROR: file does not exist {filename}\n")
+            return 1
+        with open(filename) as file:
+            scores.append(json.load(file))
+    env = Env()
+    try:
+        flame = FlameGraph.from_env(env)
+    except EnvError as ex:
+        sys.stderr.write(f"no differential flame graphs: {ex}\n")
+        flame = None
+    out_dir = out_dir if out_dir else os.path.join(env.gen_dir, 'flame-diff')
+    diffs = ScoreDiff.flame_diff(scores[0], scores[1], out_dir=out_dir,
+                                 flame=flame, top=top)
+    if as_json:
+        print(json.JSONEncoder(indent=2).encode({'diffs': diffs}))
+    else:
+        ScoreDiff.print_flame_diffs(diffs)
+    return 0
+
+
+def print_history(db_path, scenario):
+    if not db_path or not os.path.exists(db_path):
+        sys.stderr.write(f"ERROR: history database does not exist: {db_path}\n")
+        return 1
+    history = ScoreHistory(db_path)
+    history.print_history(scenario)
+    history.close()
+    return 0
+
+
+def positive_float(val: str) -> float:
+    num = float(val)
+    if num <= 0:
+        raise argparse.ArgumentTypeError(f'must be larger than 0: {val}')
+    return num
+
+
 def main():
     parser = argparse.ArgumentParser(prog='scorecard', description="""
         Run a range of tests to give a scorecard for an HTTP protocol
@@ -976,6 +3506,17 @@ def main():
                         default=False, help="print json instead of text")
     parser.add_argument("--samples", action='store', type=int, metavar='number',
                         default=1, help="how many sample runs to make")
+    parser.add_argument("--warmup", action='store', type=int, metavar='number',
+                        default=0, help="discarded runs before sampling each case")
+    parser.add_argument("--target-cv", action='store', type=float, metavar='percent',
+                        default=None,
+                        help="sample until the coefficient of variation is this low")
+    parser.add_argument("--target-ci", action='store', type=float, metavar='percent',
+                        default=None,
+                        help="sample until the 95%% confidence interval of the mean "
+                             "is within +/- this")
+    parser.add_argument("--max-samples", action='store', type=int, metavar='number',
+                        default=30, help="max samples for --target-cv/--target-ci")
     parser.add_argument("--httpd", action='store_true', default=False,
                         help="evaluate httpd server only")
     parser.add_argument("--h2o", action='store_true', default=False,
@@ -984,23 +3525,90 @@ def main():
                         help="evaluate caddy server only")
     parser.add_argument("--curl-verbose", action='store_true',
                         default=False, help="run curl with `-v`")
+    parser.add_argument("--jsonl", type=str, default=None, metavar='filename',
+                        help="write each cell as a line of JSON as soon as it completes")
+    parser.add_argument("--csv", type=str, default=None, metavar='filename',
+                        help="write each cell as a CSV record as soon as it completes")
+    parser.add_argument("--openmetrics", type=str, default=None, metavar='filename',
+                        help="keep the cells so far as OpenMetrics text in this file")
     parser.add_argument("--print", type=str, default=None, metavar='filename',
                         help="print the results from a JSON file")
+    parser.add_argument("--compare", type=str, nargs=2, default=None,
+                        metavar=('baseline', 'current'),
+                        help="compare the results of two JSON files, fail on regressions")
+    parser.add_argument("--history-db", type=str, default=None, metavar='filename',
+                        help="add results to this SQLite database")
+    parser.add_argument("--history", type=str, default=None, metavar='scenario',
+                        help="show results of 'section/row/column' over time from "
+                             "--history-db, '*' matches anything")
+    parser.add_argument("--compare-threshold", action='store', type=float,
+                        metavar='percent', default=5.0,
+                        help="regressions smaller than this are tolerated (default 5)")
+    parser.add_argument("--matrix", type=str, default=None, metavar='filename',
+                        help="score all runs of this JSON matrix spec")
+    parser.add_argument("--checkpoint", type=str, default=None, metavar='filename',
+                        help="keep the progress of --matrix here, to resume from "
+                             "(default: the spec filename plus '.checkpoint')")
     parser.add_argument("protocol", default=None, nargs='?',
-                        help="Name of protocol to score")
+                        help="Name of protocol to score: h1, h2, h3, "
+                             "ftp, ftpes, ftps, sftp, scp or ws")
     parser.add_argument("--start-only", action='store_true', default=False,
                         help="only start the servers")
     parser.add_argument("--remote", action='store', type=str,
                         default=None, help="score against the remote server at <ip>:<port>")
     parser.add_argument("--flame", action='store_true',
                         default=False, help="produce a flame graph on curl")
+    parser.add_argument("--flame-dir", type=str, default=None, metavar='dir',
+                        help="keep the collapsed stacks and flame graph of each "
+                             "scenario in this directory, implies --flame. With "
+                             "--flame-diff, where to write the differential graphs")
+    parser.add_argument("--flame-diff", type=str, nargs=2, default=None,
+                        metavar=('baseline', 'current'),
+                        help="compare the stacks of two JSON results made with --flame-dir")
+    parser.add_argument("--flame-top", action='store', type=int, metavar='number',
+                        default=10, help="functions listed per scenario with --flame-diff")
+    parser.add_argument("--curl-a", type=str, default=None, metavar='path',
+                        help="curl binary A for --curl-b, default is the curl built")
+    parser.add_argument("--curl-b", type=str, default=None, metavar='path',
+                        help="alternate runs with this curl binary and report "
+                             "its paired change against curl A")
+    parser.add_argument("--cpus-curl", type=str, default=None, metavar='cpus',
+                        help="run curl on these cpus only, a list like '2-3,6'")
+    parser.add_argument("--cpus-servers", type=str, default=None, metavar='cpus',
+                        help="run the local servers on these cpus only")
+    parser.add_argument("--cpus-harness", type=str, default=None, metavar='cpus',
+                        help="run scorecard itself on these cpus only")
+    parser.add_argument("--nice", action='store', type=int, default=None, metavar='number',
+                        help="run curl and the servers with this negative nice value")
+    parser.add_argument("--perf-stat", action='store_true', default=False,
+                        help="count cycles, instructions, cache and branch misses "
+                             "of curl with perf stat")
+    parser.add_argument("--memdebug", action='store_true', default=False,
+                        help="count the allocations of a curl debug build, "
+                             "per transfer and per byte or request")
+    parser.add_argument("--timeseries", action='store_true', default=False,
+                        help="record throughput over time for single downloads")
     parser.add_argument("--limit-rate", action='store', type=str,
                         default=None, help="use curl's --limit-rate")
     parser.add_argument("--http-plain", action='store_true',
                         default=False, help="run http: test instead of https:")
+    parser.add_argument("--clients", action='store', type=int, metavar='number',
+                        default=1, help="run that many curl processes concurrently per sample")
+    parser.add_argument("--profile-interval", action='store', type=positive_float, metavar='ms',
+                        default=None, help="sample the curl processes every that many "
+                                           f"milliseconds (default {RunProfile.DEFAULT_INTERVAL * 1000:.0f})")
 
     parser.add_argument("-H", "--handshakes", action='store_true',
                         default=False, help="evaluate handshakes only")
+    parser.add_argument("--tls-handshakes", action='store_true', default=False,
+                        help="evaluate TLS handshakes with the local server")
+    parser.add_argument("--tls-key-types", action='append', type=str,
+                        metavar='list', default=None,
+                        help="certificate key types for TLS handshakes, "
+                             "rsa2048,rsa4096,ec256,ed25519 by default")
+    parser.add_argument("--tls-handshake-count", action='store', type=int,
+                        metavar='number', default=50,
+                        help="perform that many handshakes per sample")
 
     parser.add_argument("-d", "--downloads", action='store_true',
                         default=False, help="evaluate downloads")
@@ -1013,7 +3621,33 @@ def main():
     parser.add_argument("--download-parallel", action='store', type=int,
                         metavar='number', default=0,
                         help="perform that many downloads in parallel (default all)")
-
+    parser.add_argument("--synth", action='store_true', default=False,
+                        help="download content generated by httpd instead of files")
+    parser.add_argument("--decoding", action='store_true', default=False,
+                        help="evaluate downloads of gzip, brotli and zstd encoded content")
+    parser.add_argument("--decoding-sizes", action='append', type=str,
+                        metavar='list', default=None,
+                        help="decoded sizes of encoded downloads, 1mb,10mb,100mb by default")
+
+    parser.add_argument("--mux", action='store_true', default=False,
+                        help="evaluate multiplexed downloads with cli_hx_download")
+    parser.add_argument("--mux-size", action='store', type=str, metavar='size',
+                        default='100kb', help="size of multiplexed downloads")
+    parser.add_argument("--mux-streams", action='append', type=str,
+                        metavar='list', default=None,
+                        help="concurrent streams, 1,10,100,1000 by default")
+    parser.add_argument("--mux-conns", action='append', type=str,
+                        metavar='list', default=None,
+                        help="connections to spread the streams on, 1,4 by default")
+    parser.add_argument("--ws-sizes", action='append', type=str,
+                        metavar='list', default=None,
+                        help="websocket message sizes to echo, 16,1kb,64kb,1mb,16mb by default")
+    parser.add_argument("--ws-count", action='store', type=int,
+                        metavar='number', default=None,
+                        help="websocket messages per sample, about 32MB of them by default")
+    parser.add_argument("--ws-pings", action='store', type=int,
+                        metavar='number', default=1000,
+                        help="websocket pings per sample, 0 to skip them")
     parser.add_argument("-u", "--uploads", action='store_true',
                         default=False, help="evaluate uploads")
     parser.add_argument("--upload-sizes", action='append', type=str,
@@ -1040,6 +3674,15 @@ def main():
                         default=False, help="test with SOCKS4 proxy")
     parser.add_argument("--socks5", action='store_true',
                         default=False, help="test with SOCKS5 proxy")
+    parser.add_argument("--proxy", action='store', type=str, default=None,
+                        choices=['http', 'https', 'h2', 'h3'],
+                        help="test also via a proxy of this kind, "
+                             "reporting the overhead against direct transfers")
+    parser.add_argument("--proxytunnel", action='store_true', default=False,
+                        help="tunnel through the --proxy via CONNECT")
+    parser.add_argument("--net-profile", action='store', type=str, default=None,
+                        choices=NetRelay.profile_names(),
+                        help="transfer through a relay emulating this network")
     args = parser.parse_args()
 
     if args.verbose > 0:
@@ -1050,6 +3693,22 @@ def main():
 
     if args.print:
         rv = print_file(args.print)
+    elif args.history:
+        rv = print_history(args.history_db, args.history)
+    elif args.compare:
+        rv = compare_files(args.compare[0], args.compare[1],
+                           threshold_pct=args.compare_threshold,
+                           as_json=args.json)
+    elif args.flame_diff:
+        rv = flame_diff_files(args.flame_diff[0], args.flame_diff[1],
+                              out_dir=args.flame_dir, top=args.flame_top,
+                              as_json=args.json)
+    elif args.matrix:
+        if args.protocol:
+            sys.stderr.write('ERROR: --matrix takes the protocols from its spec\n')
+            rv = 1
+        else:
+            rv = run_matrix(parser, sys.argv[1:], args)
     elif not args.protocol:
         parser.print_usage()
         rv = 1
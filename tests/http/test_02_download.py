@@ -30,7 +30,7 @@ import re
 import sys
 
 import pytest
-from testenv import CurlClient, Env, LocalClient
+from testenv import CurlClient, Env, LocalClient, SynthContent
 
 log = logging.getLogger(__name__)
 
@@ -722,3 +722,21 @@ class TestDownload:
                                                f'got {r.exit_code}\n{r.dump_logs()}'
                 if r.exit_code == 0:
                     r.check_response(http_status=431)
+
+    # download synthetic content, complete and in ranges
+    @pytest.mark.parametrize("proto", Env.http_protos())
+    @pytest.mark.parametrize("size", [0, 27, 28, 1024 * 1024 + 3])
+    def test_02_37_synth(self, env: Env, httpd, nghttpx, proto, size):
+        synth = SynthContent(size=size, seed=4711)
+        curl = CurlClient(env=env)
+        url = f'https://{env.authority_for(env.domain1, proto)}{synth.path}'
+        r = curl.http_download(urls=[url], alpn_proto=proto)
+        r.check_response(count=1, http_status=200)
+        synth.check_file(curl.download_file(0))
+        if size == 0:
+            return
+        for start, end in [(0, 0), (size // 2, size - 1), (size - 1, size + 99)]:
+            r = curl.http_download(urls=[url], alpn_proto=proto,
+                                   extra_args=['-r', f'{start}-{end}'])
+            r.check_response(count=1, http_status=206)
+            synth.check_file(curl.download_file(0), offset=start)
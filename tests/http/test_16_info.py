@@ -26,7 +26,7 @@ import logging
 import os
 
 import pytest
-from testenv import CurlClient, Env
+from testenv import CurlClient, Env, MemDebugLog
 
 log = logging.getLogger(__name__)
 
@@ -118,3 +118,29 @@ class TestInfo:
     def check_stat_positive(self, s, idx, key):
         assert key in s, f'stat #{idx} "{key}" missing: {s}'
         assert s[key] > 0, f'stat #{idx} "{key}" not positive: {s}'
+
+
+class TestMemDebugLog:
+
+    # parse a memdebug log as scorecard does, a realloc of a NULL
+    # pointer is logged as "(nil)" by glibc
+    def test_16_05_memdebug_parse(self, env: Env):
+        run_dir = os.path.join(env.gen_dir, 'memdebug-parse')
+        os.makedirs(run_dir, exist_ok=True)
+        log = MemDebugLog(run_dir)
+        with open(log.file, 'w') as fd:
+            fd.write('MEM dynbuf.c:105 realloc((nil), 32) = 0x5600a0\n')
+            fd.write('MEM escape.c:52 strdup(0x5600f0) (5) = 0x5600b0\n')
+            fd.write('MEM url.c:400 calloc(2,8) = 0x5600c0\n')
+            fd.write('MEM dynbuf.c:105 realloc(0x5600a0, 64) = 0x5600d0\n')
+            fd.write('MEM url.c:410 malloc(100) = (nil)\n')
+            fd.write('MEM url.c:420 free(0x5600b0)\n')
+            fd.write('MEM url.c:430 free(0x5600c0)\n')
+        log.parse()
+        assert log.stats == {
+            'allocs': 4,
+            'frees': 2,
+            'alloc-bytes': 32 + 5 + 16 + 64,
+            'peak-heap': 5 + 16 + 64,
+            'leaked-bytes': 64,
+        }, f'{log.stats}'
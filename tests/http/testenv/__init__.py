@@ -28,16 +28,19 @@ pytest.register_assert_rewrite("testenv.env", "testenv.curl", "testenv.caddy",
                                "testenv.httpd", "testenv.nghttpx")
 
 # This import must be first to avoid circular imports
-from .curl import CurlClient, ExecResult, RunProfile  # noqa: I001
+from .curl import CpuPlacement, CurlClient, ExecResult, FlameGraph, MemDebugLog, PerfStat, RunProfile, RunThroughput, ServerProfile  # noqa: I001
 
 from .caddy import Caddy
-from .certs import Credentials, TestCA
+from .certs import CertificateSpec, Credentials, TestCA
 from .client import LocalClient
 from .dante import Dante
 from .dnsd import Dnsd
-from .env import Env
+from .env import Env, EnvError
 from .h2o import H2oServer, H2oProxy
 from .httpd import Httpd
+from .net_relay import NetProfile, NetRelay
 from .nghttpx import Nghttpx, NghttpxFwd, NghttpxQuic
 from .sshd import Sshd
+from .synth import SynthContent
 from .vsftpd import VsFTPD
+from .ws import WsServer
@@ -29,7 +29,7 @@ import subprocess
 import time
 from datetime import datetime, timedelta, timezone
 from json import JSONEncoder
-from typing import ClassVar, Dict
+from typing import ClassVar, Dict, Optional
 
 from .curl import CurlClient
 from .env import Env
@@ -57,6 +57,8 @@ class Caddy:
         self._process = None
         self._http_port = 0
         self._https_port = 0
+        self._cred_name = env.domain1
+        self._loaded_cred_name = None
         self._rmf(self._error_log)
 
     @property
@@ -67,6 +69,14 @@ class Caddy:
     def port(self) -> int:
         return self._https_port
 
+    def set_cred_name(self, name: str):
+        self._cred_name = name
+
+    def reload_if_config_changed(self):
+        if self.is_running() and self._loaded_cred_name == self._cred_name:
+            return True
+        return self.restart()
+
     def close_log(self):
         if self._error_fd:
             self._error_fd.close()
@@ -75,6 +85,10 @@ class Caddy:
     def clear_logs(self):
         self._rmf(self._error_log)
 
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process else None
+
     def is_running(self):
         if self._process:
             self._process.poll()
@@ -170,8 +184,9 @@ class Caddy:
 
     def _write_config(self):
         domain1 = self.env.domain1
-        creds1 = self.env.get_credentials(domain1)
+        creds1 = self.env.get_credentials(self._cred_name)
         assert creds1  # convince pytype this is not None
+        self._loaded_cred_name = self._cred_name
         domain2 = self.env.domain2
         creds2 = self.env.get_credentials(domain2)
         assert creds2  # convince pytype this is not None
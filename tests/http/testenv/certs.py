@@ -35,8 +35,9 @@ from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives._serialization import PublicFormat
-from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
 from cryptography.hazmat.primitives.asymmetric.ec import EllipticCurvePrivateKey
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
 from cryptography.hazmat.primitives.serialization import (
     Encoding,
@@ -47,7 +48,7 @@ from cryptography.hazmat.primitives.serialization import (
 from cryptography.x509 import ExtendedKeyUsageOID, NameOID
 
 EC_SUPPORTED = {}
-EC_SUPPORTED.update([(curve.name.upper(), curve) for curve in [
+EC_SUPPORTED.update([(curve.name.upper(), curve()) for curve in [
     ec.SECP192R1,
     ec.SECP224R1,
     ec.SECP256R1,
@@ -66,6 +67,8 @@ def _private_key(key_type):
         if m:
             key_type = int(m.group(2))
 
+    if key_type == 'ED25519':
+        return ed25519.Ed25519PrivateKey.generate()
     if isinstance(key_type, int):
         return rsa.generate_private_key(
             public_exponent=65537,
@@ -152,6 +155,8 @@ class Credentials:
             return f"rsa{self._pkey.key_size}"
         if isinstance(self._pkey, EllipticCurvePrivateKey):
             return f"{self._pkey.curve.name}"
+        if isinstance(self._pkey, Ed25519PrivateKey):
+            return "ed25519"
         raise CertError(f"unknown key type: {self._pkey}")
 
     @property
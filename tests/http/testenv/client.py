@@ -29,7 +29,7 @@ import subprocess
 from datetime import datetime, timezone
 from typing import Dict, Optional
 
-from . import ExecResult
+from . import CpuPlacement, ExecResult, RunProfile
 from .env import Env
 
 log = logging.getLogger(__name__)
@@ -39,12 +39,16 @@ class LocalClient:
 
     def __init__(self, name: str, env: Env, run_dir: Optional[str] = None,
                  timeout: Optional[float] = None,
-                 run_env: Optional[Dict[str, str]] = None):
+                 run_env: Optional[Dict[str, str]] = None,
+                 profile_interval: Optional[float] = None,
+                 placement: Optional[CpuPlacement] = None):
         self.name = name
         self.path = os.path.join(env.build_dir, 'tests/libtest/libtests')
         self.env = env
         self._run_env = run_env
         self._timeout = timeout if timeout else env.test_timeout
+        self._profile_interval = profile_interval
+        self._placement = placement if placement else CpuPlacement()
         self._curl = os.environ.get('CURL', env.curl)
         self._run_dir = run_dir if run_dir else os.path.join(env.gen_dir, name)
         self._stdoutfile = f'{self._run_dir}/stdout'
@@ -78,11 +82,12 @@ class LocalClient:
         if not os.path.exists(path):
             os.makedirs(path)
 
-    def run(self, args):
+    def run(self, args, with_profile: bool = False):
         self._rmf(self._stdoutfile)
         self._rmf(self._stderrfile)
         start = datetime.now(timezone.utc)
         exception = None
+        profile = None
         myargs = [self.path, self.name]
         myargs.extend(args)
         run_env = None
@@ -93,10 +98,26 @@ class LocalClient:
                     run_env[key] = os.environ[key]
         try:
             with open(self._stdoutfile, 'w') as cout, open(self._stderrfile, 'w') as cerr:
-                p = subprocess.run(myargs, stderr=cerr, stdout=cout,
-                                   cwd=self._run_dir, shell=False,
-                                   input=None, env=run_env,
-                                   timeout=self._timeout, check=False)
+                if with_profile:
+                    with self._placement.spawning():
+                        p = subprocess.Popen(myargs, stderr=cerr, stdout=cout,
+                                             cwd=self._run_dir, shell=False,
+                                             env=run_env)
+                    profile = RunProfile(p.pid, start, self._run_dir,
+                                         interval=self._profile_interval)
+                    profile.start()
+                    if not profile.wait(p, timeout=self._timeout):
+                        p.kill()
+                        profile.wait(p)
+                        profile.finish()
+                        raise subprocess.TimeoutExpired(cmd=myargs, timeout=self._timeout)
+                    profile.finish()
+                else:
+                    with self._placement.spawning():
+                        p = subprocess.run(myargs, stderr=cerr, stdout=cout,
+                                           cwd=self._run_dir, shell=False,
+                                           input=None, env=run_env,
+                                           timeout=self._timeout, check=False)
                 exitcode = p.returncode
         except subprocess.TimeoutExpired:
             log.warning(f'Timeout after {self._timeout}s: {args}')
@@ -107,7 +128,8 @@ class LocalClient:
             cerrput = ferr.readlines()
         return ExecResult(args=myargs, exit_code=exitcode, exception=exception,
                           stdout=coutput, stderr=cerrput,
-                          duration=datetime.now(timezone.utc) - start)
+                          duration=datetime.now(timezone.utc) - start,
+                          profile=profile)
 
     def dump_logs(self):
         lines = []
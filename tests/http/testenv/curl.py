@@ -27,14 +27,16 @@ import json
 import logging
 import os
 import re
+import select
 import shutil
+import signal
 import subprocess
 import sys
 import time
 from datetime import datetime, timedelta, timezone
 from functools import cmp_to_key
 from statistics import fmean, mean
-from threading import Thread
+from threading import Event, Thread
 from typing import Any, ClassVar, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
@@ -46,28 +48,56 @@ log = logging.getLogger(__name__)
 
 
 class RunProfile:
+    """
+    Resources used by a process while it runs.
 
+    A thread samples the process every `interval` seconds, reading /proc
+    where there is one and using psutil otherwise. The process is waited
+    for via a pidfd where the platform has them, so the thread starting
+    the process does not poll. The CPU time the sampling itself takes is
+    recorded as `sampler-cpu`.
+    """
+
+    DEFAULT_INTERVAL = 0.01
     STAT_KEYS: ClassVar[List[str]] = ['cpu', 'rss', 'vsz']
+    # what the process used in total, user and system CPU seconds,
+    # voluntary and involuntary context switches and, on Linux, the
+    # read and write syscalls as of the last sample.
+    USAGE_KEYS: ClassVar[List[str]] = [
+        'utime', 'stime', 'cpu-time', 'nvcsw', 'nivcsw', 'syscr', 'syscw'
+    ]
+    SAMPLER_KEYS: ClassVar[List[str]] = ['samples', 'sampler-cpu']
 
     @classmethod
     def AverageStats(cls, profiles: List['RunProfile']):
         avg = {}
-        stats = [p.stats for p in profiles]
-        for key in cls.STAT_KEYS:
-            vals = [s[key] for s in stats]
-            avg[key] = mean(vals) if len(vals) else 0.0
-        vals = [s['rss-max'] for s in [p.stats for p in profiles]]
-        avg['rss-max'] = mean(vals) if len(vals) else 0
+        stats = [p.stats for p in profiles if p.stats]
+        for key in cls.STAT_KEYS + ['rss-max'] + cls.USAGE_KEYS + \
+                cls.SAMPLER_KEYS + PerfStat.EVENTS:
+            vals = [s[key] for s in stats if key in s]
+            if len(vals):
+                avg[key] = mean(vals)
         return avg
 
-    def __init__(self, pid: int, started_at: datetime, run_dir):
+    def __init__(self, pid: int, started_at: datetime, run_dir,
+                 interval: Optional[float] = None):
         self._pid = pid
         self._started_at = started_at
         self._duration = timedelta(seconds=0)
         self._run_dir = run_dir
+        self._interval = interval if interval else RunProfile.DEFAULT_INTERVAL
         self._samples = []
         self._psu = None
         self._stats = None
+        self._usage = {}
+        self._proc_dir = f'/proc/{pid}'
+        if not os.path.isdir(self._proc_dir):
+            self._proc_dir = None
+        self._last_cpu = None
+        self._counters = {}
+        self._sampler = None
+        self._sampler_cpu = 0.0
+        self._stop = Event()
 
     @property
     def duration(self) -> timedelta:
@@ -77,11 +107,62 @@ class RunProfile:
     def stats(self) -> Optional[Dict[str, Any]]:
         return self._stats
 
-    def sample(self):
-        elapsed = datetime.now(timezone.utc) - self._started_at
-        try:
-            if self._psu is None:
-                self._psu = psutil.Process(pid=self._pid)
+    def start(self):
+        self._sampler = Thread(target=self._run_sampler, daemon=True)
+        self._sampler.start()
+
+    def _run_sampler(self):
+        while True:
+            self.sample()
+            if self._stop.wait(self._interval):
+                break
+        self._sampler_cpu = time.thread_time()
+
+    def _stop_sampler(self):
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+            self._sampler = None
+
+    def _read_proc(self, name: str) -> str:
+        with open(os.path.join(self._proc_dir, name)) as fd:
+            return fd.read()
+
+    def _sample_proc(self, elapsed: timedelta):
+        # the fields after the command name, which may contain blanks
+        stat = self._read_proc('stat')
+        fields = stat[stat.rindex(')') + 2:].split()
+        ticks = os.sysconf('SC_CLK_TCK')
+        utime = int(fields[11]) / ticks
+        stime = int(fields[12]) / ticks
+        now = time.monotonic()
+        cpu = 0.0
+        if self._last_cpu:
+            last_at, last_time = self._last_cpu
+            if now > last_at:
+                cpu = 100 * (utime + stime - last_time) / (now - last_at)
+        self._last_cpu = (now, utime + stime)
+        self._samples.append({
+            'time': elapsed,
+            'cpu': cpu,
+            'vsz': int(fields[20]),
+            'rss': int(fields[21]) * os.sysconf('SC_PAGE_SIZE'),
+        })
+        if 'exited' not in self._usage:
+            self._usage.update({
+                'utime': utime,
+                'stime': stime,
+            })
+        with contextlib.suppress(OSError):
+            for line in self._read_proc('io').splitlines():
+                key, val = line.split(':')
+                if key in ['syscr', 'syscw']:
+                    self._usage[key] = int(val)
+
+    def _sample_psutil(self, elapsed: timedelta):
+        if self._psu is None:
+            self._psu = psutil.Process(pid=self._pid)
+        with self._psu.oneshot():
             mem = self._psu.memory_info()
             self._samples.append({
                 'time': elapsed,
@@ -89,28 +170,335 @@ class RunProfile:
                 'vsz': mem.vms,
                 'rss': mem.rss,
             })
-        except psutil.NoSuchProcess:
+            if 'exited' not in self._usage:
+                # the last values seen, unless wait() gets them all
+                cpu = self._psu.cpu_times()
+                ctx = self._psu.num_ctx_switches()
+                self._usage.update({
+                    'utime': cpu.user,
+                    'stime': cpu.system,
+                    'nvcsw': ctx.voluntary,
+                    'nivcsw': ctx.involuntary,
+                })
+
+    def sample(self):
+        elapsed = datetime.now(timezone.utc) - self._started_at
+        try:
+            if self._proc_dir:
+                self._sample_proc(elapsed)
+            else:
+                self._sample_psutil(elapsed)
+        except (OSError, ValueError, IndexError,
+                psutil.NoSuchProcess, psutil.AccessDenied):
             # process may exit between sampling ticks: ignore this
             pass
 
+    def _wait_exit(self, proc: subprocess.Popen, timeout: Optional[float]) -> bool:
+        # wait for the process to exit, without reaping it
+        if hasattr(os, 'pidfd_open'):
+            try:
+                pidfd = os.pidfd_open(self._pid)
+            except OSError:
+                pidfd = None
+            if pidfd is not None:
+                try:
+                    poller = select.poll()
+                    poller.register(pidfd, select.POLLIN)
+                    return len(poller.poll(None if timeout is None else
+                                           timeout * 1000)) > 0
+                finally:
+                    os.close(pidfd)
+        # no pidfd, poll with a growing delay like Popen.wait()
+        end_at = None if timeout is None else time.monotonic() + timeout
+        delay = 0.0005
+        while True:
+            if hasattr(os, 'waitid'):
+                res = os.waitid(os.P_PID, self._pid,
+                                os.WEXITED | os.WNOHANG | os.WNOWAIT)
+                if res is not None:
+                    return True
+            elif proc.poll() is not None:
+                return True
+            if end_at is not None:
+                remaining = end_at - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def wait(self, proc: subprocess.Popen, timeout: Optional[float] = None) -> bool:
+        """
+        Wait up to `timeout` seconds for the process to exit.
+
+        Where the platform has `wait4()`, reap the process ourself to
+        get the resources it used until the very end.
+        """
+        if not self._wait_exit(proc, timeout):
+            return False
+        self._stop_sampler()
+        if proc.returncode is not None or not hasattr(os, 'wait4'):
+            proc.wait()
+            return True
+        _, status, rusage = os.wait4(self._pid, 0)
+        proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) \
+            else os.WEXITSTATUS(status)
+        self._usage.update({
+            'exited': True,
+            'utime': rusage.ru_utime,
+            'stime': rusage.ru_stime,
+            'nvcsw': rusage.ru_nvcsw,
+            'nivcsw': rusage.ru_nivcsw,
+        })
+        return True
+
     def finish(self):
+        self._stop_sampler()
         self._duration = datetime.now(timezone.utc) - self._started_at
+        self._stats = {}
         if len(self._samples) > 0:
             weights = [s['time'].total_seconds() for s in self._samples]
-            self._stats = {}
             for key in self.STAT_KEYS:
                 self._stats[key] = fmean([s[key] for s in self._samples], weights)
             self._stats['rss-max'] = max([s['rss'] for s in self._samples])
-        else:
-            self._stats = None
+        if 'utime' in self._usage:
+            self._usage['cpu-time'] = self._usage['utime'] + self._usage['stime']
+        self._stats.update({key: self._usage[key] for key in self.USAGE_KEYS
+                            if key in self._usage})
+        self._stats['samples'] = len(self._samples)
+        self._stats['sampler-cpu'] = self._sampler_cpu
+        self._stats.update(self._counters)
         self._psu = None
 
+    def add_counters(self, counters: Dict[str, int]):
+        # hardware counters from a `PerfStat`, before or after finish()
+        self._counters.update(counters)
+        if self._stats is not None:
+            self._stats.update(counters)
+
     def __repr__(self):
         return f'RunProfile[pid={self._pid}, '\
                f'duration={self.duration.total_seconds():.3f}s, '\
                f'stats={self.stats}]'
 
 
+class ServerProfile:
+    """
+    CPU and memory of server processes while a scenario runs.
+
+    Each process is sampled with all its children, so forked workers
+    and the threads of a server count as well. A server may use the
+    CPUs it is placed on, given as `cpus`, or else those of its affinity.
+    """
+
+    DEFAULT_INTERVAL = 0.05
+    # a thread is busy when it used at least that much of one core
+    BUSY_CPU = 90.0
+
+    def __init__(self, pids: Dict[str, int], interval: Optional[float] = None,
+                 cpus: Optional[int] = None):
+        self._pids = pids
+        self._interval = interval if interval else ServerProfile.DEFAULT_INTERVAL
+        self._cpus = cpus
+        self._ncpus = {}
+        self._procs = {}
+        self._threads = {}
+        self._started_at = None
+        self._sampler = None
+        self._sampler_cpu = 0.0
+        self._stop = Event()
+        self._rss_max = {}
+        self._stats = None
+
+    @property
+    def stats(self) -> Optional[Dict[str, Any]]:
+        # the stats of each server by its name
+        return self._stats
+
+    @property
+    def sampler_cpu(self) -> float:
+        return self._sampler_cpu
+
+    def _count_cpus(self, name: str, pid: int):
+        if name in self._ncpus:
+            return
+        ncpus = None
+        if hasattr(os, 'sched_getaffinity'):
+            with contextlib.suppress(OSError):
+                ncpus = len(os.sched_getaffinity(pid))
+        self._ncpus[name] = ncpus if ncpus else (os.cpu_count() or 1)
+
+    @staticmethod
+    def _update(times: Dict[Any, List[float]], key, cpu_time: float, first: bool):
+        if key not in times:
+            times[key] = [cpu_time if first else 0.0, cpu_time]
+        else:
+            times[key][1] = cpu_time
+
+    def _sample(self):
+        # remember the CPU time each process and thread of a server had
+        # at first and last sight, those started later count from zero
+        first = self._started_at is None
+        for name, pid in self._pids.items():
+            rss = 0
+            try:
+                root = psutil.Process(pid)
+                tree = [root] + root.children(recursive=True)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            if self._cpus is None:
+                self._count_cpus(name, pid)
+            for p in tree:
+                try:
+                    with p.oneshot():
+                        cpu = p.cpu_times()
+                        rss += p.memory_info().rss
+                        try:
+                            threads = [(t.id, t.user_time + t.system_time)
+                                       for t in p.threads()]
+                        except psutil.AccessDenied:
+                            threads = None
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+                cpu_time = cpu.user + cpu.system
+                self._update(self._procs, (name, p.pid), cpu_time, first)
+                # without its threads, a process counts as one
+                for tid, thread_time in (threads or [(p.pid, cpu_time)]):
+                    self._update(self._threads, (name, p.pid, tid), thread_time, first)
+            self._rss_max[name] = max(self._rss_max.get(name, 0), rss)
+
+    def _run_sampler(self):
+        while not self._stop.wait(self._interval):
+            self._sample()
+        self._sample()
+        self._sampler_cpu = time.thread_time()
+
+    def start(self):
+        self._sample()
+        self._started_at = time.monotonic()
+        self._sampler = Thread(target=self._run_sampler, daemon=True)
+        self._sampler.start()
+
+    def finish(self):
+        self._stop.set()
+        self._sampler.join()
+        duration = time.monotonic() - self._started_at
+        self._stats = {}
+        for name in self._pids:
+            used = [last - first for (pname, _), (first, last) in self._procs.items()
+                    if pname == name]
+            thread_used = [last - first for (pname, _, _), (first, last)
+                           in self._threads.items() if pname == name]
+            if not len(used) or duration <= 0:
+                continue
+            self._stats[name] = {
+                'cpu': 100 * sum(used) / duration,
+                'cpu-max': 100 * max(used) / duration,
+                'thread-max': 100 * max(thread_used) / duration,
+                'cpus': self._cpus or self._ncpus.get(name) or os.cpu_count() or 1,
+                'cpu-time': sum(used),
+                'procs': len(used),
+                'rss-max': self._rss_max.get(name, 0),
+            }
+
+    @classmethod
+    def is_busy(cls, stats: Dict[str, Any]) -> bool:
+        """
+        Tell if a server was at its limit.
+
+        Either a single thread used a core or all of them used all the
+        CPUs the server may run on.
+        """
+        return stats['thread-max'] >= cls.BUSY_CPU or \
+            stats['cpu'] >= cls.BUSY_CPU * stats['cpus']
+
+
+class CpuPlacement:
+    """
+    The CPUs processes may run on and the nice value they run with.
+
+    On linux, affinity and nice value belong to a thread and a process
+    inherits them from the thread that starts it. Placing a running
+    process therefore means placing each of its threads.
+    """
+
+    def __init__(self, cpus: Optional[List[int]] = None, nice: Optional[int] = None):
+        self._cpus = cpus
+        self._nice = nice
+
+    @property
+    def cpus(self) -> Optional[List[int]]:
+        return self._cpus
+
+    @property
+    def nice(self) -> Optional[int]:
+        return self._nice
+
+    @staticmethod
+    def parse_cpus(spec: str) -> List[int]:
+        # a list like `taskset -c` takes, e.g. '0-3,6'
+        cpus = set()
+        for part in spec.split(','):
+            m = re.match(r'^\s*(\d+)(?:-(\d+))?\s*$', part)
+            if not m:
+                raise EnvError(f'not a cpu list: {spec}')
+            first = int(m.group(1))
+            last = int(m.group(2)) if m.group(2) else first
+            if last < first:
+                raise EnvError(f'not a cpu list: {spec}')
+            cpus.update(range(first, last + 1))
+        return sorted(cpus)
+
+    def _place_thread(self, tid: int):
+        if self._cpus:
+            os.sched_setaffinity(tid, self._cpus)
+        if self._nice is not None:
+            os.setpriority(os.PRIO_PROCESS, tid, self._nice)
+
+    @contextlib.contextmanager
+    def spawning(self):
+        # Place the calling thread, so that the processes it starts are,
+        # from their first instruction on. Going back to a lower nice
+        # value needs privileges, use this only to raise the priority.
+        if not self._cpus and self._nice is None:
+            yield
+            return
+        cpus = os.sched_getaffinity(0)
+        nice = os.getpriority(os.PRIO_PROCESS, 0)
+        try:
+            self._place_thread(0)
+            yield
+        finally:
+            if self._cpus:
+                os.sched_setaffinity(0, cpus)
+            if self._nice is not None:
+                os.setpriority(os.PRIO_PROCESS, 0, nice)
+
+    def place(self, pid: int, with_children: bool = True):
+        # place all threads of the process `pid` and its children
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + (root.children(recursive=True) if with_children else [])
+        except psutil.NoSuchProcess:
+            return
+        for proc in procs:
+            try:
+                threads = [t.id for t in proc.threads()]
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                threads = [proc.pid]
+            for tid in threads:
+                with contextlib.suppress(ProcessLookupError):
+                    self._place_thread(tid)
+
+    def to_json(self) -> Dict[str, Any]:
+        props = {}
+        if self._cpus:
+            props['cpus'] = self._cpus
+        if self._nice is not None:
+            props['nice'] = self._nice
+        return props
+
+
 class PerfProfile:
 
     def __init__(self, pid: int, run_dir):
@@ -143,6 +531,78 @@ class PerfProfile:
         return self._file
 
 
+class PerfStat:
+    """
+    Hardware counters of a process via `perf stat`.
+
+    Like `PerfProfile`, this attaches to the running process and misses
+    the first milliseconds of it. `sudo` is only used when the kernel
+    does not let users count their own processes.
+    """
+
+    EVENTS: ClassVar[List[str]] = [
+        'cycles', 'instructions', 'cache-misses', 'branch-misses', 'page-faults'
+    ]
+
+    def __init__(self, pid: int, run_dir):
+        self._pid = pid
+        self._run_dir = run_dir
+        self._proc = None
+        self._file = os.path.join(self._run_dir, 'curl.perf_stat')
+        self._counters = {}
+
+    @property
+    def counters(self) -> Dict[str, int]:
+        return self._counters
+
+    @staticmethod
+    def needs_sudo() -> bool:
+        try:
+            with open('/proc/sys/kernel/perf_event_paranoid') as fd:
+                return int(fd.read().strip()) > 2
+        except (OSError, ValueError):
+            return True
+
+    def start(self):
+        if os.path.exists(self._file):
+            os.remove(self._file)
+        args = [
+            'perf', 'stat', '-x', ',', '-o', self._file,
+            '-e', ','.join(PerfStat.EVENTS), '-p', f'{self._pid}'
+        ]
+        if self.needs_sudo():
+            args.insert(0, 'sudo')
+        self._proc = subprocess.Popen(args, text=True, cwd=self._run_dir, shell=False)
+        assert self._proc
+
+    def finish(self):
+        if self._proc:
+            # perf stat writes its counts on SIGINT, not on SIGTERM
+            self._proc.send_signal(signal.SIGINT)
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+            self._proc = None
+        if os.path.exists(self._file):
+            with open(self._file) as fd:
+                self._counters = PerfStat.parse(fd.read())
+
+    @staticmethod
+    def parse(text: str) -> Dict[str, int]:
+        # the CSV lines of `perf stat -x ,` are value,unit,event,...
+        # Events not counted have a value like `<not supported>`.
+        counters = {}
+        for line in text.splitlines():
+            fields = line.split(',')
+            if line.startswith('#') or len(fields) < 3:
+                continue
+            event = fields[2].split(':')[0]
+            with contextlib.suppress(ValueError):
+                counters[event] = int(float(fields[0]))
+        return counters
+
+
 class DTraceProfile:
 
     def __init__(self, pid: int, run_dir):
@@ -177,6 +637,167 @@ class DTraceProfile:
         return self._file
 
 
+class FlameGraph:
+    """
+    Collapsed stacks and the scripts of a FlameGraph checkout.
+
+    Collapsed stacks are lines of `frame;frame;...;frame count`, as
+    written by the `stackcollapse*.pl` scripts. Stacks of several runs
+    add up by summing their counts.
+    """
+
+    def __init__(self, fg_dir: str):
+        self._fg_dir = fg_dir
+
+    @classmethod
+    def from_env(cls, env: Env) -> 'FlameGraph':
+        fg_dir = os.environ.get('FLAMEGRAPH',
+                                os.path.join(env.project_dir, '../FlameGraph'))
+        if not os.path.exists(fg_dir):
+            raise EnvError(f'FlameGraph checkout not found in {fg_dir}, set env variable FLAMEGRAPH')
+        return cls(fg_dir)
+
+    def script(self, name: str) -> str:
+        fpath = os.path.join(self._fg_dir, name)
+        if not os.path.exists(fpath):
+            raise EnvError(f'FlameGraph script not found: {fpath}')
+        return fpath
+
+    @staticmethod
+    def read_stacks(fpath: str) -> Dict[str, int]:
+        stacks = {}
+        with open(fpath) as fd:
+            for line in fd:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack and count.isdigit():
+                    stacks[stack] = stacks.get(stack, 0) + int(count)
+        return stacks
+
+    @staticmethod
+    def write_stacks(stacks: Dict[str, int], fpath: str):
+        with open(fpath, 'w') as fd:
+            fd.writelines(f'{stack} {stacks[stack]}\n' for stack in sorted(stacks))
+
+    def svg(self, stacks_file: str, file_svg: str, file_err: str,
+            title: str, subtitle: str = '', colors: str = 'green'):
+        with open(file_svg, 'w') as cout, open(file_err, 'a') as cerr:
+            subprocess.run([self.script('flamegraph.pl'), '--colors', colors,
+                            '--title', title, '--subtitle', subtitle, stacks_file],
+                           stdout=cout, stderr=cerr, shell=False, check=True)
+
+    def diff_svg(self, base_file: str, cur_file: str, file_svg: str,
+                 file_err: str, title: str, subtitle: str = ''):
+        # `difffolded.pl` writes stacks with counts of both files, which
+        # `flamegraph.pl` colours by their difference: red where `cur_file`
+        # has more samples, blue where it has fewer. The counts are
+        # normalised to the same total, so run lengths do not matter.
+        diff_file = f'{file_svg}.folded'
+        with open(diff_file, 'w') as cout, open(file_err, 'a') as cerr:
+            subprocess.run([self.script('difffolded.pl'), '-n', base_file, cur_file],
+                           stdout=cout, stderr=cerr, shell=False, check=True)
+        self.svg(diff_file, file_svg, file_err, title=title, subtitle=subtitle,
+                 colors='hot')
+
+    @staticmethod
+    def function_shares(stacks: Dict[str, int]) -> Dict[str, float]:
+        # the share of all samples in which a function is on the stack
+        total = sum(stacks.values())
+        counts = {}
+        for stack, count in stacks.items():
+            for frame in set(stack.split(';')):
+                counts[frame] = counts.get(frame, 0) + count
+        return {frame: count / total for frame, count in counts.items()} if total else {}
+
+    @classmethod
+    def grown(cls, base: Dict[str, int], cur: Dict[str, int],
+              top: int = 10) -> List[Tuple[str, float, float]]:
+        # the `top` functions whose share of samples grew the most from
+        # `base` to `cur`, as (function, base share, current share)
+        base_shares = cls.function_shares(base)
+        cur_shares = cls.function_shares(cur)
+        growth = [(frame, base_shares.get(frame, 0.0), share)
+                  for frame, share in cur_shares.items()
+                  if share > base_shares.get(frame, 0.0)]
+        growth.sort(key=lambda g: g[2] - g[1], reverse=True)
+        return growth[:top]
+
+
+class MemDebugLog:
+    """
+    The allocations of a curl with memdebug, logged via `CURL_MEMDEBUG`.
+
+    Each `MEM` line of the log is an allocation or a free with the
+    pointer involved, which tells the size of every free and thereby
+    the heap in use at any time. See `tests/memanalyze.pl` for more.
+    """
+
+    # the arguments may contain parentheses, as in `realloc((nil), 32)`
+    # for a NULL pointer printed by glibc
+    RE_ALLOC = re.compile(r'^MEM \S+ (?P<func>malloc|calloc|strdup|wcsdup|realloc)'
+                          r'\((?P<args>.*?)\)(?: \((?P<size>\d+)\))? = (?P<ptr>\S+)$')
+    RE_FREE = re.compile(r'^MEM \S+ free\((?P<ptr>\S+)\)$')
+    NULLS: ClassVar[List[str]] = ['(nil)', '(null)', '0x0', '0']
+
+    def __init__(self, run_dir):
+        self._file = os.path.join(run_dir, 'curl.memdebug')
+        self._stats = None
+
+    @property
+    def file(self) -> str:
+        return self._file
+
+    @property
+    def stats(self) -> Optional[Dict[str, int]]:
+        return self._stats
+
+    def clear(self):
+        if os.path.exists(self._file):
+            os.remove(self._file)
+
+    def parse(self):
+        # Reallocations count as allocations of their new size, as they
+        # often copy. Log lines of threads may be out of order, a free
+        # of an unknown pointer is ignored.
+        if not os.path.exists(self._file):
+            return
+        sizes = {}
+        allocs = frees = alloc_bytes = heap = peak_heap = 0
+        with open(self._file, errors='replace') as fd:
+            for line in fd:
+                line = line.rstrip('\n')
+                m = self.RE_ALLOC.match(line)
+                if m:
+                    if m.group('ptr') in self.NULLS:
+                        continue
+                    args = [a.strip() for a in m.group('args').split(',')]
+                    if m.group('func') == 'malloc':
+                        size = int(args[0])
+                    elif m.group('func') == 'calloc':
+                        size = int(args[0]) * int(args[1])
+                    elif m.group('func') == 'realloc':
+                        size = int(args[1])
+                        heap -= sizes.pop(args[0], 0)
+                    else:
+                        size = int(m.group('size') or 0)
+                    allocs += 1
+                    alloc_bytes += size
+                    sizes[m.group('ptr')] = size
+                    heap += size
+                    peak_heap = max(peak_heap, heap)
+                    continue
+                m = self.RE_FREE.match(line)
+                if m and m.group('ptr') in sizes:
+                    frees += 1
+                    heap -= sizes.pop(m.group('ptr'))
+        self._stats = {
+            'allocs': allocs,
+            'frees': frees,
+            'alloc-bytes': alloc_bytes,
+            'peak-heap': peak_heap,
+            'leaked-bytes': heap,
+        }
+
+
 class RunTcpDump:
 
     def __init__(self, env, run_dir):
@@ -266,6 +887,121 @@ class RunTcpDump:
             self._proc = None
 
 
+class RunThroughput:
+    """
+    Follow curl's trace while it runs and collect the body bytes each
+    transfer receives, per time interval.
+
+    Needs curl to run with `TRACE_ARGS`, which only works with verbose
+    strings enabled in the build.
+    """
+
+    INTERVAL = 0.05
+    TRACE_ARGS: ClassVar[List[str]] = [
+        '-v', '--trace-time', '--trace-ids', '--trace-config', 'write'
+    ]
+    WRITE_PAT: ClassVar[re.Pattern] = re.compile(
+        r'^(\d\d):(\d\d):(\d\d)\.(\d{6}) \[(\d+)-[^\]]*\] \* \[WRITE\] '
+        r'download_write body\(type=[0-9a-f]+, blen=(\d+)\) -> 0')
+
+    def __init__(self, trace_file: str, interval: float = INTERVAL):
+        self._trace_file = trace_file
+        self._interval = interval
+        self._thread = None
+        self._running = False
+        self._xfer_start = {}
+        self._buckets = {}
+        self._last_ts = None
+        self._day_offset = 0
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def series(self) -> Dict[int, List[int]]:
+        """Body bytes received by each transfer in each interval since its first."""
+        return self._buckets
+
+    def _add_line(self, line: str):
+        m = self.WRITE_PAT.match(line)
+        if not m:
+            return
+        ts = int(m.group(1)) * 3600 + int(m.group(2)) * 60 + int(m.group(3)) + \
+            int(m.group(4)) / 1000000 + self._day_offset
+        if self._last_ts is not None and ts < self._last_ts - 3600:
+            # trace time is wall clock, we passed midnight
+            self._day_offset += 86400
+            ts += 86400
+        self._last_ts = ts
+        xfer_id = int(m.group(5))
+        if xfer_id not in self._xfer_start:
+            self._xfer_start[xfer_id] = ts
+            self._buckets[xfer_id] = []
+        buckets = self._buckets[xfer_id]
+        idx = int((ts - self._xfer_start[xfer_id]) / self._interval)
+        if idx >= len(buckets):
+            buckets.extend([0] * (idx + 1 - len(buckets)))
+        buckets[idx] += int(m.group(6))
+
+    def _follow(self):
+        with open(self._trace_file) as fd:
+            pending = ''
+            while True:
+                running = self._running
+                data = fd.read()
+                if data:
+                    lines = (pending + data).split('\n')
+                    pending = lines.pop()
+                    for line in lines:
+                        self._add_line(line)
+                elif not running:
+                    break
+                else:
+                    time.sleep(0.01)
+            if pending:
+                self._add_line(pending)
+
+    def start(self):
+        self._running = True
+        self._thread = Thread(target=self._follow)
+        self._thread.start()
+
+    def finish(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def summary(self, xfer_id: int) -> Dict[str, Any]:
+        buckets = self._buckets.get(xfer_id, [])
+        rates = [b / self._interval for b in buckets]
+        # the last interval is partial, leave it out unless that is all
+        full = rates[:-1] if len(rates) > 1 else rates
+        if len(full) >= 4:
+            # mean rate over the second half of the transfer. Rate limited
+            # transfers arrive in bursts, a median would often be 0 there.
+            second_half = full[len(full) // 2:]
+            steady = sum(second_half) / len(second_half)
+        else:
+            steady = sum(buckets) / (len(buckets) * self._interval) if buckets else 0
+        ramp_up = len(full) * self._interval
+        for idx, rate in enumerate(full):
+            if rate >= 0.9 * steady:
+                ramp_up = idx * self._interval
+                break
+        stalls = 0
+        for idx, nbytes in enumerate(buckets):
+            if nbytes == 0 and buckets[idx - 1] > 0:
+                stalls += 1
+        return {
+            'bytes': sum(buckets),
+            'ramp_up': ramp_up,
+            'steady_rate': steady,
+            'stalls': stalls,
+        }
+
+
 class ExecResult:
 
     def __init__(self, args: List[str], exit_code: int,
@@ -274,7 +1010,10 @@ class ExecResult:
                  with_stats: bool = False,
                  exception: Optional[str] = None,
                  profile: Optional[RunProfile] = None,
-                 tcpdump: Optional[RunTcpDump] = None):
+                 tcpdump: Optional[RunTcpDump] = None,
+                 throughput: Optional[RunThroughput] = None,
+                 stacks: Optional[str] = None,
+                 memdebug: Optional[MemDebugLog] = None):
         self._args = args
         self._exit_code = exit_code
         self._exception = exception
@@ -282,6 +1021,9 @@ class ExecResult:
         self._stderr = stderr
         self._profile = profile
         self._tcpdump = tcpdump
+        self._throughput = throughput
+        self._stacks = stacks
+        self._memdebug = memdebug
         self._duration = duration if duration is not None else timedelta()
         self._response = None
         self._responses = []
@@ -354,6 +1096,19 @@ class ExecResult:
     def tcpdump(self) -> Optional[RunTcpDump]:
         return self._tcpdump
 
+    @property
+    def throughput(self) -> Optional[RunThroughput]:
+        return self._throughput
+
+    @property
+    def stacks(self) -> Optional[str]:
+        # file with the collapsed stacks of the run, when profiled
+        return self._stacks
+
+    @property
+    def memdebug(self) -> Optional[MemDebugLog]:
+        return self._memdebug
+
     @property
     def response(self) -> Optional[Dict]:
         return self._response
@@ -627,10 +1382,16 @@ class CurlClient:
                  with_perf: bool = False,
                  with_flame: bool = False,
                  force_resolv: bool = True,
-                 socks_args: Optional[List[str]] = None):
+                 socks_args: Optional[List[str]] = None,
+                 profile_interval: Optional[float] = None,
+                 with_perf_stat: bool = False,
+                 curl: Optional[str] = None,
+                 placement: Optional[CpuPlacement] = None,
+                 with_memdebug: bool = False):
         self.env = env
         self._timeout = timeout if timeout else env.test_timeout
-        self._curl = os.environ.get('CURL', env.curl)
+        self._curl = curl if curl else os.environ.get('CURL', env.curl)
+        self._placement = placement if placement else CpuPlacement()
         self._run_dir = run_dir if run_dir else os.path.join(env.gen_dir, 'curl')
         self._stdoutfile = f'{self._run_dir}/curl.stdout'
         self._stderrfile = f'{self._run_dir}/curl.stderr'
@@ -639,13 +1400,9 @@ class CurlClient:
         self._with_dtrace = with_dtrace
         self._with_perf = with_perf
         self._with_flame = with_flame
-        self._fg_dir = None
+        self._flame = None
         if self._with_flame:
-            self._fg_dir = os.path.join(self.env.project_dir, '../FlameGraph')
-            if 'FLAMEGRAPH' in os.environ:
-                self._fg_dir = os.environ['FLAMEGRAPH']
-            if not os.path.exists(self._fg_dir):
-                raise EnvError(f'FlameGraph checkout not found in {self._fg_dir}, set env variable FLAMEGRAPH')
+            self._flame = FlameGraph.from_env(self.env)
             if sys.platform.startswith('linux'):
                 self._with_perf = True
             elif sys.platform.startswith('darwin'):
@@ -653,6 +1410,9 @@ class CurlClient:
             else:
                 raise EnvError(f'flame graphs unsupported on {sys.platform}')
         self._socks_args = socks_args
+        self._profile_interval = profile_interval
+        self._with_perf_stat = with_perf_stat
+        self._with_memdebug = with_memdebug
         self._silent = silent
         self._run_env = run_env
         self._server_addr = server_addr if server_addr else '127.0.0.1'
@@ -734,9 +1494,12 @@ class CurlClient:
                       no_save: bool = False,
                       limit_rate: Optional[str] = None,
                       extra_args: Optional[List[str]] = None,
-                      url_options: Optional[Dict[str, List[str]]] = None):
+                      url_options: Optional[Dict[str, List[str]]] = None,
+                      with_throughput: bool = False):
         if extra_args is None:
             extra_args = []
+        if with_throughput:
+            extra_args.extend(RunThroughput.TRACE_ARGS)
         if no_save:
             if self.env.curl_version_at_least('8.16.0'):
                 extra_args.extend(['--out-null'])
@@ -758,7 +1521,8 @@ class CurlClient:
                          url_options=url_options,
                          with_headers=with_headers,
                          with_profile=with_profile,
-                         with_tcpdump=with_tcpdump)
+                         with_tcpdump=with_tcpdump,
+                         with_throughput=with_throughput)
 
     def http_upload(self, urls: List[str], data: str,
                     alpn_proto: Optional[str] = None,
@@ -1019,55 +1783,67 @@ class CurlClient:
         return self._run(args=my_args, with_stats=with_stats, with_profile=with_profile)
 
     def _run(self, args, intext='', with_stats: bool = False,
-             with_profile: bool = True, with_tcpdump: bool = False):
+             with_profile: bool = True, with_tcpdump: bool = False,
+             with_throughput: bool = False):
         self._rmf(self._stdoutfile)
         self._rmf(self._stderrfile)
         self._rmf(self._headerfile)
         exception = None
         profile = None
         tcpdump = None
+        throughput = None
         perf = None
+        perf_stat = None
         dtrace = None
+        memdebug = None
+        run_env = self._run_env
+        if self._with_memdebug:
+            memdebug = MemDebugLog(self._run_dir)
+            memdebug.clear()
+            run_env = dict(run_env if run_env else os.environ)
+            run_env['CURL_MEMDEBUG'] = memdebug.file
         if with_tcpdump:
             tcpdump = RunTcpDump(self.env, self._run_dir)
             tcpdump.start()
         started_at = datetime.now(timezone.utc)
         try:
             with open(self._stdoutfile, 'w') as cout, open(self._stderrfile, 'w') as cerr:
+                if with_throughput:
+                    throughput = RunThroughput(self._stderrfile)
+                    throughput.start()
                 if with_profile:
-                    end_at = started_at + timedelta(seconds=self._timeout) \
-                        if self._timeout else None
                     log.info(f'starting: {args}')
-                    p = subprocess.Popen(args, stderr=cerr, stdout=cout,
-                                         cwd=self._run_dir, shell=False,
-                                         env=self._run_env)
-                    profile = RunProfile(p.pid, started_at, self._run_dir)
+                    with self._placement.spawning():
+                        p = subprocess.Popen(args, stderr=cerr, stdout=cout,
+                                             cwd=self._run_dir, shell=False,
+                                             env=run_env)
+                    profile = RunProfile(p.pid, started_at, self._run_dir,
+                                         interval=self._profile_interval)
                     if self._with_perf:
                         perf = PerfProfile(p.pid, self._run_dir)
                         perf.start()
                     elif self._with_dtrace:
                         dtrace = DTraceProfile(p.pid, self._run_dir)
                         dtrace.start()
-                    ptimeout = 0.0
-                    while True:
-                        try:
-                            p.wait(timeout=ptimeout)
-                            break
-                        except subprocess.TimeoutExpired as e:
-                            if end_at and datetime.now(timezone.utc) >= end_at:
-                                p.kill()
-                                raise subprocess.TimeoutExpired(cmd=args, timeout=self._timeout) from e
-                            profile.sample()
-                            ptimeout = 0.001
+                    if self._with_perf_stat:
+                        perf_stat = PerfStat(p.pid, self._run_dir)
+                        perf_stat.start()
+                    profile.start()
+                    if not profile.wait(p, timeout=self._timeout):
+                        p.kill()
+                        profile.wait(p)
+                        profile.finish()
+                        raise subprocess.TimeoutExpired(cmd=args, timeout=self._timeout)
                     exitcode = p.returncode
                     profile.finish()
                     log.info(f'done: exit={exitcode}, profile={profile}')
                 else:
-                    p = subprocess.run(args, stderr=cerr, stdout=cout,
-                                       cwd=self._run_dir, shell=False,
-                                       input=intext.encode() if intext else None,
-                                       timeout=self._timeout,
-                                       env=self._run_env, check=False)
+                    with self._placement.spawning():
+                        p = subprocess.run(args, stderr=cerr, stdout=cout,
+                                           cwd=self._run_dir, shell=False,
+                                           input=intext.encode() if intext else None,
+                                           timeout=self._timeout,
+                                           env=run_env, check=False)
                     exitcode = p.returncode
         except subprocess.TimeoutExpired:
             now = datetime.now(timezone.utc)
@@ -1077,14 +1853,22 @@ class CurlClient:
             exitcode = -1
             exception = 'TimeoutExpired'
         ended_at = datetime.now(timezone.utc)
+        if throughput:
+            throughput.finish()
         if tcpdump:
             tcpdump.finish()
         if perf:
             perf.finish()
+        if perf_stat:
+            perf_stat.finish()
+            profile.add_counters(perf_stat.counters)
         if dtrace:
             dtrace.finish()
+        if memdebug:
+            memdebug.parse()
+        stacks = None
         if self._with_flame:
-            self._generate_flame(args, dtrace=dtrace, perf=perf)
+            stacks = self._generate_flame(args, dtrace=dtrace, perf=perf)
         with open(self._stdoutfile) as fout, open(self._stderrfile) as ferr:
             coutput = fout.readlines()
             cerrput = ferr.readlines()
@@ -1092,7 +1876,9 @@ class CurlClient:
                           stdout=coutput, stderr=cerrput,
                           duration=ended_at - started_at,
                           with_stats=with_stats,
-                          profile=profile, tcpdump=tcpdump)
+                          profile=profile, tcpdump=tcpdump,
+                          throughput=throughput, stacks=stacks,
+                          memdebug=memdebug)
 
     def _raw(self, urls, intext='', timeout=None, options=None, insecure=False,
              alpn_proto: Optional[str] = None,
@@ -1101,13 +1887,15 @@ class CurlClient:
              with_headers=True,
              def_tracing=True,
              with_profile=False,
-             with_tcpdump=False):
+             with_tcpdump=False,
+             with_throughput=False):
         args = self._complete_args(
             urls=urls, timeout=timeout, options=options, insecure=insecure,
             alpn_proto=alpn_proto, with_headers=with_headers,
             def_tracing=def_tracing, url_options=url_options)
         r = self._run(args, intext=intext, with_stats=with_stats,
-                      with_profile=with_profile, with_tcpdump=with_tcpdump)
+                      with_profile=with_profile, with_tcpdump=with_tcpdump,
+                      with_throughput=with_throughput)
         if r.exit_code == 0 and with_headers:
             self._parse_headerfile(self._headerfile, r=r)
         return r
@@ -1240,9 +2028,7 @@ class CurlClient:
     def _perf_collapse(self, perf: PerfProfile, file_err):
         if not os.path.exists(perf.file):
             raise EnvError(f'perf output file does not exist: {perf.file}')
-        fg_collapse = os.path.join(self._fg_dir, 'stackcollapse-perf.pl')
-        if not os.path.exists(fg_collapse):
-            raise EnvError(f'FlameGraph script not found: {fg_collapse}')
+        fg_collapse = self._flame.script('stackcollapse-perf.pl')
         stacks_collapsed = f'{perf.file}.collapsed'
         log.info(f'collapsing stacks into {stacks_collapsed}')
         with open(stacks_collapsed, 'w') as cout, open(file_err, 'w') as cerr:
@@ -1253,9 +2039,7 @@ class CurlClient:
     def _dtrace_collapse(self, dtrace: DTraceProfile, file_err):
         if not os.path.exists(dtrace.file):
             raise EnvError(f'dtrace output file does not exist: {dtrace.file}')
-        fg_collapse = os.path.join(self._fg_dir, 'stackcollapse.pl')
-        if not os.path.exists(fg_collapse):
-            raise EnvError(f'FlameGraph script not found: {fg_collapse}')
+        fg_collapse = self._flame.script('stackcollapse.pl')
         stacks_collapsed = f'{dtrace.file}.collapsed'
         log.info(f'collapsing stacks into {stacks_collapsed}')
         with open(stacks_collapsed, 'w') as cout, open(file_err, 'a') as cerr:
@@ -1266,10 +2050,7 @@ class CurlClient:
     def _generate_flame(self, curl_args: List[str],
                         dtrace: Optional[DTraceProfile] = None,
                         perf: Optional[PerfProfile] = None):
-        fg_gen_flame = os.path.join(self._fg_dir, 'flamegraph.pl')
         file_svg = os.path.join(self._run_dir, 'curl.flamegraph.svg')
-        if not os.path.exists(fg_gen_flame):
-            raise EnvError(f'FlameGraph script not found: {fg_gen_flame}')
 
         log.info('waiting a sec for perf/dtrace to finish flushing')
         time.sleep(2)
@@ -1290,10 +2071,9 @@ class CurlClient:
         else:
             title = cmdline
             subtitle = ''
-        with open(file_svg, 'w') as cout, open(file_err, 'a') as cerr:
-            subprocess.run([fg_gen_flame, '--colors', 'green', '--title', title, '--subtitle',
-                            subtitle, stacks_collapsed],
-                           stdout=cout, stderr=cerr, cwd=self._run_dir, shell=False, check=True)
+        self._flame.svg(stacks_collapsed, file_svg, file_err,
+                        title=title, subtitle=subtitle)
+        return stacks_collapsed
 
     def mk_altsvc_file(self, name, src_alpn, src_host, src_port,
                        dest_alpn, dest_host, dest_port):
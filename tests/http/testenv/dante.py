@@ -28,7 +28,7 @@ import socket
 import subprocess
 import time
 from datetime import datetime, timedelta, timezone
-from typing import Dict
+from typing import Dict, Optional
 
 from . import CurlClient
 from .env import Env
@@ -76,6 +76,10 @@ class Dante:
     def exists(self):
         return os.path.exists(self._cmd)
 
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process else None
+
     def is_running(self):
         if self._process:
             self._process.poll()
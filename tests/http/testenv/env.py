@@ -25,6 +25,7 @@
 import gzip
 import logging
 import os
+import random
 import re
 import shutil
 import subprocess
@@ -946,3 +947,74 @@ class Env:
             fd.write("Content-Encoding: x-gzip\n")
             fd.write("\n")
         return fpath
+
+    @staticmethod
+    def content_encodings() -> List[str]:
+        # the encodings we can compress files with and curl can decode,
+        # as in "Accept-Encoding"
+        encodings = []
+        if Env.curl_has_feature("libz"):
+            encodings.append("gzip")
+        if Env.curl_has_feature("brotli") and shutil.which("brotli"):
+            encodings.append("br")
+        if Env.curl_has_feature("zstd") and shutil.which("zstd"):
+            encodings.append("zstd")
+        return encodings
+
+    def make_data_encoded(
+        self, indir: str, fname: str, fsize: int, encodings: List[str]
+    ) -> Dict[str, str]:
+        # `fname` with `fsize` bytes of JSON access log lines, which
+        # compress like the text responses of real sites do, and a
+        # compressed copy for each of `encodings`. A type map for each
+        # copy makes httpd send it with its "Content-Encoding". Returns
+        # the names of the type maps by encoding.
+        os.makedirs(indir, exist_ok=True)
+        fpath = os.path.join(indir, fname)
+        rand = random.Random(fsize)
+        paths = ["/", "/index.html", "/api/v1/items", "/api/v1/users",
+                 "/static/app.js", "/static/style.css", "/search", "/login"]
+        agents = ["curl/8.11.0", "Mozilla/5.0 (X11; Linux x86_64)",
+                  "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5)",
+                  "python-requests/2.32.3"]
+        flen = 0
+        with open(fpath, "w") as fd:
+            while flen < fsize:
+                line = (
+                    f'{{"time":{1700000000 + flen // 100},'
+                    f'"client":"10.{rand.randrange(256)}.{rand.randrange(256)}.'
+                    f'{rand.randrange(256)}","method":"GET",'
+                    f'"path":"{rand.choice(paths)}/{rand.randrange(100000)}",'
+                    f'"status":{rand.choice([200, 200, 200, 304, 404])},'
+                    f'"bytes":{rand.randrange(100000)},'
+                    f'"agent":"{rand.choice(agents)}",'
+                    f'"duration_us":{rand.randrange(1000000)}}}\n'
+                )[:fsize - flen]
+                fd.write(line)
+                flen += len(line)
+        varnames = {}
+        for encoding in encodings:
+            if encoding == "gzip":
+                # httpd knows ".gz" files as "x-gzip"
+                epath = f"{fpath}.gz"
+                with open(fpath, "rb") as fin, gzip.open(epath, "wb", compresslevel=6) as fout:
+                    shutil.copyfileobj(fin, fout)
+                content_encoding = "x-gzip"
+            elif encoding == "br":
+                epath = f"{fpath}.br"
+                subprocess.run(["brotli", "-f", "-q", "5", "-o", epath, fpath], check=True)
+                content_encoding = "br"
+            elif encoding == "zstd":
+                epath = f"{fpath}.zst"
+                subprocess.run(["zstd", "-f", "-q", "-3", "-o", epath, fpath], check=True)
+                content_encoding = "zstd"
+            else:
+                raise EnvError(f"unable to create content encoding {encoding}")
+            varname = f"{fname}.{encoding}.var"
+            with open(os.path.join(indir, varname), "w") as fd:
+                fd.write(f"URI: {os.path.basename(epath)}\n")
+                fd.write("Content-Type: text/plain\n")
+                fd.write(f"Content-Encoding: {content_encoding}\n")
+                fd.write("\n")
+            varnames[encoding] = varname
+        return varnames
@@ -63,6 +63,14 @@ class H2o:
     def port(self) -> int:
         return self._port
 
+    def set_cred_name(self, name: str):
+        self._cred_name = name
+
+    def reload_if_config_changed(self):
+        if self.is_running() and self._loaded_cred_name == self._cred_name:
+            return True
+        return self.reload()
+
     @property
     def h1_port(self) -> Optional[int]:
         return getattr(self, "_h1_port", None)
@@ -109,6 +117,10 @@ class H2o:
     def _log(self, level, msg):
         getattr(log, level)(f"[{self._name}] {msg}")
 
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process else None
+
     def is_running(self):
         if self._process:
             self._process.poll()
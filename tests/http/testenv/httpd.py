@@ -109,6 +109,16 @@ class Httpd:
     def docs_dir(self):
         return self._docs_dir
 
+    @property
+    def pid(self) -> Optional[int]:
+        # the parent process, apachectl does not wait for it
+        pid_file = os.path.join(self._logs_dir, 'httpd.pid')
+        try:
+            with open(pid_file) as fd:
+                return int(fd.read().strip())
+        except (OSError, ValueError):
+            return None
+
     def clear_logs(self):
         self._rmf(self._error_log)
 
@@ -312,6 +322,8 @@ class Httpd:
                 f'TypesConfig "{self._conf_dir}/mime.types',
                 'SSLSessionCache "shmcb:ssl_gcache_data(32000)"',
                 'AddEncoding x-gzip .gz .tgz .gzip',
+                'AddEncoding br .br',
+                'AddEncoding zstd .zst',
                 'AddHandler type-map .var',
             ]
             conf.extend([f'Listen {port}' for _, port in self.ports.items()])
@@ -536,6 +548,9 @@ class Httpd:
                 '    <Location /curltest/put>',
                 '      SetHandler curltest-put',
                 '    </Location>',
+                '    <Location /curltest/synth>',
+                '      SetHandler curltest-synth',
+                '    </Location>',
                 '    <Location /curltest/tweak>',
                 '      SetHandler curltest-tweak',
                 '    </Location>',
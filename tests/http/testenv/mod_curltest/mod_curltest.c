@@ -945,6 +945,227 @@ cleanup:
   return DECLINED;
 }
 
+/* Synthetic content: the bytes at offset `n * 8` are the little-endian
+ * n-th output of splitmix64 seeded with `seed`, so any range is generated
+ * without reading what comes before it. The last SYNTH_TRAILER_LEN bytes
+ * of a resource carry a checksum over all bytes before them. */
+#define SYNTH_TRAILER_FMT   "\nsynth-sum %016" APR_UINT64_T_HEX_FMT "\n"
+#define SYNTH_TRAILER_LEN   28
+#define SYNTH_SUM_INIT      APR_UINT64_C(0xcbf29ce484222325)
+#define SYNTH_SUM_PRIME     APR_UINT64_C(0x100000001b3)
+
+static apr_uint64_t synth_word(apr_uint64_t seed, apr_uint64_t n)
+{
+  apr_uint64_t z = seed + (n + 1) * APR_UINT64_C(0x9e3779b97f4a7c15);
+  z = (z ^ (z >> 30)) * APR_UINT64_C(0xbf58476d1ce4e5b9);
+  z = (z ^ (z >> 27)) * APR_UINT64_C(0x94d049bb133111eb);
+  return z ^ (z >> 31);
+}
+
+static void synth_fill(unsigned char *buf, apr_uint64_t seed,
+                       apr_off_t offset, size_t len)
+{
+  while(len) {
+    apr_uint64_t w = synth_word(seed, (apr_uint64_t)offset / 8);
+    unsigned int i = (unsigned int)(offset % 8);
+    for(; i < 8 && len; ++i, --len, ++offset)
+      *buf++ = (unsigned char)(w >> (i * 8));
+  }
+}
+
+/* fold the data in [from, to) into the checksum, `from` is a multiple of 8.
+ * A last partial word only counts with the bytes present. */
+static apr_uint64_t synth_sum(apr_uint64_t sum, apr_uint64_t seed,
+                              apr_off_t from, apr_off_t to)
+{
+  apr_uint64_t n;
+  for(n = (apr_uint64_t)from / 8; (apr_off_t)(n * 8) < to; ++n) {
+    apr_uint64_t w = synth_word(seed, n);
+    apr_off_t left = to - (apr_off_t)(n * 8);
+    if(left < 8)
+      w &= (APR_UINT64_C(1) << (left * 8)) - 1;
+    sum = (sum ^ w) * SYNTH_SUM_PRIME;
+  }
+  return sum;
+}
+
+/* parse a single "bytes=a-b", "bytes=a-" or "bytes=-n" range into
+ * [*pstart, *pend] for a resource of `size` bytes. */
+static int synth_range(const char *range, apr_off_t size,
+                       apr_off_t *pstart, apr_off_t *pend)
+{
+  char *endp;
+  apr_off_t start, end;
+
+  if(!range || strncmp(range, "bytes=", 6) || strchr(range, ','))
+    return 0;
+  range += 6;
+  if(*range == '-') {
+    end = apr_strtoi64(range + 1, &endp, 10);
+    if(*endp || end <= 0)
+      return 0;
+    start = (end > size) ? 0 : (size - end);
+    end = size - 1;
+  }
+  else {
+    start = apr_strtoi64(range, &endp, 10);
+    if(endp == range || *endp != '-' || start < 0)
+      return 0;
+    if(!endp[1])
+      end = size - 1;
+    else {
+      range = endp + 1;
+      end = apr_strtoi64(range, &endp, 10);
+      if(*endp || end < start)
+        return 0;
+      if(end >= size)
+        end = size - 1;
+    }
+  }
+  if(start >= size)
+    return 0;
+  *pstart = start;
+  *pend = end;
+  return 1;
+}
+
+static int curltest_synth_handler(request_rec *r)
+{
+  conn_rec *c = r->connection;
+  apr_bucket_brigade *bb;
+  apr_bucket *b;
+  apr_status_t rv;
+  unsigned char buffer[64 * 1024];
+  char trailer[SYNTH_TRAILER_LEN + 1];
+  const char *request_id = NULL;
+  apr_off_t size = 0, dlen, start, end, offset, sum_offset = 0;
+  apr_uint64_t seed = 0, sum = SYNTH_SUM_INIT;
+  int i, partial;
+
+  if(strcmp(r->handler, "curltest-synth")) {
+    return DECLINED;
+  }
+  if(r->method_number != M_GET) {
+    return DECLINED;
+  }
+
+  if(r->args) {
+    apr_array_header_t *args = apr_cstr_split(r->args, "&", 1, r->pool);
+    for(i = 0; i < args->nelts; ++i) {
+      char *s, *val, *arg = APR_ARRAY_IDX(args, i, char *);
+      s = strchr(arg, '=');
+      if(s) {
+        *s = '\0';
+        val = s + 1;
+        if(!strcmp("size", arg)) {
+          size = apr_atoi64(val);
+          if(size >= 0) {
+            continue;
+          }
+        }
+        else if(!strcmp("seed", arg)) {
+          seed = (apr_uint64_t)apr_atoi64(val);
+          continue;
+        }
+        else if(!strcmp("id", arg)) {
+          /* an id for repeated requests with curl's URL globbing */
+          request_id = val;
+          continue;
+        }
+      }
+      ap_log_rerror(APLOG_MARK, APLOG_ERR, 0, r, "query parameter not "
+                    "understood: '%s' in %s", arg, r->args);
+      ap_die(HTTP_BAD_REQUEST, r);
+      return OK;
+    }
+  }
+
+  /* resources too small for a trailer are all data */
+  dlen = (size >= SYNTH_TRAILER_LEN) ? (size - SYNTH_TRAILER_LEN) : size;
+  partial = synth_range(apr_table_get(r->headers_in, "Range"),
+                        size, &start, &end);
+  if(!partial) {
+    start = 0;
+    end = size - 1;
+  }
+  /* we serve ranges ourself, the byterange filter would buffer all */
+  apr_table_unset(r->headers_in, "Range");
+
+  ap_log_rerror(APLOG_MARK, APLOG_TRACE1, 0, r, "synth: size=%"
+                APR_OFF_T_FMT ", range %" APR_OFF_T_FMT "-%" APR_OFF_T_FMT,
+                size, start, end);
+
+  r->status = partial ? HTTP_PARTIAL_CONTENT : HTTP_OK;
+  ap_set_content_length(r, end - start + 1);
+  if(partial) {
+    apr_table_setn(r->headers_out, "Content-Range",
+                   apr_psprintf(r->pool, "bytes %" APR_OFF_T_FMT "-%"
+                                APR_OFF_T_FMT "/%" APR_OFF_T_FMT,
+                                start, end, size));
+  }
+  apr_table_setn(r->headers_out, "Accept-Ranges", "bytes");
+  /* Discourage content-encodings */
+  apr_table_unset(r->headers_out, "Content-Encoding");
+  if(request_id)
+    apr_table_setn(r->headers_out, "request-id", request_id);
+  apr_table_setn(r->subprocess_env, "no-brotli", "1");
+  apr_table_setn(r->subprocess_env, "no-gzip", "1");
+  ap_set_content_type(r, "application/octet-stream");
+
+  bb = apr_brigade_create(r->pool, c->bucket_alloc);
+  rv = APR_SUCCESS;
+  if(r->header_only || !size)
+    goto done;
+
+  for(offset = start; offset <= end && offset < dlen;) {
+    size_t len = sizeof(buffer);
+    if((apr_off_t)len > dlen - offset)
+      len = (size_t)(dlen - offset);
+    if((apr_off_t)len > end - offset + 1)
+      len = (size_t)(end - offset + 1);
+    synth_fill(buffer, seed, offset, len);
+    if(sum_offset == offset) {
+      /* responses from the start sum up as they go */
+      sum = synth_sum(sum, seed, offset, offset + (apr_off_t)len);
+      sum_offset += (apr_off_t)len;
+    }
+    rv = apr_brigade_write(bb, NULL, NULL, (const char *)buffer, len);
+    if(APR_SUCCESS != rv)
+      goto cleanup;
+    rv = ap_pass_brigade(r->output_filters, bb);
+    if(APR_SUCCESS != rv)
+      goto cleanup;
+    offset += (apr_off_t)len;
+  }
+  if(end >= dlen && size > dlen) {
+    /* the range includes (parts of) the trailer */
+    if(sum_offset < dlen)
+      sum = synth_sum(sum, seed, sum_offset, dlen);
+    apr_snprintf(trailer, sizeof(trailer), SYNTH_TRAILER_FMT, sum);
+    if(start < dlen)
+      start = dlen;
+    rv = apr_brigade_write(bb, NULL, NULL, trailer + (start - dlen),
+                           (apr_size_t)(end - start + 1));
+    if(APR_SUCCESS != rv)
+      goto cleanup;
+  }
+
+done:
+  /* we are done */
+  b = apr_bucket_eos_create(c->bucket_alloc);
+  APR_BRIGADE_INSERT_TAIL(bb, b);
+  rv = ap_pass_brigade(r->output_filters, bb);
+
+cleanup:
+  if(rv == APR_SUCCESS || c->aborted) {
+    ap_log_rerror(APLOG_MARK, APLOG_TRACE1, rv, r, "synth: done");
+    return OK;
+  }
+  /* no way to know what type of error occurred */
+  ap_log_rerror(APLOG_MARK, APLOG_TRACE1, rv, r, "synth failed");
+  return AP_FILTER_ERROR;
+}
+
 static int curltest_post_config(apr_pool_t *p, apr_pool_t *plog,
                                 apr_pool_t *ptemp, server_rec *s)
 {
@@ -981,6 +1202,7 @@ static void curltest_hooks(apr_pool_t *pool)
   ap_hook_handler(curltest_1_1_required, NULL, NULL, APR_HOOK_MIDDLE);
   ap_hook_handler(curltest_sslinfo_handler, NULL, NULL, APR_HOOK_MIDDLE);
   ap_hook_handler(curltest_limit_handler, NULL, NULL, APR_HOOK_MIDDLE);
+  ap_hook_handler(curltest_synth_handler, NULL, NULL, APR_HOOK_MIDDLE);
 }
 
 AP_DECLARE_MODULE(curltest) =
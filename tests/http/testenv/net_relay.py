@@ -0,0 +1,169 @@
+#***************************************************************************
+#                                  _   _ ____  _
+#  Project                     ___| | | |  _ \| |
+#                             / __| | | | |_) | |
+#                            | (__| |_| |  _ <| |___
+#                             \___|\___/|_| \_\_____|
+#
+# Copyright (C) Daniel Stenberg, <daniel@haxx.se>, et al.
+#
+# This software is licensed as described in the file COPYING, which
+# you should have received as part of this distribution. The terms
+# are also available at https://curl.se/docs/copyright.html.
+#
+# You may opt to use, copy, modify, merge, publish, distribute and/or sell
+# copies of the Software, and permit persons to whom the Software is
+# furnished to do so, under the terms of the COPYING file.
+#
+# This software is distributed on an "AS IS" basis, WITHOUT WARRANTY OF ANY
+# KIND, either express or implied.
+#
+# SPDX-License-Identifier: curl
+#
+###########################################################################
+#
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import ClassVar, Dict, List, Optional
+
+from .env import Env
+from .ports import alloc_ports_and_do
+
+log = logging.getLogger(__name__)
+
+
+class NetProfile:
+    """Properties of a network path to emulate."""
+
+    def __init__(self, name: str, rtt: float, jitter: float = 0,
+                 rate: float = 0, loss: float = 0):
+        self.name = name
+        self.rtt = rtt        # round trip time in seconds
+        self.jitter = jitter  # variation of the one way delay in seconds
+        self.rate = rate      # bytes per second in each direction, 0 unlimited
+        self.loss = loss      # probability of a lost UDP datagram
+
+    def __repr__(self):
+        return f'{self.name} [rtt={self.rtt * 1000:.0f}ms ' \
+               f'jitter={self.jitter * 1000:.0f}ms ' \
+               f'rate={self.rate * 8 / 1000000:.0f}Mbit/s loss={self.loss * 100:.1f}%]'
+
+
+class NetRelay:
+    """
+    TCP and UDP relay in front of a local server that impairs the traffic.
+
+    TCP connections end in the relay, so it can delay and limit them, but
+    TCP segments are never lost. UDP datagrams, as used by QUIC, are also
+    dropped with the loss probability of the profile.
+    """
+
+    PROFILES: ClassVar[Dict[str, NetProfile]] = {
+        p.name: p for p in [
+            NetProfile('lan', rtt=0.001, jitter=0.0001, rate=125000000),
+            NetProfile('wan-50ms', rtt=0.05, jitter=0.002, rate=12500000),
+            NetProfile('lossy-mobile', rtt=0.08, jitter=0.02, rate=1250000,
+                       loss=0.02),
+        ]
+    }
+
+    def __init__(self, env: Env, profile: NetProfile, target_port: int,
+                 name: str = 'net_relay'):
+        self.env = env
+        self.profile = profile
+        self.name = name
+        self._target_port = target_port
+        self._port = 0
+        self._cmd = os.path.join(os.path.dirname(__file__), 'net_relay_server.py')
+        self._run_dir = os.path.join(env.gen_dir, name)
+        self._error_log = os.path.join(self._run_dir, 'error.log')
+        self._error_fd = None
+        self._process = None
+
+    @classmethod
+    def profile_names(cls) -> List[str]:
+        return list(cls.PROFILES.keys())
+
+    @classmethod
+    def get_profile(cls, name: str) -> Optional[NetProfile]:
+        return cls.PROFILES.get(name)
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    def connect_to_args(self, host: str) -> List[str]:
+        # let curl reach the server at `host` through the relay
+        return ['--connect-to',
+                f'{host}:{self._target_port}:127.0.0.1:{self._port}']
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process else None
+
+    def is_running(self):
+        if self._process:
+            self._process.poll()
+            return self._process.returncode is None
+        return False
+
+    def initial_start(self):
+
+        def startup(ports: Dict[str, int]) -> bool:
+            self._port = ports[self.name]
+            if self.start():
+                self.env.update_ports(ports)
+                return True
+            self.stop()
+            self._port = 0
+            return False
+
+        return alloc_ports_and_do({self.name: socket.SOCK_STREAM}, startup,
+                                  self.env.gen_root, max_tries=3)
+
+    def start(self):
+        assert self._port > 0
+        if not os.path.exists(self._run_dir):
+            os.makedirs(self._run_dir)
+        if self._process:
+            self.stop()
+        p = self.profile
+        args = [
+            sys.executable, self._cmd,
+            '--relay', f'{self._port}:{self._target_port}',
+            '--delay', f'{p.rtt / 2}',
+            '--jitter', f'{p.jitter}',
+            '--rate', f'{p.rate}',
+            '--loss', f'{p.loss}',
+        ]
+        self._error_fd = open(self._error_log, 'a')  # noqa: SIM115
+        self._process = subprocess.Popen(args=args, stderr=self._error_fd)
+        return self.wait_live(timeout=timedelta(seconds=Env.SERVER_TIMEOUT))
+
+    def wait_live(self, timeout: timedelta):
+        try_until = datetime.now(timezone.utc) + timeout
+        while datetime.now(timezone.utc) < try_until:
+            if not self.is_running():
+                return False
+            try:
+                with socket.create_connection(('127.0.0.1', self._port), timeout=1):
+                    return True
+            except OSError:
+                time.sleep(.1)
+        log.error(f'net relay on port {self._port} not alive')
+        return False
+
+    def stop(self):
+        if self._process:
+            self._process.terminate()
+            self._process.wait(timeout=2)
+            self._process = None
+        if self._error_fd:
+            self._error_fd.close()
+            self._error_fd = None
+        return True
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+#***************************************************************************
+#                                  _   _ ____  _
+#  Project                     ___| | | |  _ \| |
+#                             / __| | | | |_) | |
+#                            | (__| |_| |  _ <| |___
+#                             \___|\___/|_| \_\_____|
+#
+# Copyright (C) Daniel Stenberg, <daniel@haxx.se>, et al.
+#
+# This software is licensed as described in the file COPYING, which
+# you should have received as part of this distribution. The terms
+# are also available at https://curl.se/docs/copyright.html.
+#
+# You may opt to use, copy, modify, merge, publish, distribute and/or sell
+# copies of the Software, and permit persons to whom the Software is
+# furnished to do so, under the terms of the COPYING file.
+#
+# This software is distributed on an "AS IS" basis, WITHOUT WARRANTY OF ANY
+# KIND, either express or implied.
+#
+# SPDX-License-Identifier: curl
+#
+###########################################################################
+#
+import argparse
+import asyncio
+import logging
+import random
+import socket
+import time
+from typing import Dict, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class Link:
+    """
+    One direction of an impaired network path.
+
+    Data that enters the link is queued for the time it takes to send it
+    at `rate` bytes per second, then delayed by `delay` seconds plus a
+    random jitter. With `in_order`, as for TCP, nothing overtakes data
+    that entered the link before. Datagrams are dropped with probability
+    `loss` and when more than `queue_limit` bytes are waiting.
+    """
+
+    def __init__(self, delay: float, jitter: float, rate: float,
+                 loss: float, queue_limit: int, in_order: bool):
+        self.delay = delay
+        self.jitter = jitter
+        self.rate = rate
+        self.loss = loss
+        self.queue_limit = queue_limit
+        self.in_order = in_order
+        self.queued = 0
+        self._busy_until = 0.0
+        self.last_delivery = 0.0
+
+    def schedule(self, nbytes: int) -> Optional[float]:
+        # the time at which `nbytes` entering now arrive, or None if lost
+        now = time.monotonic()
+        if self.loss > 0 and random.random() < self.loss:
+            return None
+        if not self.in_order and self.queued + nbytes > self.queue_limit:
+            return None
+        sent_at = max(now, self._busy_until)
+        if self.rate > 0:
+            sent_at += nbytes / self.rate
+        self._busy_until = sent_at
+        arrival = sent_at + self.delay
+        if self.jitter > 0:
+            arrival += random.uniform(-self.jitter, self.jitter)
+        if self.in_order:
+            arrival = max(arrival, self.last_delivery)
+        self.last_delivery = arrival
+        return max(arrival, now)
+
+
+class TcpRelay:
+    """
+    Relay TCP connections through a `Link` in each direction.
+
+    The relay accepts the connection of the client itself, which takes no
+    time. It connects to the server one round trip later, so that data
+    sent right after connecting arrives when it would after a TCP handshake
+    on the emulated path.
+    """
+
+    def __init__(self, target_port: int, args):
+        self._target_port = target_port
+        self._args = args
+
+    def _mk_link(self) -> Link:
+        return Link(delay=self._args.delay, jitter=self._args.jitter,
+                    rate=self._args.rate, loss=0, in_order=True,
+                    queue_limit=self._args.queue_limit)
+
+    async def _pipe(self, reader: asyncio.StreamReader,
+                    writer: asyncio.StreamWriter, link: Link):
+        queue = asyncio.Queue()
+        space = asyncio.Event()
+        space.set()
+
+        async def deliver():
+            # write the data in order of arrival, a slow reader keeps it
+            # queued in the link, which stops reading more
+            try:
+                while True:
+                    arrival, data = await queue.get()
+                    if data is None:
+                        break
+                    wait = arrival - time.monotonic()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    writer.write(data)
+                    await writer.drain()
+                    link.queued -= len(data)
+                    if link.queued < link.queue_limit:
+                        space.set()
+                # pass on the end of the stream once all data has arrived
+                if writer.can_write_eof():
+                    writer.write_eof()
+                    await writer.drain()
+            finally:
+                space.set()
+
+        sender = asyncio.ensure_future(deliver())
+        try:
+            while True:
+                await space.wait()
+                if sender.done():
+                    break
+                data = await reader.read(16 * 1024)
+                if not data:
+                    break
+                arrival = link.schedule(len(data))
+                link.queued += len(data)
+                if link.queued >= link.queue_limit:
+                    space.clear()
+                queue.put_nowait((arrival, data))
+            queue.put_nowait((0, None))
+            await sender
+        except ConnectionError:
+            sender.cancel()
+            writer.close()
+
+    async def handle(self, creader: asyncio.StreamReader,
+                     cwriter: asyncio.StreamWriter):
+        # the round trip of the handshake curl did not have to make
+        await asyncio.sleep(2 * self._args.delay)
+        try:
+            sreader, swriter = await asyncio.open_connection('127.0.0.1',
+                                                             self._target_port)
+        except OSError:
+            log.exception(f'connect to {self._target_port} failed')
+            cwriter.close()
+            return
+        for s in [cwriter, swriter]:
+            sock = s.get_extra_info('socket')
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        await asyncio.gather(self._pipe(creader, swriter, self._mk_link()),
+                             self._pipe(sreader, cwriter, self._mk_link()),
+                             return_exceptions=True)
+        for w in [cwriter, swriter]:
+            w.close()
+
+
+class UdpUpstream(asyncio.DatagramProtocol):
+    # the relay's socket towards the server for one client address
+
+    def __init__(self, relay: 'UdpRelay', client_addr: Tuple[str, int]):
+        self._relay = relay
+        self._client_addr = client_addr
+        self.transport = None
+        self.link = relay.mk_link()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self._relay.send_to_client(data, self._client_addr, self.link)
+
+
+class UdpRelay(asyncio.DatagramProtocol):
+
+    def __init__(self, target_port: int, args):
+        self._target_port = target_port
+        self._args = args
+        self._upstreams: Dict[Tuple[str, int], UdpUpstream] = {}
+        self.transport = None
+
+    def mk_link(self) -> Link:
+        return Link(delay=self._args.delay, jitter=self._args.jitter,
+                    rate=self._args.rate, loss=self._args.loss,
+                    in_order=False, queue_limit=self._args.queue_limit)
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def _send_later(self, link: Link, data: bytes, send):
+        arrival = link.schedule(len(data))
+        if arrival is None:
+            return
+        link.queued += len(data)
+
+        def deliver():
+            link.queued -= len(data)
+            send(data)
+
+        loop = asyncio.get_running_loop()
+        loop.call_at(loop.time() + (arrival - time.monotonic()), deliver)
+
+    def send_to_client(self, data: bytes, addr, link: Link):
+        self._send_later(link, data, lambda d: self.transport.sendto(d, addr))
+
+    def datagram_received(self, data, addr):
+        upstream = self._upstreams.get(addr)
+        if upstream is None:
+            upstream = UdpUpstream(self, addr)
+            self._upstreams[addr] = upstream
+            asyncio.ensure_future(self._connect(upstream, data))
+            return
+        if upstream.transport:
+            self._send_later(upstream.link, data, upstream.transport.sendto)
+
+    async def _connect(self, upstream: UdpUpstream, data: bytes):
+        loop = asyncio.get_running_loop()
+        await loop.create_datagram_endpoint(
+            lambda: upstream, remote_addr=('127.0.0.1', self._target_port))
+        self._send_later(upstream.link, data, upstream.transport.sendto)
+
+
+async def run_relay(args):
+    loop = asyncio.get_running_loop()
+    for mapping in args.relay:
+        port, target_port = [int(p) for p in mapping.split(':')]
+        tcp = TcpRelay(target_port, args)
+        await asyncio.start_server(tcp.handle, '127.0.0.1', port)
+        await loop.create_datagram_endpoint(lambda t=target_port: UdpRelay(t, args),
+                                            local_addr=('127.0.0.1', port))
+        log.info(f'relaying port {port} to {target_port}')
+    await asyncio.Future()  # run forever
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='net_relay_server', description="""
+        Relay TCP and UDP ports with added latency, jitter, bandwidth
+        limits and, for UDP, packet loss.
+        """)
+    parser.add_argument("--relay", action='append', required=True,
+                        metavar='port:target',
+                        help="listen on `port` and relay to `target` on localhost")
+    parser.add_argument("--delay", type=float, default=0,
+                        help="one way delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0,
+                        help="random variation of the delay in seconds")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="bytes per second in each direction, 0 for no limit")
+    parser.add_argument("--loss", type=float, default=0,
+                        help="probability of a lost UDP datagram")
+    parser.add_argument("--queue-limit", type=int, default=1024 * 1024,
+                        help="bytes that may be queued in each direction")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        format="%(asctime)s %(message)s",
+        level=logging.INFO,
+    )
+
+    asyncio.run(run_relay(args))
+
+
+if __name__ == "__main__":
+    main()
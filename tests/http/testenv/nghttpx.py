@@ -95,6 +95,10 @@ class Nghttpx:
         self._rmf(self._error_log)
         self._rmf(self._stderr)
 
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process else None
+
     def is_running(self):
         if self._process:
             self._process.poll()
@@ -0,0 +1,106 @@
+#***************************************************************************
+#                                  _   _ ____  _
+#  Project                     ___| | | |  _ \| |
+#                             / __| | | | |_) | |
+#                            | (__| |_| |  _ <| |___
+#                             \___|\___/|_| \_\_____|
+#
+# Copyright (C) Daniel Stenberg, <daniel@haxx.se>, et al.
+#
+# This software is licensed as described in the file COPYING, which
+# you should have received as part of this distribution. The terms
+# are also available at https://curl.se/docs/copyright.html.
+#
+# You may opt to use, copy, modify, merge, publish, distribute and/or sell
+# copies of the Software, and permit persons to whom the Software is
+# furnished to do so, under the terms of the COPYING file.
+#
+# This software is distributed on an "AS IS" basis, WITHOUT WARRANTY OF ANY
+# KIND, either express or implied.
+#
+# SPDX-License-Identifier: curl
+#
+###########################################################################
+import logging
+import struct
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+
+class SynthContent:
+    """
+    The content served by the `curltest-synth` handler of `mod_curltest`.
+
+    The bytes at offset `n * 8` are the little-endian n-th output of
+    splitmix64 seeded with `seed`. The last `TRAILER_LEN` bytes of a
+    resource carry a checksum over all bytes before them.
+    """
+
+    TRAILER_LEN = 28
+    MASK = (1 << 64) - 1
+    SUM_INIT = 0xcbf29ce484222325
+    SUM_PRIME = 0x100000001b3
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.seed = seed & SynthContent.MASK
+        # resources too small for a trailer are all data
+        self.data_len = size - SynthContent.TRAILER_LEN \
+            if size >= SynthContent.TRAILER_LEN else size
+
+    @property
+    def path(self) -> str:
+        return f'/curltest/synth?size={self.size}&seed={self.seed}'
+
+    def _word(self, n: int) -> int:
+        z = (self.seed + (n + 1) * 0x9e3779b97f4a7c15) & SynthContent.MASK
+        z = ((z ^ (z >> 30)) * 0xbf58476d1ce4e5b9) & SynthContent.MASK
+        z = ((z ^ (z >> 27)) * 0x94d049bb133111eb) & SynthContent.MASK
+        return z ^ (z >> 31)
+
+    def _data(self, start: int, end: int) -> bytes:
+        # the data bytes in [start, end)
+        first = start // 8
+        last = (end + 7) // 8
+        words = b''.join([struct.pack('<Q', self._word(n))
+                          for n in range(first, last)])
+        return words[start - first * 8:end - first * 8]
+
+    def checksum(self) -> int:
+        data = self._data(0, self.data_len)
+        if len(data) % 8:
+            data += bytes(8 - len(data) % 8)
+        csum = SynthContent.SUM_INIT
+        for (w,) in struct.iter_unpack('<Q', data):
+            csum = ((csum ^ w) * SynthContent.SUM_PRIME) & SynthContent.MASK
+        return csum
+
+    def trailer(self) -> bytes:
+        if self.size < SynthContent.TRAILER_LEN:
+            return b''
+        return f'\nsynth-sum {self.checksum():016x}\n'.encode()
+
+    def content(self, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Get the bytes from `start` up to and including `end`."""
+        end = self.size - 1 if end is None else min(end, self.size - 1)
+        if start > end:
+            return b''
+        data = self._data(start, min(end + 1, self.data_len))
+        if end >= self.data_len:
+            data += self.trailer()[max(start - self.data_len, 0):end + 1 - self.data_len]
+        return data
+
+    def check(self, data: bytes, offset: int = 0):
+        """Assert that `data` is the content starting at `offset`."""
+        expected = self.content(offset, offset + len(data) - 1)
+        assert len(data) == len(expected), \
+            f'synth content: expected {len(expected)} bytes at ' \
+            f'{offset}, got {len(data)}'
+        if data != expected:
+            pos = next(i for i in range(len(data)) if data[i] != expected[i])
+            raise AssertionError(f'synth content: differs at offset {offset + pos}')
+
+    def check_file(self, fpath: str, offset: int = 0):
+        with open(fpath, 'rb') as fd:
+            self.check(fd.read(), offset=offset)
@@ -29,7 +29,7 @@ import socket
 import subprocess
 import time
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from .curl import CurlClient, ExecResult
 from .env import Env
@@ -94,6 +94,10 @@ class VsFTPD:
     def exists(self):
         return os.path.exists(self._cmd)
 
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process else None
+
     def is_running(self):
         if self._process:
             self._process.poll()
@@ -39,8 +39,9 @@ async def echo(websocket):
             await websocket.send(message)
 
 
-async def run_server(port):
-    async with server.serve(echo, "localhost", port):
+async def run_server(port, max_size, ping_interval):
+    async with server.serve(echo, "localhost", port, max_size=max_size,
+                            ping_interval=ping_interval):
         await asyncio.Future()  # run forever
 
 
@@ -50,6 +51,10 @@ def main():
         """)
     parser.add_argument("--port", type=int,
                         default=9876, help="port to listen on")
+    parser.add_argument("--max-size", type=int, default=2**20,
+                        help="maximum size of incoming messages, 0 for no limit")
+    parser.add_argument("--ping-interval", type=float, default=20,
+                        help="seconds between keepalive pings, 0 for none")
     args = parser.parse_args()
 
     logging.basicConfig(
@@ -57,7 +62,8 @@ def main():
         level=logging.DEBUG,
     )
 
-    asyncio.run(run_server(args.port))
+    asyncio.run(run_server(args.port, args.max_size or None,
+                           args.ping_interval or None))
 
 
 if __name__ == "__main__":
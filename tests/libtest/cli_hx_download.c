@@ -70,6 +70,7 @@ struct transfer_d {
 static size_t transfer_count_d = 1;
 static struct transfer_d *transfer_d;
 static int forbid_reuse_d = 0;
+static int no_save_d = 0;
 
 static struct transfer_d *get_transfer_for_easy_d(CURL *curl)
 {
@@ -88,11 +89,12 @@ static size_t my_write_d_cb(char *buf, size_t nitems, size_t buflen,
   curl_off_t blen = nitems * buflen;
   size_t nwritten;
 
-  curl_mfprintf(stderr, "[t-%zu] RECV %" CURL_FORMAT_CURL_OFF_T " bytes, "
-                "total=%" CURL_FORMAT_CURL_OFF_T ", "
-                "pause_at=%" CURL_FORMAT_CURL_OFF_T "\n",
-                t->idx, blen, t->recv_size, t->pause_at);
-  if(!t->out) {
+  if(verbose_d)
+    curl_mfprintf(stderr, "[t-%zu] RECV %" CURL_FORMAT_CURL_OFF_T " bytes, "
+                  "total=%" CURL_FORMAT_CURL_OFF_T ", "
+                  "pause_at=%" CURL_FORMAT_CURL_OFF_T "\n",
+                  t->idx, blen, t->recv_size, t->pause_at);
+  if(!t->out && !no_save_d) {
     curl_msnprintf(t->filename, sizeof(t->filename) - 1, "download_%zu.data",
                    t->idx);
     t->out = curlx_fopen(t->filename, "wb");
@@ -108,7 +110,7 @@ static size_t my_write_d_cb(char *buf, size_t nitems, size_t buflen,
     return CURL_WRITEFUNC_PAUSE;
   }
 
-  nwritten = fwrite(buf, buflen, nitems, t->out);
+  nwritten = no_save_d ? nitems : fwrite(buf, buflen, nitems, t->out);
   if(nwritten < nitems) {
     curl_mfprintf(stderr, "[t-%zu] write failure\n", t->idx);
     return 0;
@@ -278,11 +280,14 @@ static void usage_hx_download(const char *msg)
     "  -m number  max parallel downloads\n"
     "  -e         use TLS early data when possible\n"
     "  -f         forbid connection reuse\n"
-    "  -n number  total downloads\n");
+    "  -n number  total downloads\n"
+    "  -q         quiet, no verbose output\n");
   curl_mfprintf(stderr,
     "  -A number  abort transfer after `number` response bytes\n"
+    "  -c number  max concurrent streams on a connection\n"
     "  -F number  fail writing response after `number` response bytes\n"
     "  -M number  max concurrent connections to a host\n"
+    "  -N         do not save the downloads\n"
     "  -P number  pause transfer after `number` response bytes\n"
     "  -r <host>:<port>:<addr>  resolve information\n"
     "  -S         share connections between easy handles\n"
@@ -314,6 +319,7 @@ static CURLcode test_cli_hx_download(const char *URL)
   char *resolve = NULL;
   size_t max_host_conns = 0;
   size_t max_total_conns = 0;
+  size_t max_conn_streams = 0;
   int fresh_connect = 0;
   int share_connect = 0;
   char *cafile = NULL;
@@ -322,7 +328,7 @@ static CURLcode test_cli_hx_download(const char *URL)
 
   (void)URL;
 
-  while((ch = cgetopt(test_argc, test_argv, "aefhm:n:xA:C:F:M:P:r:ST:V:6"))
+  while((ch = cgetopt(test_argc, test_argv, "aefhm:n:qxA:c:C:F:M:NP:r:ST:V:6"))
         != -1) {
     const char *opt = coptarg;
     curl_off_t num;
@@ -348,6 +354,9 @@ static CURLcode test_cli_hx_download(const char *URL)
       if(!curlx_str_number(&opt, &num, LONG_MAX))
         transfer_count_d = (size_t)num;
       break;
+    case 'q':
+      verbose_d = 0;
+      break;
     case 'x':
       fresh_connect = 1;
       break;
@@ -355,6 +364,10 @@ static CURLcode test_cli_hx_download(const char *URL)
       if(!curlx_str_number(&opt, &num, LONG_MAX))
         abort_offset = (size_t)num;
       break;
+    case 'c':
+      if(!curlx_str_number(&opt, &num, LONG_MAX))
+        max_conn_streams = (size_t)num;
+      break;
     case 'C':
       curlx_free(cafile);
       cafile = curlx_strdup(coptarg);
@@ -367,6 +380,9 @@ static CURLcode test_cli_hx_download(const char *URL)
       if(!curlx_str_number(&opt, &num, LONG_MAX))
         max_host_conns = (size_t)num;
       break;
+    case 'N':
+      no_save_d = 1;
+      break;
     case 'P':
       if(!curlx_str_number(&opt, &num, LONG_MAX))
         pause_offset = (size_t)num;
@@ -453,6 +469,9 @@ static CURLcode test_cli_hx_download(const char *URL)
                     (long)max_total_conns);
   curl_multi_setopt(multi, CURLMOPT_MAX_HOST_CONNECTIONS,
                     (long)max_host_conns);
+  if(max_conn_streams)
+    curl_multi_setopt(multi, CURLMOPT_MAX_CONCURRENT_STREAMS,
+                      (long)max_conn_streams);
 
   active_transfers = 0;
   for(i = 0; i < transfer_count_d; ++i) {
@@ -503,10 +522,13 @@ static CURLcode test_cli_hx_download(const char *URL)
         curl_multi_remove_handle(multi, easy);
         t = get_transfer_for_easy_d(easy);
         if(t) {
+          curl_off_t total_time = 0;
           t->done = 1;
           t->result = m->data.result;
-          curl_mfprintf(stderr, "[t-%zu] FINISHED with result %d\n",
-                        t->idx, (int)t->result);
+          curl_easy_getinfo(easy, CURLINFO_TOTAL_TIME_T, &total_time);
+          curl_mfprintf(stderr, "[t-%zu] FINISHED with result %d after "
+                        "%" CURL_FORMAT_CURL_OFF_T "us\n",
+                        t->idx, (int)t->result, total_time);
           if(use_earlydata) {
             curl_off_t sent;
             curl_easy_getinfo(easy, CURLINFO_EARLYDATA_SENT_T, &sent);
@@ -71,15 +71,17 @@ static CURLcode test_ws_data_m2_check_recv(const struct curl_ws_frame *frame,
 static CURLcode test_ws_data_m2_echo(const char *url,
                                      size_t count,
                                      size_t plen_min,
-                                     size_t plen_max)
+                                     size_t plen_max,
+                                     bool quiet)
 {
   CURL *curl = NULL;
   CURLcode result = CURLE_OK;
   const struct curl_ws_frame *frame;
   size_t len;
   char *send_buf = NULL, *recv_buf = NULL;
-  size_t i, scount = count, rcount = count;
+  size_t i, scount = count, rcount = count, nmsgs = 0;
   int rblock, sblock;
+  struct curltime started;
 
   send_buf = curlx_calloc(1, plen_max + 1);
   recv_buf = curlx_calloc(1, plen_max + 1);
@@ -101,12 +103,13 @@ static CURLcode test_ws_data_m2_echo(const char *url,
 
   /* use the callback style */
   curl_easy_setopt(curl, CURLOPT_USERAGENT, "ws-data");
-  curl_easy_setopt(curl, CURLOPT_VERBOSE, 1L);
+  curl_easy_setopt(curl, CURLOPT_VERBOSE, quiet ? 0L : 1L);
   curl_easy_setopt(curl, CURLOPT_CONNECT_ONLY, 2L); /* websocket style */
   result = curl_easy_perform(curl);
   curl_mfprintf(stderr, "curl_easy_perform() returned %d\n", (int)result);
   if(result != CURLE_OK)
     goto out;
+  started = curlx_now();
 
   for(len = plen_min; len <= plen_max; ++len) {
     size_t nwritten, nread, slen = len, rlen = len;
@@ -119,9 +122,11 @@ static CURLcode test_ws_data_m2_echo(const char *url,
         result = curl_ws_send(curl, sbuf, slen, &nwritten, 0, CURLWS_BINARY);
         sblock = (result == CURLE_AGAIN);
         if(!result || (result == CURLE_AGAIN)) {
-          curl_mfprintf(stderr, "curl_ws_send(len=%zu) -> %d, "
-                        "%zu (%" CURL_FORMAT_CURL_OFF_T "/%zu)\n", slen,
-                        (int)result, nwritten, (curl_off_t)(len - slen), len);
+          if(!quiet)
+            curl_mfprintf(stderr, "curl_ws_send(len=%zu) -> %d, "
+                          "%zu (%" CURL_FORMAT_CURL_OFF_T "/%zu)\n", slen,
+                          (int)result, nwritten, (curl_off_t)(len - slen),
+                          len);
           sbuf += nwritten;
           slen -= nwritten;
         }
@@ -140,8 +145,10 @@ static CURLcode test_ws_data_m2_echo(const char *url,
                               &nread, &frame);
         if(!result || (result == CURLE_AGAIN)) {
           rblock = (result == CURLE_AGAIN);
-          curl_mfprintf(stderr, "curl_ws_recv(len=%zu) -> %d, %zu (%ld/%zu)\n",
-                        rlen, (int)result, nread, (long)(len - rlen), len);
+          if(!quiet)
+            curl_mfprintf(stderr, "curl_ws_recv(len=%zu) -> %d, "
+                          "%zu (%ld/%zu)\n",
+                          rlen, (int)result, nread, (long)(len - rlen), len);
           if(!result) {
             result = test_ws_data_m2_check_recv(frame, len - rlen, nread, len);
             if(result)
@@ -149,6 +156,8 @@ static CURLcode test_ws_data_m2_echo(const char *url,
           }
           rbuf += nread;
           rlen -= nread;
+          if(!rlen && !rblock)
+            ++nmsgs;
         }
         else
           goto out;
@@ -160,8 +169,11 @@ static CURLcode test_ws_data_m2_echo(const char *url,
       }
 
       if(rblock && sblock) {
-        curl_mfprintf(stderr, "EAGAIN, sleep, try again\n");
-        curlx_wait_ms(1);
+        if(!quiet)
+          curl_mfprintf(stderr, "EAGAIN, wait, try again\n");
+        result = ws_wait(curl, slen || scount, 1);
+        if(result)
+          goto out;
       }
     }
 
@@ -175,6 +187,9 @@ static CURLcode test_ws_data_m2_echo(const char *url,
       goto out;
     }
   }
+  /* summary for performance measurements */
+  curl_mfprintf(stderr, "ws_data: echoed %zu messages in %ldus\n",
+                nmsgs, (long)curlx_timediff_us(curlx_now(), started));
 
 out:
   if(curl) {
@@ -399,6 +414,7 @@ static void test_ws_data_usage(const char *msg)
     "usage: [options] url\n"
     "  -m number  minimum frame size\n"
     "  -M number  maximum frame size\n"
+    "  -q         quiet, no verbose output (model 2)\n"
   );
 }
 
@@ -411,10 +427,11 @@ static CURLcode test_cli_ws_data(const char *URL)
   const char *url;
   size_t plen_min = 0, plen_max = 0, count = 1;
   int ch, model = 2;
+  bool quiet = FALSE;
 
   (void)URL;
 
-  while((ch = cgetopt(test_argc, test_argv, "12c:hm:M:")) != -1) {
+  while((ch = cgetopt(test_argc, test_argv, "12c:hm:M:q")) != -1) {
     const char *opt = coptarg;
     curl_off_t num;
     switch(ch) {
@@ -439,6 +456,9 @@ static CURLcode test_cli_ws_data(const char *URL)
       if(!curlx_str_number(&opt, &num, LONG_MAX))
         plen_max = (size_t)num;
       break;
+    case 'q':
+      quiet = TRUE;
+      break;
     default:
       test_ws_data_usage("invalid option");
       return CURLE_BAD_FUNCTION_ARGUMENT;
@@ -470,7 +490,7 @@ static CURLcode test_cli_ws_data(const char *URL)
   if(model == 1)
     result = test_ws_data_m1_echo(url, plen_min, plen_max);
   else
-    result = test_ws_data_m2_echo(url, count, plen_min, plen_max);
+    result = test_ws_data_m2_echo(url, count, plen_min, plen_max, quiet);
 
   curl_global_cleanup();
 
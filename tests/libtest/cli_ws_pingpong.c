@@ -49,6 +49,36 @@ static CURLcode pingpong(CURL *curl, const char *payload)
   return CURLE_RECV_ERROR;
 }
 
+/* send `count` pings one after the other and report each round-trip time */
+static CURLcode pingpong_rtt(CURL *curl, const char *payload, long count)
+{
+  CURLcode result = CURLE_OK;
+  long i;
+  int waits;
+
+  for(i = 0; i < count; ++i) {
+    struct curltime started = curlx_now();
+    result = ws_send_ping(curl, payload);
+    if(result)
+      break;
+    for(waits = 0; waits < 10; ++waits) {
+      result = ws_recv_pong(curl, payload);
+      if(result != CURLE_AGAIN)
+        break;
+      result = ws_wait(curl, FALSE, 1000);
+      if(result)
+        break;
+      result = CURLE_AGAIN;
+    }
+    if(result)
+      break;
+    curl_mfprintf(stderr, "ws: rtt %ldus\n",
+                  (long)curlx_timediff_us(curlx_now(), started));
+  }
+  ws_close(curl);
+  return (result == CURLE_AGAIN) ? CURLE_RECV_ERROR : result;
+}
+
 #endif
 
 static CURLcode test_cli_ws_pingpong(const char *URL)
@@ -57,12 +87,22 @@ static CURLcode test_cli_ws_pingpong(const char *URL)
   CURL *curl;
   CURLcode result = CURLE_OK;
   const char *payload;
+  long count = 0;
 
   if(!URL || !libtest_arg2) {
-    curl_mfprintf(stderr, "need args: URL payload\n");
+    curl_mfprintf(stderr, "need args: URL payload [count]\n");
     return (CURLcode)2;
   }
   payload = libtest_arg2;
+  if(libtest_arg3) {
+    const char *p = libtest_arg3;
+    curl_off_t num;
+    if(curlx_str_number(&p, &num, LONG_MAX) || !num) {
+      curl_mfprintf(stderr, "invalid ping count: %s\n", libtest_arg3);
+      return (CURLcode)2;
+    }
+    count = (long)num;
+  }
 
   if(curl_global_init(CURL_GLOBAL_ALL) != CURLE_OK) {
     curl_mfprintf(stderr, "curl_global_init() failed\n");
@@ -75,12 +115,16 @@ static CURLcode test_cli_ws_pingpong(const char *URL)
 
     /* use the callback style */
     curl_easy_setopt(curl, CURLOPT_USERAGENT, "ws-pingpong");
-    curl_easy_setopt(curl, CURLOPT_VERBOSE, 1L);
+    curl_easy_setopt(curl, CURLOPT_VERBOSE, count ? 0L : 1L);
     curl_easy_setopt(curl, CURLOPT_CONNECT_ONLY, 2L); /* websocket style */
     result = curl_easy_perform(curl);
     curl_mfprintf(stderr, "curl_easy_perform() returned %d\n", (int)result);
-    if(result == CURLE_OK)
-      result = pingpong(curl, payload);
+    if(result == CURLE_OK) {
+      if(count)
+        result = pingpong_rtt(curl, payload, count);
+      else
+        result = pingpong(curl, payload);
+    }
 
     /* always cleanup */
     curl_easy_cleanup(curl);
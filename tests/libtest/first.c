@@ -209,6 +209,27 @@ void ws_close(CURL *curl)
   curl_mfprintf(stderr, "ws: curl_ws_send returned %d, sent %zu\n",
                 (int)result, sent);
 }
+
+CURLcode ws_wait(CURL *curl, bool want_send, long timeout_ms)
+{
+  curl_socket_t sock = CURL_SOCKET_BAD;
+  struct timeval tv;
+  fd_set rd, wr;
+
+  if(curl_easy_getinfo(curl, CURLINFO_ACTIVESOCKET, &sock) ||
+     (sock == CURL_SOCKET_BAD))
+    return CURLE_RECV_ERROR;
+  FD_ZERO(&rd);
+  FD_ZERO(&wr);
+  FD_SET(sock, &rd);
+  if(want_send)
+    FD_SET(sock, &wr);
+  tv.tv_sec = timeout_ms / 1000;
+  tv.tv_usec = (int)(timeout_ms % 1000) * 1000;
+  if(select_wrapper((int)sock + 1, &rd, &wr, NULL, &tv) < 0)
+    return CURLE_RECV_ERROR;
+  return CURLE_OK;
+}
 #endif /* CURL_DISABLE_WEBSOCKETS */
 
 int main(int argc, const char *argv[])
@@ -85,6 +85,8 @@ extern char *hexdump(const unsigned char *buf, size_t len);
 CURLcode ws_send_ping(CURL *curl, const char *send_payload);
 CURLcode ws_recv_pong(CURL *curl, const char *expected_payload);
 void ws_close(CURL *curl);  /* close the connection */
+/* wait until the connection is readable or, with `want_send`, writable */
+CURLcode ws_wait(CURL *curl, bool want_send, long timeout_ms);
 #endif
 
 /*